@@ -0,0 +1,289 @@
+import os
+import re
+from typing import Any, Dict, List, Literal, Optional, Tuple, Type
+from dotenv import load_dotenv
+from pydantic import Field, ValidationError, field_validator, model_validator
+from pydantic.fields import FieldInfo
+from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
+
+# Loaded once here instead of in every module that reads the environment
+load_dotenv()
+
+# Defaults per APP_ENV, applied to any setting the environment doesn't set itself
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "dev": {
+        "dev_mode": True,
+        "request_metrics_reply_bytes": True,
+        "mongo_min_pool_size": 1,
+        "slow_request_ms": 500,
+    },
+    "staging": {
+        "dev_mode": False,
+        "query_profiler": True,
+        "challenge_store": "mongo",
+    },
+    "prod": {
+        "dev_mode": False,
+        "query_profiler": False,
+        "challenge_store": "mongo",
+        "mongo_max_pool_size": 100,
+        "mongo_min_pool_size": 10,
+    },
+}
+
+# Read once when the process starts; reloading reports changes to these but can't apply them
+RESTART_REQUIRED = {
+    "mongo_uri", "mongo_max_pool_size", "mongo_min_pool_size", "mongo_max_idle_time_ms",
+    "mongo_wait_queue_timeout_ms", "mongo_compressors", "mongo_read_preference",
+    "query_profiler", "challenge_store", "challenge_store_max_size",
+    "srm_timeout_seconds", "srm_connect_timeout_seconds", "srm_max_connections", "srm_max_keepalive_connections",
+    "srm_breaker_failures", "srm_breaker_reset_seconds",
+    "scheduler_mode", "scheduler_lease_seconds", "scheduler_heartbeat_seconds",
+    "image_cleanup_interval_hours", "auto_refill_interval_minutes", "money_flow_interval_hours",
+    "fraud_ring_interval_hours", "trade_graph_sync_seconds", "token_revocation_sync_seconds",
+    "home_feed_sync_seconds",
+    "job_consumer_mode", "job_lane_high_concurrency", "job_lane_default_concurrency", "job_lane_low_concurrency",
+    "listings_page_size", "recent_listings_limit", "messages_page_size", "messages_max_page_size",
+    "admin_page_size", "admin_max_page_size", "transactions_page_size", "abuse_page_size",
+    "idempotency_key_ttl_seconds", "refresh_token_expire_days", "cloudinary_cloud_name",
+    "cloudinary_signed_urls", "image_url_cache_size",
+}
+
+SECRET_FIELDS = {"jwt_secret_key", "challenge_secret_key", "cloudinary_api_key", "cloudinary_api_secret", "metrics_token"}
+
+class ProfileDefaultsSource(PydanticBaseSettingsSource):
+    """Supplies the APP_ENV profile's defaults, below the environment in priority"""
+
+    def get_field_value(self, field: FieldInfo, field_name: str) -> Tuple[Any, str, bool]:
+        return None, field_name, False
+
+    def __call__(self) -> Dict[str, Any]:
+        app_env = os.getenv("APP_ENV", "prod").lower()
+        return dict(PROFILES.get(app_env, {}))
+
+class Settings(BaseSettings):
+    """
+    Typed, validated settings. Each field is read from the environment
+    variable of the same name in upper case (or .env), falling back to the
+    APP_ENV profile and then the default here.
+    """
+
+    model_config = SettingsConfigDict(case_sensitive=False, extra="ignore")
+
+    app_env: Literal["dev", "staging", "prod"] = "prod"   # Unset means prod; dev is opted into explicitly
+    dev_mode: bool = False   # Sends Server-Timing headers
+
+    # Database
+    mongo_uri: Optional[str] = None
+    mongo_max_pool_size: int = Field(50, ge=1)
+    mongo_min_pool_size: int = Field(5, ge=0)
+    mongo_max_idle_time_ms: int = Field(300000, ge=0)
+    mongo_wait_queue_timeout_ms: int = Field(10000, ge=0)
+    mongo_compressors: str = "zstd,snappy,zlib"
+    mongo_read_preference: Literal["primary", "primaryPreferred", "secondary", "secondaryPreferred", "nearest"] = "primary"
+    read_replicas: bool = False   # read-your-writes is tracked per process; enable with one worker or sticky sessions
+    replica_max_staleness_seconds: int = Field(90, ge=90)   # MongoDB rejects less than 90
+
+    # Auth
+    jwt_secret_key: Optional[str] = None
+    jwt_algorithm: str = "HS256"
+    access_token_expire_minutes: int = Field(15, ge=1)
+    refresh_token_expire_days: int = Field(30, ge=1)
+    srm_session_ttl_minutes: int = Field(20, ge=1)
+    challenge_secret_key: Optional[str] = None
+    challenge_ttl_seconds: int = Field(300, ge=30)
+    challenge_store: Literal["memory", "mongo"] = "memory"
+    challenge_store_max_size: int = Field(10000, ge=1)
+    idempotency_key_ttl_seconds: int = Field(86400, ge=60)
+    idempotency_lock_seconds: float = Field(60, gt=0)   # Lease on an in-progress key, renewed while its handler runs
+
+    # Cloudinary
+    cloudinary_cloud_name: Optional[str] = None
+    cloudinary_api_key: Optional[str] = None
+    cloudinary_api_secret: Optional[str] = None
+    max_upload_size_mb: float = Field(10, gt=0)
+    cloudinary_signed_urls: bool = False   # Needs "strict transformations" enabled on the Cloudinary account
+    image_url_cache_size: int = Field(8192, ge=0)
+
+    # SRM scraper
+    srm_scraper_url: str = "http://localhost:3001"
+    srm_logout_url: str = "http://localhost:9000/logout"
+    srm_timeout_seconds: float = Field(20, gt=0)
+    srm_connect_timeout_seconds: float = Field(5, gt=0)
+    srm_max_retries: int = Field(2, ge=0)
+    srm_retry_backoff_seconds: float = Field(0.2, ge=0)
+    srm_max_connections: int = Field(100, ge=1)
+    srm_max_keepalive_connections: int = Field(20, ge=0)
+    srm_breaker_failures: int = Field(5, ge=1)
+    srm_breaker_reset_seconds: float = Field(30, gt=0)
+
+    # Rate limits
+    message_rate_window_seconds: int = Field(10, ge=1)
+    message_rate_max: int = Field(3, ge=1)
+    listing_rate_window_hours: int = Field(24, ge=1)
+    listing_rate_max: int = Field(3, ge=1)
+    daily_credit_limit: float = Field(10000, gt=0)
+    topups_per_day: int = Field(2, ge=1)
+
+    # Wallet
+    wallet_max_balance: float = Field(50000, gt=0)
+    refill_threshold: float = Field(20000, ge=0)
+    refill_amount: float = Field(50000, gt=0)
+    max_daily_refills: int = Field(3, ge=0)
+
+    # Page sizes
+    listings_page_size: int = Field(20, ge=1)
+    recent_listings_limit: int = Field(3, ge=1)
+    messages_page_size: int = Field(50, ge=1)
+    messages_max_page_size: int = Field(100, ge=1)
+    admin_page_size: int = Field(20, ge=1)
+    admin_max_page_size: int = Field(100, ge=1)
+    transactions_page_size: int = Field(50, ge=1)
+    abuse_page_size: int = Field(50, ge=1)
+
+    # Home feed (newest unsold listings kept in memory for /listings/recent and /listings/)
+    home_feed: bool = True
+    home_feed_size: int = Field(60, ge=1)
+    home_feed_sync_seconds: float = Field(5, gt=0)
+    home_feed_max_age_seconds: float = Field(60, gt=0)
+
+    # Search
+    search_exact_count_limit: int = Field(1000, ge=1)   # Totals above this are reported as approximate
+    search_facet_cache_seconds: float = Field(30, ge=0)
+    search_facet_max_categories: int = Field(30, ge=1)
+    search_price_buckets: str = "0,500,1000,2500,5000,10000,25000"
+
+    # Scheduler
+    scheduler_mode: Literal["embedded", "worker"] = "embedded"
+    scheduler_lease_seconds: float = Field(30, gt=0)
+    scheduler_heartbeat_seconds: float = Field(10, gt=0)
+    image_cleanup_interval_hours: float = Field(24, gt=0)
+    auto_refill_interval_minutes: float = Field(60, gt=0)
+    money_flow_interval_hours: float = Field(6, gt=0)
+    fraud_ring_interval_hours: float = Field(24, gt=0)
+    trade_graph_sync_seconds: float = Field(60, gt=0)
+    token_revocation_sync_seconds: float = Field(30, gt=0)
+
+    # Job queue
+    job_consumer_mode: Literal["embedded", "worker"] = "embedded"
+    job_visibility_timeout: float = Field(60, gt=0)
+    job_poll_interval_seconds: float = Field(1, gt=0)
+    job_lane_high_concurrency: int = Field(8, ge=1)
+    job_lane_default_concurrency: int = Field(4, ge=1)
+    job_lane_low_concurrency: int = Field(2, ge=1)
+
+    # HTTP caching of public read endpoints (policies in app/utils/http_cache.py)
+    http_cache: bool = True
+
+    # Response compression (app/middleware/compression.py)
+    compression: bool = True
+    compression_min_bytes: int = Field(1024, ge=0)
+    compression_types: str = "application/json,text/*,application/javascript"
+    compression_offload_bytes: int = Field(65536, ge=0)   # Bigger bodies compress on a worker thread
+    compression_gzip_level: int = Field(6, ge=1, le=9)
+    compression_brotli_quality: int = Field(4, ge=0, le=11)
+    compression_cache_mb: float = Field(32, ge=0)
+
+    # Observability
+    slow_request_ms: float = Field(1000, gt=0)
+    request_metrics_reply_bytes: bool = False   # Re-encodes every MongoDB reply to count its bytes
+    metrics_token: Optional[str] = None   # Bearer token for /metrics; without one, money-flow values are left out
+    query_profiler: bool = False
+    query_profiler_n_plus_one: int = Field(5, ge=2)
+    query_profiler_slow_ms: float = Field(100, gt=0)
+    cold_start_target_ms: float = Field(1500, gt=0)   # Imports + startup hooks; see startup_report.py
+
+    @field_validator("app_env", "scheduler_mode", "job_consumer_mode", "challenge_store", mode="before")
+    @classmethod
+    def lower_case(cls, value):
+        return value.lower() if isinstance(value, str) else value
+
+    @field_validator("srm_scraper_url")
+    @classmethod
+    def strip_trailing_slash(cls, value: str) -> str:
+        return value.rstrip("/")
+
+    @field_validator("search_price_buckets")
+    @classmethod
+    def ascending_buckets(cls, value: str) -> str:
+        edges = [float(edge) for edge in value.split(",") if edge.strip()]
+        if not edges or edges != sorted(set(edges)):
+            raise ValueError("SEARCH_PRICE_BUCKETS must be ascending, distinct numbers")
+        return ",".join(f"{edge:g}" for edge in edges)
+
+    @field_validator("mongo_compressors")
+    @classmethod
+    def known_compressors(cls, value: str) -> str:
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = [name for name in names if name not in ("zstd", "snappy", "zlib")]
+        if unknown:
+            raise ValueError(f"unknown compressors: {', '.join(unknown)}")
+        return ",".join(names)
+
+    @model_validator(mode="after")
+    def check_consistency(self) -> "Settings":
+        if self.mongo_min_pool_size > self.mongo_max_pool_size:
+            raise ValueError("MONGO_MIN_POOL_SIZE can't exceed MONGO_MAX_POOL_SIZE")
+        if self.scheduler_heartbeat_seconds >= self.scheduler_lease_seconds:
+            raise ValueError("SCHEDULER_HEARTBEAT_SECONDS must be shorter than SCHEDULER_LEASE_SECONDS")
+        if self.app_env == "prod" and not self.jwt_secret_key:
+            raise ValueError("JWT_SECRET_KEY is required when APP_ENV=prod")
+        return self
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: Type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        # .env is already in the environment through load_dotenv
+        return init_settings, env_settings, ProfileDefaultsSource(settings_cls), file_secret_settings
+
+    def public_dict(self) -> Dict[str, Any]:
+        """Settings with secrets and database credentials masked, for /admin/config"""
+        return mask_secrets(self.model_dump())
+
+def mask_secrets(values: Dict[str, Any]) -> Dict[str, Any]:
+    values = dict(values)
+    for name in SECRET_FIELDS:
+        if values.get(name):
+            values[name] = "***"
+    if values.get("mongo_uri"):
+        values["mongo_uri"] = re.sub(r"//[^@/]+@", "//***@", values["mongo_uri"])
+    return values
+
+settings = Settings()
+
+# RESTART_REQUIRED values read by the last reload that differ from the ones in effect
+pending_restart: Dict[str, Any] = {}
+
+def reload_settings() -> List[str]:
+    """
+    Re-read .env and the environment and update `settings` in place, so every
+    module holding it sees the new values. Invalid configuration is rejected
+    and the current settings are kept. RESTART_REQUIRED settings keep their
+    running values and are parked in `pending_restart` instead, so `settings`
+    always describes what is in effect. Returns the names of changed settings.
+    """
+    load_dotenv(override=True)
+    try:
+        fresh = Settings()
+    except ValidationError as e:
+        print(f"❌ Settings reload rejected, keeping current settings: {e}")
+        return []
+    changed = [name for name in Settings.model_fields if getattr(fresh, name) != getattr(settings, name)]
+    pending_restart.clear()
+    for name in changed:
+        if name in RESTART_REQUIRED:
+            pending_restart[name] = getattr(fresh, name)
+        else:
+            object.__setattr__(settings, name, getattr(fresh, name))
+
+    applied = [name for name in changed if name not in pending_restart]
+    print(f"🔧 Settings reloaded ({settings.app_env}): {', '.join(applied) or 'no changes'}")
+    if pending_restart:
+        print(f"⚠️ These only take effect after a restart: {', '.join(pending_restart)}")
+    return changed
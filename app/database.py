@@ -1,18 +1,152 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from dotenv import load_dotenv
-import os
+import asyncio
+import importlib.util
+import threading
+from collections import defaultdict
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from app.utils.request_metrics import RequestCommandListener
+from app.utils.query_profiler import QueryProfilerListener
+from app.utils.read_routing import WriteTimeListener
+from app.config import settings
 
-load_dotenv()
+DATABASE_NAME = "brokebuy"
 
-MONGO_URI = os.getenv("MONGO_URI")
-client = AsyncIOMotorClient(MONGO_URI)
-db = client["brokebuy"]
+# Negotiated with the server in order; zstd and snappy are only offered when their package is installed
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
 
-__all__ = ["client", "db"]
+def available_compressors() -> str:
+    return ",".join(
+        name for name in settings.mongo_compressors.split(",")
+        if importlib.util.find_spec(COMPRESSOR_MODULES[name])
+    )
 
-try:
-    client.admin.command('ping')
-    print("MongoDB connection successful")
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Tracks connection pool size, checkouts and the wait queue for /health"""
 
-except Exception as e:
-    print(f"MongoDB connection failed: {e}")
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = defaultdict(int)
+        self.checked_out = defaultdict(int)
+        self.waiting = defaultdict(int)
+        self.checkout_failures = defaultdict(int)
+
+    def _add(self, counter: dict, address, delta: int):
+        with self._lock:
+            counter[f"{address[0]}:{address[1]}"] += delta
+
+    def connection_created(self, event):
+        self._add(self.open, event.address, 1)
+
+    def connection_closed(self, event):
+        self._add(self.open, event.address, -1)
+
+    def connection_check_out_started(self, event):
+        self._add(self.waiting, event.address, 1)
+
+    def connection_checked_out(self, event):
+        self._add(self.waiting, event.address, -1)
+        self._add(self.checked_out, event.address, 1)
+
+    def connection_check_out_failed(self, event):
+        self._add(self.waiting, event.address, -1)
+        self._add(self.checkout_failures, event.address, 1)
+
+    def connection_checked_in(self, event):
+        self._add(self.checked_out, event.address, -1)
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                address: {
+                    "open": self.open[address],
+                    "in_use": self.checked_out[address],
+                    "utilization": round(self.checked_out[address] / settings.mongo_max_pool_size, 3),
+                    "wait_queue": self.waiting[address],
+                    "checkout_failures": self.checkout_failures[address]
+                }
+                for address in list(self.open)
+            }
+
+pool_stats = PoolStatsListener()
+
+class Database:
+    """
+    Owns the MongoDB client. The app creates it on startup and closes it on
+    shutdown; scripts and workers that import `db` without going through
+    startup get it created on first use.
+    """
+
+    client: Optional[AsyncIOMotorClient] = None
+
+    @staticmethod
+    def get_client() -> AsyncIOMotorClient:
+        if Database.client is None:
+            # The request listener charges each command's time and reply size to the request that issued it
+            event_listeners = [RequestCommandListener(), WriteTimeListener(), pool_stats]
+            if settings.query_profiler:
+                event_listeners.append(QueryProfilerListener())
+            # Pool defaults suit one uvicorn worker; scale MONGO_MAX_POOL_SIZE down as WEB_CONCURRENCY goes up
+            Database.client = AsyncIOMotorClient(
+                settings.mongo_uri,
+                maxPoolSize=settings.mongo_max_pool_size,
+                minPoolSize=settings.mongo_min_pool_size,
+                maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+                waitQueueTimeoutMS=settings.mongo_wait_queue_timeout_ms,
+                compressors=available_compressors() or None,
+                readPreference=settings.mongo_read_preference,
+                event_listeners=event_listeners
+            )
+        return Database.client
+
+    @staticmethod
+    def get_db() -> AsyncIOMotorDatabase:
+        return Database.get_client()[DATABASE_NAME]
+
+    @staticmethod
+    async def connect():
+        """Create the client, check the server is reachable and open MONGO_MIN_POOL_SIZE connections up front"""
+        client = Database.get_client()
+        try:
+            # Concurrent pings each need their own connection, so the first requests don't pay for the handshakes
+            await asyncio.gather(*[client.admin.command("ping") for _ in range(max(settings.mongo_min_pool_size, 1))])
+            print("MongoDB connection successful")
+        except Exception as e:
+            print(f"MongoDB connection failed: {e}")
+
+    @staticmethod
+    async def close():
+        if Database.client is not None:
+            Database.client.close()
+            Database.client = None
+
+    @staticmethod
+    def stats() -> dict:
+        return {
+            "max_pool_size": settings.mongo_max_pool_size,
+            "min_pool_size": settings.mongo_min_pool_size,
+            "servers": pool_stats.snapshot()
+        }
+
+class _Deferred:
+    """Stands in for the client or database so modules can import them before the client exists"""
+
+    def __init__(self, resolve):
+        self._resolve = resolve
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __getitem__(self, name):
+        return self._resolve()[name]
+
+client = _Deferred(Database.get_client)
+db = _Deferred(Database.get_db)
+
+__all__ = ["client", "db", "Database"]
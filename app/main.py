@@ -1,10 +1,93 @@
+from app.utils.startup_profile import StartupProfile  # first, so the import phase is timed
+import asyncio
+import signal
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routes import auth, listings, messages, users, wallet, admin, notifications, reviews, abuse, credit_transactions
-from app.tasks.image_cleanup import AsyncIOScheduler, delete_old_listing_images
-from app.tasks.wallet_auto_refill_task import check_all_users_for_auto_refill, get_money_flow_summary
+from app.routes import auth, listings, messages, users, wallet, admin, notifications, reviews, abuse, credit_transactions, metrics, exports
+from app.config import settings, reload_settings
+from app.tasks.scheduler import add_cluster_jobs, add_local_jobs, scheduler_lease
+from app.utils.job_queue import JobQueue
+from app.database import Database
+from app.utils.idempotency import IdempotencyGuard
+from app.utils.trade_graph import TradeGraph
+from app.utils.srm_client import srm_client
+from app.utils.login_coalescer import LoginCoalescer
+from app.utils.refresh_tokens import RefreshTokenStore
+from app.utils.token_revocation import TokenRevocation
+from app.utils.home_feed import HomeFeed
+from app.utils.search_facets import SearchFacets
+from app.utils.near_duplicate import NearDuplicateDetector
+from app.middleware.request_metrics import RequestMetricsMiddleware
+from app.middleware.query_profiler import QueryProfilerMiddleware
+from app.middleware.http_cache import HttpCacheMiddleware
+from app.middleware.compression import CompressionMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients, load in-memory state and start the scheduler; undo it all on shutdown"""
+    StartupProfile.mark("server_boot")
+    await Database.connect()
+    await srm_client.start()
+    StartupProfile.mark("database")
+
+    try:
+        await IdempotencyGuard.ensure_indexes()
+        await LoginCoalescer.ensure_indexes()
+        await auth.challenge_store.ensure_indexes()
+        await RefreshTokenStore.ensure_indexes()
+        await TokenRevocation.ensure_indexes()
+        await NearDuplicateDetector.ensure_indexes()
+        await JobQueue.ensure_indexes()
+        await SearchFacets.ensure_indexes()
+    except Exception as e:
+        print(f"⚠️ Failed to create TTL indexes: {e}")
+    StartupProfile.mark("indexes")
+
+    try:
+        await TradeGraph.load()
+    except Exception as e:
+        print(f"⚠️ Failed to load trade graph: {e}")
+
+    try:
+        await TokenRevocation.sync()
+    except Exception as e:
+        print(f"⚠️ Failed to load revoked tokens: {e}")
+
+    try:
+        await HomeFeed.refresh()
+    except Exception as e:
+        print(f"⚠️ Failed to build home feed: {e}")
+    StartupProfile.mark("in_memory_state")
+
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    scheduler = AsyncIOScheduler()
+    add_local_jobs(scheduler)
+    if settings.scheduler_mode == "embedded":
+        # Every worker schedules the cluster jobs, but only the lease holder runs them
+        add_cluster_jobs(scheduler)
+        scheduler_lease.start()
+    scheduler.start()
+
+    if settings.job_consumer_mode == "embedded":
+        JobQueue.start_consumers()
+
+    if hasattr(signal, "SIGHUP"):
+        # `kill -HUP <worker pid>` re-reads .env and the environment without a restart
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, reload_settings)
+    StartupProfile.mark("background_tasks")
+    StartupProfile.report()
+
+    yield
+
+    scheduler.shutdown()
+    await JobQueue.stop_consumers()
+    await scheduler_lease.stop()
+    await srm_client.close()
+    await Database.close()
+
+# The Cloudinary SDK is set up on first use
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,32 +105,32 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Cache-Control, ETags and 304s for the public read endpoints
+app.add_middleware(HttpCacheMiddleware)
+# Outside the cache middleware, so ETags and 304s are decided on the uncompressed body
+app.add_middleware(CompressionMiddleware)
+
+if settings.query_profiler:
+    # N+1 and slow-query reports; meant for development and staging
+    app.add_middleware(QueryProfilerMiddleware)
+
+# Added last so it wraps everything, including CORS preflights
+app.add_middleware(RequestMetricsMiddleware)
+
 app.include_router(auth.router, prefix="/auth")
 app.include_router(users.router)
 app.include_router(messages.router)
 app.include_router(wallet.router)
 app.include_router(admin.router, prefix="/admin")
+app.include_router(exports.router, prefix="/admin")
 app.include_router(listings.router)
 app.include_router(notifications.router)
 app.include_router(reviews.router)
 app.include_router(abuse.router)
 app.include_router(credit_transactions.router)
+app.include_router(metrics.router)
 
-# Initialize scheduler
-scheduler = AsyncIOScheduler()
-
-@app.on_event("startup")
-async def startup_event():
-    """Start the cleanup scheduler when the app starts"""
-    scheduler.add_job(delete_old_listing_images, "interval", days=1)
-    scheduler.add_job(check_all_users_for_auto_refill, "interval", hours=1)  # Check every hour
-    scheduler.add_job(get_money_flow_summary, "interval", hours=6)  # Log money flow every 6 hours
-    scheduler.start()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Stop the scheduler when the app shuts down"""
-    scheduler.shutdown()
+StartupProfile.mark("imports")
 
 @app.get("/test")
 def test_route():
@@ -58,8 +141,7 @@ async def health_check():
     """Health check endpoint for Docker"""
     try:
         # Test database connection
-        from app.database import client
-        await client.admin.command('ping')
-        return {"status": "healthy", "database": "connected"}
+        await Database.get_client().admin.command('ping')
+        return {"status": "healthy", "database": "connected", "pool": Database.stats()}
     except Exception as e:
-        return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
+        return {"status": "unhealthy", "database": "disconnected", "error": str(e), "pool": Database.stats()}
@@ -0,0 +1,69 @@
+from app.config import settings
+from app.utils.compression import ResponseCompressor
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that brotli- or gzip-compresses responses whose content
+    type is in COMPRESSION_TYPES and whose Content-Length is at least
+    COMPRESSION_MIN_BYTES. Streamed responses (no Content-Length, e.g. CSV
+    exports) and already-encoded ones pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.compression:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+        encoding = ResponseCompressor.choose_encoding(accept_encoding) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = {name: value for name, value in message.get("headers", [])}
+                content_length = headers.get(b"content-length")
+                if (
+                    content_length is None
+                    or b"content-encoding" in headers
+                    or not ResponseCompressor.compressible(headers.get(b"content-type", b"").decode("latin-1"), int(content_length))
+                ):
+                    await send(message)
+                    return
+                start = message
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            start_headers = dict(start["headers"])
+            etag = start_headers.get(b"etag")
+            # Only shared responses are worth keeping; per-user pages would just churn the cache
+            shared = start_headers.get(b"cache-control", b"").startswith(b"public")
+            cache_key = f"{scope['path']}?{scope['query_string'].decode('latin-1')}|{etag.decode('latin-1')}" if etag and shared else None
+            compressed = await ResponseCompressor.compress(body, encoding, cache_key)
+
+            headers = [(name, value) for name, value in start["headers"] if name != b"content-length"]
+            vary = [value for name, value in headers if name == b"vary"]
+            headers = [(name, value) for name, value in headers if name != b"vary"]
+            headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(compressed)).encode()))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,68 @@
+from app.utils.http_cache import HttpCache
+
+# Describe the body, which a 304 doesn't have
+BODY_HEADERS = {b"content-length", b"content-type", b"content-encoding"}
+
+class HttpCacheMiddleware:
+    """
+    ASGI middleware that adds Cache-Control, Vary and weak ETag headers to the
+    GET routes in HttpCache's policy table and answers a matching If-None-Match
+    with a 304. Handlers that set their own ETag (from the stored documents)
+    stream straight through; otherwise the body is hashed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        authenticated = b"authorization" in request_headers
+        start = None
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # The router has matched the route by the time the response starts
+                policy = HttpCache.policy_for(getattr(scope.get("route"), "path", None))
+                if policy is None or message["status"] not in (200, 304):
+                    await send(message)
+                    return
+                headers = [(name, value) for name, value in message.get("headers", []) if name != b"cache-control"]
+                # Keep what's already varied on (e.g. Origin from CORS) and add Authorization
+                vary = [value for name, value in headers if name == b"vary"]
+                headers = [(name, value) for name, value in headers if name != b"vary"]
+                headers.append((b"cache-control", HttpCache.cache_control(policy, authenticated).encode()))
+                headers.append((b"vary", b", ".join(vary + [b"Authorization"])))
+                message = {**message, "headers": headers}
+                if message["status"] == 304 or any(name == b"etag" for name, _ in headers):
+                    await send(message)
+                    return
+                start = message
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            etag = HttpCache.weak_etag(body)
+            headers = start["headers"] + [(b"etag", etag.encode())]
+            if HttpCache.matches(if_none_match, etag):
+                headers = [(name, value) for name, value in headers if name not in BODY_HEADERS]
+                await send({**start, "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,22 @@
+from app.utils.query_profiler import QueryProfile, QueryProfiler, current_profile
+
+class QueryProfilerMiddleware:
+    """ASGI middleware that profiles the MongoDB queries of each request (development/staging only)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(scope["method"], scope["path"])
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_profile.reset(token)
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None) or "unmatched"
+            QueryProfiler.finish(profile)
@@ -0,0 +1,48 @@
+import time
+from typing import Optional
+from app.config import settings
+from app.utils.request_metrics import RequestMetrics, RequestStats, current_request
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that times every request, tags it with its route template
+    and records the MongoDB work charged to it by RequestCommandListener.
+    """
+
+    def __init__(self, app, server_timing: Optional[bool] = None):
+        self.app = app
+        self._server_timing = server_timing
+
+    @property
+    def server_timing(self) -> bool:
+        # Follows DEV_MODE unless set explicitly, so a settings reload applies
+        return settings.dev_mode if self._server_timing is None else self._server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["method"], scope["path"])
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", RequestMetrics.server_timing(stats, time.perf_counter() - start).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            stats.route = getattr(route, "path", None) or "unmatched"
+            RequestMetrics.record(stats, status_code, time.perf_counter() - start)
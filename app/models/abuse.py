@@ -35,3 +35,23 @@ class AbuseReportResponse(BaseModel):
 class AbuseReportUpdate(BaseModel):
     status: Optional[str] = Field(None, description="Status: pending, reviewed, dismissed, action_taken")
     admin_notes: Optional[str] = Field(None, max_length=1000, description="Admin notes about the report")
+
+class FraudRingResponse(BaseModel):
+    id: str
+    members: List[str]
+    size: int
+    trade_count: int
+    total_amount: float
+    reciprocity: float
+    cycles: List[List[str]]
+    score: float
+    status: str = "pending"
+    first_trade_at: Optional[datetime] = None
+    last_trade_at: Optional[datetime] = None
+    detected_at: datetime
+    last_seen_at: datetime
+    admin_notes: Optional[str] = None
+
+class FraudRingUpdate(BaseModel):
+    status: Optional[str] = Field(None, description="Status: pending, confirmed, dismissed")
+    admin_notes: Optional[str] = Field(None, max_length=1000, description="Admin notes about the ring")
@@ -2,6 +2,15 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
+class ImageVariants(BaseModel):
+    public_id: str
+    version: Optional[int] = None
+    thumb: str
+    card: str
+    detail: str
+    lqip: str
+    srcset: str
+
 class ListingCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -28,6 +37,7 @@ class ListingResponse(ListingCreate):
     seller_name: Optional[str] = None
     seller_reg_no: Optional[str] = None
     images: List[str] = Field(default_factory=list)
+    image_variants: List[ImageVariants] = Field(default_factory=list)
 
 
 class ListingUpdate(BaseModel):
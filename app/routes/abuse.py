@@ -1,15 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.models.abuse import AbuseReportCreate, AbuseReportResponse, AbuseReportUpdate, AbuseType
+from app.models.abuse import AbuseReportCreate, AbuseReportResponse, AbuseReportUpdate, AbuseType, FraudRingResponse, FraudRingUpdate
 from app.models.user import TokenUser
 from app.utils.auth import get_current_user
 from app.utils.sanitizer import InputSanitizer
 from app.database import db
+from app.config import settings
 from bson import ObjectId
 from datetime import datetime, timezone
 from typing import List, Optional
 
 router = APIRouter(prefix="/abuse", tags=["Abuse Reports"])
 
+def _oid(val: str) -> ObjectId:
+    try:
+        return ObjectId(val)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid ObjectId")
+
 @router.post("/report", response_model=AbuseReportResponse)
 async def create_abuse_report(
     report_data: AbuseReportCreate,
@@ -252,3 +259,72 @@ async def take_action_on_report(
     )
     
     return {"message": f"Action '{action}' taken on report successfully"}
+
+def _fraud_ring_response(ring: dict) -> FraudRingResponse:
+    return FraudRingResponse(
+        id=str(ring["_id"]),
+        members=ring["members"],
+        size=ring["size"],
+        trade_count=ring["trade_count"],
+        total_amount=ring.get("total_amount", 0.0),
+        reciprocity=ring.get("reciprocity", 0.0),
+        cycles=ring.get("cycles", []),
+        score=ring.get("score", 0.0),
+        status=ring.get("status", "pending"),
+        first_trade_at=ring.get("first_trade_at"),
+        last_trade_at=ring.get("last_trade_at"),
+        detected_at=ring["detected_at"],
+        last_seen_at=ring["last_seen_at"],
+        admin_notes=ring.get("admin_notes")
+    )
+
+@router.get("/admin/fraud-rings", response_model=List[FraudRingResponse])
+async def get_fraud_rings(
+    status: Optional[str] = "pending",
+    limit: int = settings.abuse_page_size,
+    user: TokenUser = Depends(get_current_user)
+):
+    """Get wash-trading rings flagged by the batch analysis, highest score first (admin only)"""
+    
+    # Check if user is admin
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    query = {"status": status} if status else {}
+    rings = await db.fraud_rings.find(query).sort("score", -1).to_list(length=limit)
+    
+    return [_fraud_ring_response(ring) for ring in rings]
+
+@router.put("/admin/fraud-rings/{ring_id}", response_model=FraudRingResponse)
+async def update_fraud_ring(
+    ring_id: str,
+    update_data: FraudRingUpdate,
+    user: TokenUser = Depends(get_current_user)
+):
+    """Update the review status of a flagged ring (admin only)"""
+    
+    # Check if user is admin
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    ring_obj_id = _oid(ring_id)
+    update_dict = {}
+    
+    if update_data.status is not None:
+        update_dict["status"] = update_data.status
+    
+    if update_data.admin_notes is not None:
+        update_dict["admin_notes"] = InputSanitizer.sanitize_text(update_data.admin_notes, max_length=1000)
+    
+    if not update_dict:
+        raise HTTPException(status_code=400, detail="No valid fields to update")
+    
+    update_dict["reviewed_at"] = datetime.now(timezone.utc)
+    update_dict["reviewed_by"] = ObjectId(user.id)
+    
+    result = await db.fraud_rings.update_one({"_id": ring_obj_id}, {"$set": update_dict})
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Fraud ring not found")
+    
+    ring = await db.fraud_rings.find_one({"_id": ring_obj_id})
+    return _fraud_ring_response(ring)
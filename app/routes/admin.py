@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from bson import ObjectId
 from app.utils.auth import get_current_user, TokenUser
 from app.database import db  # make sure db is accessible
+from app.config import settings, RESTART_REQUIRED, mask_secrets, pending_restart
+from app.utils.home_feed import HomeFeed
 from datetime import datetime, timezone
 
 router = APIRouter()
@@ -19,6 +21,7 @@ async def admin_delete_listing(
         raise HTTPException(status_code=404, detail="Listing not found")
 
     await db.listings.delete_one({"_id": ObjectId(listing_id)})
+    await HomeFeed.mark_dirty()
     return {"message": f"Listing {listing_id} deleted by admin"}
 
 @router.post("/mark-sold/{listing_id}")
@@ -37,6 +40,7 @@ async def admin_mark_sold(
 
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Listing not found or already sold")
+    await HomeFeed.mark_dirty()
 
     return {"message": "Marked as sold ✅"}
 
@@ -56,13 +60,14 @@ async def admin_mark_available(
 
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Listing not found or already available")
+    await HomeFeed.mark_dirty()
 
     return {"message": "Marked as available ✅"}
 
 @router.get("/listings")
 async def get_all_listings(
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
+    limit: int = Query(settings.admin_page_size, ge=1, le=settings.admin_max_page_size),
     user: TokenUser = Depends(get_current_user)
 ):
     if user.role != "admin":
@@ -109,3 +114,16 @@ async def get_user_wallet_and_history(user_id: str, user: TokenUser = Depends(ge
         "wallet_history": transactions
     }
 
+@router.get("/config")
+async def get_config(user: TokenUser = Depends(get_current_user)):
+    """Effective settings for this process, with secrets masked"""
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {
+        "app_env": settings.app_env,
+        "settings": settings.public_dict(),
+        "restart_required": sorted(RESTART_REQUIRED),
+        # Read by a reload but not in effect until the process restarts
+        "pending_restart": mask_secrets(pending_restart)
+    }
@@ -1,23 +1,24 @@
-from collections import defaultdict
 import traceback
 from fastapi import APIRouter, HTTPException, Request, Depends
-import asyncio  
-import httpx # Use async-native httpx
 from fastapi.security import OAuth2PasswordBearer
 from app.utils.auth import get_current_user
 from app.models.user import TokenUser
 from pydantic import BaseModel
 from typing import Optional
-import requests
 from datetime import datetime, timedelta, timezone
-import time
 from app.database import db
+from app.config import settings
+from pymongo import ReturnDocument
 from app.utils.auth import create_access_token
+from app.utils.refresh_tokens import RefreshTokenStore
+from app.utils.token_revocation import TokenRevocation
+from bson import ObjectId
 from app.utils.security_challenge import SecurityChallenge
-import requests
+from app.utils.challenge_store import get_challenge_store
+from app.utils.srm_client import srm_client
+from app.utils.login_coalescer import LoginCoalescer
 
 router = APIRouter()
-SRM_SESSION_TTL_MINUTES = 20
 
 class LoginRequest(BaseModel):
     account: str
@@ -29,158 +30,118 @@ class ChallengeResponse(BaseModel):
     question: str
     session_token: str
 
-# In-memory lock to handle concurrent requests for the same user
-login_locks = defaultdict(asyncio.Lock)
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
-# Store challenge sessions temporarily
-challenge_sessions = {}
+# Records used challenge tokens so each can only be redeemed once
+challenge_store = get_challenge_store()
 
 @router.post("/challenge", response_model=ChallengeResponse)
 async def get_security_challenge():
     """Get a security challenge for login"""
-    question, answer_hash = SecurityChallenge.generate_challenge()
-    session_token = SecurityChallenge.generate_session_token()
-    
-    # Store the answer hash with the session token
-    challenge_sessions[session_token] = {
-        "answer_hash": answer_hash,
-        "created_at": time.time()
-    }
+    question, session_token = SecurityChallenge.generate_challenge()
     
     return ChallengeResponse(question=question, session_token=session_token)
 
 @router.post("/login")
 async def login(data: LoginRequest):
     email = data.account
-    user_lock = login_locks[email]
 
     # Verify security challenge if provided
     if data.session_token and data.challenge_answer:
-        if data.session_token not in challenge_sessions:
-            raise HTTPException(status_code=400, detail="Invalid or expired challenge session")
-        
-        session_data = challenge_sessions[data.session_token]
-        
-        # Check if session is not too old (5 minutes)
-        if time.time() - session_data["created_at"] > 300:
-            del challenge_sessions[data.session_token]
-            raise HTTPException(status_code=400, detail="Challenge session expired")
-        
-        # Verify the answer
-        if not SecurityChallenge.verify_challenge(data.challenge_answer, session_data["answer_hash"]):
-            raise HTTPException(status_code=400, detail="Incorrect challenge answer")
+        # The signed token is verified without any lookup
+        is_valid, error, claims = SecurityChallenge.verify_challenge(data.session_token, data.challenge_answer)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=error)
         
-        # Clean up the session
-        del challenge_sessions[data.session_token]
+        # Redeem the token so it can't be replayed
+        if not await challenge_store.consume(claims["nonce"], claims["exp"]):
+            raise HTTPException(status_code=400, detail="Invalid or expired challenge session")
     else:
         # For now, we'll make the challenge optional but recommend it
         # In production, you might want to make it mandatory
         pass
 
     try:
-        async with user_lock:
-            user = await db.users.find_one({"email": email})
-            srm_token = None
-
-            # Step 1: Check for a valid, reusable SRM session
-            if user and "srm_session" in user:
-                srm_data = user["srm_session"]
-                expires_at = srm_data.get("expires_at")
-                if expires_at and datetime.fromisoformat(expires_at) > datetime.now(timezone.utc):
-                    srm_token = srm_data["token"]
-                    print("✅ Reusing SRM session token")
-
-            # Step 2: Login to SRM only if no valid session exists
-            if not srm_token:
-                async with httpx.AsyncClient() as client:
-                    res = await client.post("http://localhost:3001/login", json=data.model_dump())
-                
-                if res.status_code != 200:
-                    raise HTTPException(status_code=res.status_code, detail="SRM authentication service failed.")
-                
-                result = res.json()
-                if not result.get("authenticated"):
-                    raise HTTPException(status_code=401, detail="Invalid credentials provided.")
-                
-                srm_token = result["cookies"]
-
-            # Step 3: Fetch profile and update DB if needed
-            if not user or not user.get("srm_id"):
-                async with httpx.AsyncClient(timeout=httpx.Timeout(20.0)) as client:
-                    headers = {"X-CSRF-Token": srm_token}
-                    profile_res = await client.get("http://localhost:3001/profile", headers=headers)
-
-                if profile_res.status_code != 200:
-                    raise HTTPException(
-                        status_code=profile_res.status_code,
-                        detail="Failed to fetch profile from SRM scraper"
-                    )
-
-                profile = profile_res.json()
-                expires_at = datetime.now(timezone.utc) + timedelta(minutes=SRM_SESSION_TTL_MINUTES)
-
-                # Extract name and reg_no
-                raw_name = ""
-                reg_no = ""
-
-                name_field = profile.get("name")
-                if isinstance(name_field, list) and name_field:
-                    # Case 1: name is a list of objects
-                    raw_name_value = name_field[0].get("text", "")
-                elif isinstance(name_field, str):
-                    # Case 2: name is a direct string
-                    raw_name_value = name_field
-                else:
-                    raw_name_value = ""
-
-                # Now parse reg_no and name from the string
-                parts = raw_name_value.split(" - ", 1)
-                if len(parts) == 2:
-                    reg_no, raw_name = parts[0], parts[1]
-                else:
-                    raw_name = raw_name_value
-
-                # Wallet balance logic
-                if not user:
-                    # Brand new user → start with 50,000 credits
-                    wallet_balance = 50000.0
-                else:
-                    # Existing user → keep balance as is
-                    wallet_balance = user.get("wallet_balance", 0.0)
-
-                # Enforce max wallet cap of 50,000
-                wallet_balance = min(wallet_balance, 50000.0)
-
-                update_data = {
-                    "email": email,
-                    "srm_id": profile.get("id"),  # using profile's id here
-                    "reg_no": reg_no or profile.get("regNumber", ""),
-                    "name": raw_name,
-                    "phone": "",  # not available from /profile
-                    "avatar": profile.get("photoUrl", ""),
-                    "role": "student",
-                    "wallet_balance": wallet_balance,
-                    "srm_session": {
-                        "token": srm_token,
-                        "expires_at": expires_at.isoformat()
-                    }
-                }
-                await db.users.update_one(
-                    {"email": email},
-                    {"$set": update_data},
-                    upsert=True
-                )
+        user = await db.users.find_one({"email": email})
+
+        # Step 1 & 2: Get a validated SRM session. Concurrent logins with the same
+        # credentials (in this or any other worker) share a single scraper call,
+        # and the session is cached for reuse until it expires.
+        credential_key = LoginCoalescer.credential_key(email, data.password)
+        srm_token = await LoginCoalescer.get_session(
+            email, credential_key, lambda: _authenticate_with_srm(data)
+        )
 
-            final_user = await db.users.find_one({"email": email})
+        # Step 3: Fetch profile and update DB if needed
+        if not user or not user.get("srm_id"):
+            profile_res = await srm_client.get_profile(srm_token)
 
-            # Step 4: Issue application access token
-            access_token = create_access_token({
-                "sub": str(final_user["_id"]),
-                "email": final_user["email"],
-                "role": final_user["role"]
-            })
+            if profile_res.status_code != 200:
+                raise HTTPException(
+                    status_code=profile_res.status_code,
+                    detail="Failed to fetch profile from SRM scraper"
+                )
 
-            return {"access_token": access_token, "token_type": "bearer"}
+            profile = profile_res.json()
+            expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.srm_session_ttl_minutes)
+
+            # Extract name and reg_no
+            raw_name = ""
+            reg_no = ""
+
+            name_field = profile.get("name")
+            if isinstance(name_field, list) and name_field:
+                # Case 1: name is a list of objects
+                raw_name_value = name_field[0].get("text", "")
+            elif isinstance(name_field, str):
+                # Case 2: name is a direct string
+                raw_name_value = name_field
+            else:
+                raw_name_value = ""
+
+            # Now parse reg_no and name from the string
+            parts = raw_name_value.split(" - ", 1)
+            if len(parts) == 2:
+                reg_no, raw_name = parts[0], parts[1]
+            else:
+                raw_name = raw_name_value
+
+            # Wallet balance logic
+            if not user:
+                # Brand new user → start with a full wallet
+                wallet_balance = settings.wallet_max_balance
+            else:
+                # Existing user → keep balance as is
+                wallet_balance = user.get("wallet_balance", 0.0)
+
+            # Enforce max wallet cap
+            wallet_balance = min(wallet_balance, settings.wallet_max_balance)
+
+            update_data = {
+                "email": email,
+                "srm_id": profile.get("id"),  # using profile's id here
+                "reg_no": reg_no or profile.get("regNumber", ""),
+                "name": raw_name,
+                "phone": "",  # not available from /profile
+                "avatar": profile.get("photoUrl", ""),
+                "role": "student",
+                "wallet_balance": wallet_balance,
+                "srm_session": {
+                    "token": srm_token,
+                    "expires_at": expires_at.isoformat()
+                }
+            }
+            # Upsert and read back in one round trip
+            user = await db.users.find_one_and_update(
+                {"email": email},
+                {"$set": update_data},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+
+        # Step 4: Issue a short-lived access token and a refresh token to renew it
+        return await _issue_tokens(user)
 
     except Exception as e:
         traceback.print_exc()
@@ -189,41 +150,87 @@ async def login(data: LoginRequest):
             raise
         raise HTTPException(status_code=500, detail=f"An internal error occurred: {str(e)}")
 
-    finally:
-        # --- YOUR SUGGESTION APPLIED ---
-        # Safely clean up the lock to prevent memory leaks without crashing the request.
-        try:
-            if email in login_locks and not login_locks[email].locked():
-                del login_locks[email]
-        except Exception:
-            pass # Don't let cleanup errors affect the response
-
+async def _authenticate_with_srm(data: LoginRequest) -> str:
+    """Log in to SRM through the scraper and return the session token"""
+    res = await srm_client.login({"account": data.account, "password": data.password})
+
+    if res.status_code != 200:
+        raise HTTPException(status_code=res.status_code, detail="SRM authentication service failed.")
+
+    result = res.json()
+    if not result.get("authenticated"):
+        raise HTTPException(status_code=401, detail="Invalid credentials provided.")
+
+    srm_token = result["cookies"]
+
+    # Keep the stored session current so logout can end it on the SRM side
+    await db.users.update_one(
+        {"email": data.account},
+        {"$set": {"srm_session": {
+            "token": srm_token,
+            "expires_at": (datetime.now(timezone.utc) + timedelta(minutes=settings.srm_session_ttl_minutes)).isoformat()
+        }}}
+    )
+    return srm_token
+
+async def _issue_tokens(user: dict, refresh_token: Optional[str] = None) -> dict:
+    """Access tokens are self-describing so requests can be authenticated without a DB lookup"""
+    access_token = create_access_token({
+        "sub": str(user["_id"]),
+        "email": user["email"],
+        "role": user.get("role", "student"),
+        "name": user.get("name", ""),
+        "reg_no": user.get("reg_no", "")
+    })
+    if refresh_token is None:
+        refresh_token = await RefreshTokenStore.issue(str(user["_id"]))
+
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+@router.post("/refresh")
+async def refresh(data: RefreshRequest):
+    """Exchange a refresh token for a new access token; the refresh token is rotated on every use"""
+    user_id, new_refresh_token = await RefreshTokenStore.rotate(data.refresh_token)
+
+    # Re-read the user so role or profile changes reach the new access token
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {"email": 1, "role": 1, "name": 1, "reg_no": 1})
+    if not user:
+        await RefreshTokenStore.revoke_user(user_id)
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return await _issue_tokens(user, new_refresh_token)
     
 @router.post("/logout")
 # It still depends on get_current_user to run the auth and populate request.state
 async def logout(request: Request, user: TokenUser = Depends(get_current_user)):
     try:
-        # Access the full user document from the request state (NO new DB call)
-        user_doc = request.state.user
-
-        srm_session = user_doc.get("srm_session", {})
+        # End the app session first: revoke this access token and every refresh token
+        claims = request.state.user
+        if claims.get("jti"):
+            await TokenRevocation.revoke(claims["jti"], datetime.fromtimestamp(claims["exp"], timezone.utc))
+        await RefreshTokenStore.revoke_user(user.id)
+
+        user_doc = await db.users.find_one({"_id": ObjectId(user.id)}, {"email": 1, "srm_session": 1})
+        srm_session = (user_doc or {}).get("srm_session", {})
         token = srm_session.get("token")
 
         if not token:
             return {"message": "No active session to log out from."}
-        
-        async with httpx.AsyncClient() as client:
-            headers = {"X-CSRF-Token": token}
-            await client.delete("http://localhost:9000/logout", headers=headers)
-
-        # Use the correct ObjectId from the full document
-        await db.users.update_one(
-            {"_id": user_doc["_id"]},
-            {"$unset": {"srm_session": 1}}
-        )
+
+        try:
+            await srm_client.logout(token)
+        finally:
+            # Forget the SRM session locally even when the scraper can't be reached
+            await LoginCoalescer.invalidate_account(user_doc["email"])
+            await db.users.update_one(
+                {"_id": user_doc["_id"]},
+                {"$unset": {"srm_session": 1}}
+            )
 
         return {"message": "Successfully logged out"}
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
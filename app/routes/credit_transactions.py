@@ -3,7 +3,9 @@ from app.models.credit_transaction import CreditTransactionResponse, CreditTrans
 from app.models.user import TokenUser
 from app.utils.auth import get_current_user
 from app.utils.wallet_auto_refill import WalletAutoRefill
+from app.utils.read_routing import ReadRouting
 from app.database import db
+from app.config import settings
 from bson import ObjectId
 from datetime import datetime, timezone, timedelta
 from typing import List, Optional
@@ -14,7 +16,7 @@ router = APIRouter(prefix="/credit-transactions", tags=["Credit Transactions"])
 async def get_my_credit_transactions(
     user: TokenUser = Depends(get_current_user),
     page: int = 1,
-    limit: int = 50,
+    limit: int = settings.transactions_page_size,
     transaction_type: Optional[str] = None
 ):
     """Get credit transactions for the current user"""
@@ -66,7 +68,7 @@ async def get_credit_transaction_summary(
 async def get_all_credit_transactions(
     user: TokenUser = Depends(get_current_user),
     page: int = 1,
-    limit: int = 100,
+    limit: int = settings.admin_max_page_size,
     user_id: Optional[str] = None,
     transaction_type: Optional[str] = None,
     days: int = 30
@@ -173,8 +175,6 @@ async def get_money_flow_stats(
         {"$sort": {"total_amount": -1}}
     ]
     
-    stats = await db.credit_transactions.aggregate(pipeline).to_list(None)
-    
     # Get daily breakdown - exclude auto-refill transactions
     daily_pipeline = [
         {"$match": {
@@ -195,7 +195,11 @@ async def get_money_flow_stats(
         {"$sort": {"_id.year": 1, "_id.month": 1, "_id.day": 1}}
     ]
     
-    daily_stats = await db.credit_transactions.aggregate(daily_pipeline).to_list(None)
+    # Analytics tolerate replica lag, and they are the heaviest reads here
+    async with ReadRouting.session(user.id) as session:
+        transactions = ReadRouting.replica("credit_transactions")
+        stats = await transactions.aggregate(pipeline, session=session).to_list(None)
+        daily_stats = await transactions.aggregate(daily_pipeline, session=session).to_list(None)
     
     return {
         "transaction_types": stats,
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.models.user import TokenUser
+from app.utils.auth import get_current_user
+from app.utils.history_export import HistoryExporter
+from app.database import db
+from bson import ObjectId
+from datetime import datetime, timezone
+from typing import Optional
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+WALLET_HISTORY_COLUMNS = ["_id", "user_id", "type", "amount", "ref_note", "timestamp"]
+CREDIT_TRANSACTION_COLUMNS = [
+    "_id", "user_id", "amount", "transaction_type", "reference_id", "description",
+    "is_auto_refill", "created_at", "previous_balance", "new_balance"
+]
+# Parquet column types; columns not listed are strings
+COLUMN_TYPES = {
+    "amount": "float64",
+    "previous_balance": "float64",
+    "new_balance": "float64",
+    "is_auto_refill": "bool",
+    "timestamp": "timestamp",
+    "created_at": "timestamp",
+}
+
+def _build_export_query(time_field: str, start: datetime, end: Optional[datetime], after_id: Optional[str]) -> dict:
+    # Naive datetimes are treated as UTC, matching how timestamps are stored
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = end or datetime.now(timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    query = {time_field: {"$gte": start, "$lt": end}}
+
+    # Resume from the last _id the client received
+    if after_id:
+        try:
+            query["_id"] = {"$gt": ObjectId(after_id)}
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid after_id checkpoint")
+
+    return query
+
+def _export_response(collection, query: dict, columns: list, name: str, format: str) -> StreamingResponse:
+    if format == "csv":
+        stream = HistoryExporter.stream_csv(collection, query, columns)
+        media_type = "text/csv"
+    elif format == "parquet":
+        if not HistoryExporter.parquet_available():
+            raise HTTPException(status_code=501, detail="Parquet export requires pyarrow to be installed")
+        stream = HistoryExporter.stream_parquet(collection, query, columns, COLUMN_TYPES)
+        media_type = "application/vnd.apache.parquet"
+    else:
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'parquet'")
+
+    return StreamingResponse(
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{format}"'}
+    )
+
+@router.get("/wallet-history")
+async def export_wallet_history(
+    start: datetime,
+    end: Optional[datetime] = None,
+    format: str = "csv",
+    after_id: Optional[str] = None,
+    user: TokenUser = Depends(get_current_user)
+):
+    """Stream wallet history for a date range (admin only). Rows are ordered by _id; pass the last _id as after_id to resume."""
+
+    # Check if user is admin
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    query = _build_export_query("timestamp", start, end, after_id)
+    return _export_response(db.wallet_history, query, WALLET_HISTORY_COLUMNS, "wallet_history", format)
+
+@router.get("/credit-transactions")
+async def export_credit_transactions(
+    start: datetime,
+    end: Optional[datetime] = None,
+    format: str = "csv",
+    after_id: Optional[str] = None,
+    user: TokenUser = Depends(get_current_user)
+):
+    """Stream credit transactions for a date range (admin only). Rows are ordered by _id; pass the last _id as after_id to resume."""
+
+    # Check if user is admin
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    query = _build_export_query("created_at", start, end, after_id)
+    return _export_response(db.credit_transactions, query, CREDIT_TRANSACTION_COLUMNS, "credit_transactions", format)
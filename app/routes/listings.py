@@ -1,26 +1,31 @@
-import asyncio
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Request
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Body, Request, Response, Header
 from app.models.listing import ListingResponse, ListingUpdate, ListingOut
 from app.models.user import TokenUser
-from app.utils.auth import get_current_user
-from app.utils.cloudinary import upload_image_to_cloudinary, get_optimized_image_url
+from app.utils.auth import get_current_user, get_optional_user_id
+from app.utils.read_routing import ReadRouting
+from app.utils.http_cache import HttpCache
+from app.utils.home_feed import HomeFeed
+from app.utils.search_facets import SearchFacets
+from app.utils.cloudinary import ImageUrls, upload_image_to_cloudinary, get_optimized_image_url
 from app.utils.rate_limiter import RateLimiter
 from app.utils.sanitizer import InputSanitizer
-# from app.utils.circular_trade_detector import CircularTradeDetector  # Temporarily disabled for testing
-from app.utils.wallet_auto_refill import WalletAutoRefill
+from app.utils.idempotency import IdempotencyGuard
+from app.utils.circular_trade_detector import CircularTradeDetector
+from app.utils.trade_graph import TradeGraph
+from app.utils.near_duplicate import NearDuplicateDetector
 from app.models.credit_transaction import CreditTransactionType
+from app.tasks.jobs import enqueue_auto_refill, enqueue_credit_transaction, enqueue_image_deletes, enqueue_notifications
 from app.database import db
+from app.config import settings
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from cloudinary import uploader
 from datetime import datetime, timezone
 from bson import ObjectId
+from pymongo import ReturnDocument
 from typing import List, Optional
 
 router = APIRouter(prefix="/listings", tags=["Listings"])
 
-MAX_UPLOAD_SIZE_MB = 10
-MAX_UPLOAD_SIZE_BYTES = MAX_UPLOAD_SIZE_MB * 1024 * 1024
-
 def serialize_objectid(value):
     if isinstance(value, ObjectId):
         return str(value)
@@ -68,9 +73,8 @@ class BuyRequestOut(BaseModel):
     buyer_reg_no: Optional[str] = None
 
 # ---------- Helpers ----------
-async def _notify(user_id: ObjectId, ntype: str, title: str, message: str, meta: Optional[dict] = None):
-    """Minimal inline notification insert. If you already have a helper, use that instead."""
-    doc = {
+def _notification(user_id: ObjectId, ntype: str, title: str, message: str, meta: Optional[dict] = None) -> dict:
+    return {
         "user_id": user_id,
         "type": ntype,  # "message" | "buy_request" | "system"
         "title": title,
@@ -79,7 +83,10 @@ async def _notify(user_id: ObjectId, ntype: str, title: str, message: str, meta:
         "is_read": False,
         "created_at": datetime.now(timezone.utc)
     }
-    await db.notifications.insert_one(doc)
+
+async def _notify(user_id: ObjectId, ntype: str, title: str, message: str, meta: Optional[dict] = None):
+    """Queue a notification; the job queue inserts it off the request path."""
+    await enqueue_notifications([_notification(user_id, ntype, title, message, meta)])
 
 def _oid(val: str) -> ObjectId:
     try:
@@ -98,37 +105,53 @@ async def create_listing(
     images: List[UploadFile] = File([]),
     user: TokenUser = Depends(get_current_user)
 ):
-    # 1. Rate limiting: Check listing rate limit (3 per day)
-    can_create, rate_limit_msg = await RateLimiter.check_listing_rate_limit(user.id, window_hours=24, max_requests=3)
+    # 1. Rate limiting: Check listing rate limit (LISTING_RATE_MAX per LISTING_RATE_WINDOW_HOURS)
+    can_create, rate_limit_msg = await RateLimiter.check_listing_rate_limit(
+        user.id, window_hours=settings.listing_rate_window_hours, max_requests=settings.listing_rate_max
+    )
     if not can_create:
         raise HTTPException(status_code=429, detail=rate_limit_msg)
     
     # 2. Input sanitization
-    title = InputSanitizer.sanitize_text(title, max_length=100)
-    description = InputSanitizer.sanitize_text(description, max_length=1000)
-    category = InputSanitizer.sanitize_text(category, max_length=50)
-    condition = InputSanitizer.sanitize_text(condition, max_length=50) if condition else None
-    location = InputSanitizer.sanitize_text(location, max_length=100) if location else None
+    fields = InputSanitizer.sanitize_fields({
+        "title": (title, 100),
+        "description": (description, 1000),
+        "category": (category, 50),
+        "condition": (condition, 50),
+        "location": (location, 100)
+    })
+    title = fields["title"] or ""
+    description = fields["description"] or ""
+    category = fields["category"] or ""
+    condition = fields["condition"]
+    location = fields["location"]
     
     # 3. Spam detection
-    if InputSanitizer.is_spam(title) or InputSanitizer.is_spam(description):
+    if InputSanitizer.any_spam((title, description)):
         raise HTTPException(status_code=400, detail="Content appears to be spam and has been rejected.")
+
+    # 4. Near-duplicate detection (reposts with small edits)
+    is_repost, repost_reason, signature, near_duplicate_of = await NearDuplicateDetector.check_listing(user.id, title, description)
+    if is_repost:
+        raise HTTPException(status_code=400, detail=repost_reason)
     
     try:
         public_ids = []
+        image_variants = []
 
         for file in images:
             # ⏳ Read file once and check size
             content = await file.read()
-            if len(content) > MAX_UPLOAD_SIZE_BYTES:
+            if len(content) > settings.max_upload_size_mb * 1024 * 1024:
                 raise HTTPException(
                     status_code=413,
-                    detail=f"One of the images is too large. Max allowed is 5MB."
+                    detail=f"One of the images is too large. Max allowed is {settings.max_upload_size_mb:g}MB."
                 )
 
             # ✅ Upload to Cloudinary
             uploaded = await upload_image_to_cloudinary(content)
             public_ids.append(uploaded["public_id"])
+            image_variants.append(uploaded["variants"])
 
         # 🧱 Construct listing
         listing = {
@@ -139,13 +162,19 @@ async def create_listing(
             "condition": condition,
             "location": location,
             "images": public_ids,
+            "image_variants": image_variants,  # Precomputed URLs, so reads build none
             "posted_by": user.id,
             "is_sold": False,
             "created_at": datetime.now(timezone.utc),
             "updated_at": datetime.now(timezone.utc)
         }
+        if near_duplicate_of:
+            # Looks like another seller's listing; keep it but mark it for review
+            listing["near_duplicate_of"] = near_duplicate_of
 
         result = await db.listings.insert_one(listing)
+        await NearDuplicateDetector.record_listing(result.inserted_id, user.id, signature)
+        await HomeFeed.mark_dirty()
 
         return {
             "message": "Listing created ✅",
@@ -161,45 +190,50 @@ async def create_listing(
 @router.get("/", response_model=List[dict])
 async def get_all_listings(
     page: int = 1,
-    limit: int = 20,
-    include_sold: bool = False
+    limit: int = settings.listings_page_size,
+    include_sold: bool = False,
+    viewer_id: Optional[str] = Depends(get_optional_user_id)
 ):
     skip = (page - 1) * limit
+    if not include_sold:
+        # The first pages come straight from the precomputed home feed
+        cached = HomeFeed.page("listings", skip, limit)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
     query = {} if include_sold else {"is_sold": False}
 
-    listings_cursor = db.listings.find(query).skip(skip).limit(limit)
-    listings = await listings_cursor.to_list(length=limit)
+    async with ReadRouting.session(viewer_id) as session:
+        listings_cursor = ReadRouting.replica("listings").find(query, session=session).sort("created_at", -1).skip(skip).limit(limit)
+        listings = await listings_cursor.to_list(length=limit)
 
-    # Step 1: Collect all seller IDs
-    seller_ids = list(set(str(listing["posted_by"]) for listing in listings))
-    sellers = await db.users.find(
-        {"_id": {"$in": [ObjectId(uid) for uid in seller_ids]}},
-        {"name": 1, "reg_no": 1}
-    ).to_list(None)
+        # Step 1: Collect all seller IDs
+        seller_ids = list(set(str(listing["posted_by"]) for listing in listings))
+        sellers = await ReadRouting.replica("users").find(
+            {"_id": {"$in": [ObjectId(uid) for uid in seller_ids]}},
+            {"name": 1, "reg_no": 1},
+            session=session
+        ).to_list(None)
 
     # Step 2: Build seller lookup map
-    seller_map = {
-        str(seller["_id"]): {
-            "name": seller.get("name", "Unknown"),
-            "reg_no": seller.get("reg_no", "N/A")
-        }
-        for seller in sellers
-    }
+    seller_map = {str(seller["_id"]): seller for seller in sellers}
 
-    enriched = []
-    for listing in listings:
-        listing = serialize_objectid(listing)  # Convert all ObjectIds → str
-
-        listing["id"] = listing.pop("_id", listing.get("id"))
-        listing["seller"] = seller_map.get(listing["posted_by"], {"name": "Unknown", "reg_no": "N/A"})
-        listing["created_at"] = listing.get("created_at", datetime.now(timezone.utc).isoformat())
-        listing["is_available"] = not listing.get("is_sold", False)
-        listing["is_sold"] = listing.get("is_sold", False)
-        listing["images"] = [get_optimized_image_url(pid) for pid in listing.get("images", [])]
+    return [listing_card(listing, seller_map.get(str(listing["posted_by"]))) for listing in listings]
 
-        enriched.append(listing)
+def listing_card(listing: dict, seller: Optional[dict]) -> dict:
+    """A listing as /listings/ returns it, JSON-ready"""
+    listing = serialize_objectid(listing)  # Convert all ObjectIds → str
 
-    return enriched
+    listing["id"] = listing.pop("_id", listing.get("id"))
+    listing["seller"] = {
+        "name": seller.get("name", "Unknown"),
+        "reg_no": seller.get("reg_no", "N/A")
+    } if seller else {"name": "Unknown", "reg_no": "N/A"}
+    listing["created_at"] = listing.get("created_at", datetime.now(timezone.utc).isoformat())
+    listing["is_available"] = not listing.get("is_sold", False)
+    listing["is_sold"] = listing.get("is_sold", False)
+    ImageUrls.apply(listing)
+    return jsonable_encoder(listing)
 
 # ---------- Buy Endpoints ----------
 
@@ -330,8 +364,15 @@ async def list_buy_requests_for_listing(
 async def accept_buy_request(
     listing_id: str,
     request_id: str,
-    user: TokenUser = Depends(get_current_user)
+    user: TokenUser = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
+    return await IdempotencyGuard.run(
+        idempotency_key, user.id, f"listings.accept:{listing_id}:{request_id}",
+        lambda: _accept_buy_request(listing_id, request_id, user)
+    )
+
+async def _accept_buy_request(listing_id: str, request_id: str, user: TokenUser):
     listing_obj_id = _oid(listing_id)
     req_obj_id = _oid(request_id)
 
@@ -362,6 +403,11 @@ async def accept_buy_request(
         seller_id = ObjectId(seller_id)
     price = float(listing["price"])
 
+    # Circular trade detection (served from the in-memory trade graph)
+    is_circular, circular_reason = await CircularTradeDetector.detect_circular_trade(str(buyer_id), str(seller_id))
+    if is_circular:
+        raise HTTPException(status_code=400, detail=f"Trade blocked: {circular_reason}")
+
     # Re-check buyer funds
     buyer_doc = await db.users.find_one({"_id": buyer_id}, {"wallet_balance": 1, "name": 1})
     if not buyer_doc:
@@ -408,14 +454,14 @@ async def accept_buy_request(
     })
 
     # ✅ Check for auto-refill after debit
-    was_refilled, refill_message, new_balance = await WalletAutoRefill.check_and_refill_wallet(str(buyer_id))
-    if was_refilled:
-        print(f"Auto-refilled buyer wallet after purchase: {refill_message}")
+    await enqueue_auto_refill(str(buyer_id))
 
     # 3) Credit seller (IGNORE 50K cap for sales)
-    await db.users.update_one(
+    seller_wallet = await db.users.find_one_and_update(
         {"_id": seller_id},
-        {"$inc": {"wallet_balance": price}}
+        {"$inc": {"wallet_balance": price}},
+        projection={"wallet_balance": 1},
+        return_document=ReturnDocument.AFTER
     )
     await db.wallet_history.insert_one({
         "user_id": seller_id,
@@ -426,13 +472,13 @@ async def accept_buy_request(
     })
     
     # Record in credit transactions table
-    await WalletAutoRefill.record_credit_transaction(
+    await enqueue_credit_transaction(
         user_id=str(seller_id),
         amount=price,
         transaction_type=CreditTransactionType.SALE_PROCEEDS,
         reference_id=str(listing_obj_id),
         description=f"Sold listing: {listing.get('title')}",
-        is_auto_refill=False
+        new_balance=seller_wallet["wallet_balance"] if seller_wallet else None
     )
 
     # 4) Mark listing as sold
@@ -440,6 +486,8 @@ async def accept_buy_request(
         {"_id": listing_obj_id},
         {"$set": {"is_sold": True, "buyer_id": buyer_id, "sold_at": now, "updated_at": now}}
     )
+    TradeGraph.add_sale(listing_obj_id, seller_id, buyer_id, now)
+    await HomeFeed.mark_dirty()
 
     # 5) Auto-decline all other pending requests for this listing
     other_pending = db.purchase_requests.find({
@@ -454,15 +502,17 @@ async def accept_buy_request(
             {"_id": {"$in": other_ids}},
             {"$set": {"status": "declined", "updated_at": now, "decline_reason": "Another buyer accepted"}}
         )
-        # notify those buyers
-        for r in others:
-            await _notify(
+        # notify those buyers in a single job
+        await enqueue_notifications([
+            _notification(
                 r["buyer_id"],
                 "buy_request",
                 "Buy Request Declined",
                 f"Your buy request for '{listing.get('title')}' was declined because the item was sold to another buyer.",
                 meta={"listing_id": str(listing_obj_id), "request_id": str(r["_id"])}
             )
+            for r in others
+        ])
 
     # 6) Notify buyer of acceptance
     await _notify(
@@ -526,7 +576,17 @@ async def decline_buy_request(
     return {"message": "Request declined"}
 
 @router.post("/buy/{listing_id}", response_model=dict)
-async def buy_listing(listing_id: str, user=Depends(get_current_user)):
+async def buy_listing(
+    listing_id: str,
+    user=Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    return await IdempotencyGuard.run(
+        idempotency_key, user.id, f"listings.buy:{listing_id}",
+        lambda: _buy_listing(listing_id, user)
+    )
+
+async def _buy_listing(listing_id: str, user):
     buyer_id = ObjectId(user.id)  # ensure buyer ObjectId
     listing = await db.listings.find_one({"_id": ObjectId(listing_id)})
     if not listing:
@@ -538,11 +598,11 @@ async def buy_listing(listing_id: str, user=Depends(get_current_user)):
     if listing["posted_by"] == user.id:
         raise HTTPException(status_code=400, detail="You can't buy your own listing")
     
-    # Circular trade detection temporarily disabled for testing phase
-    # seller_id = str(listing["posted_by"])
-    # is_circular, circular_reason = await CircularTradeDetector.detect_circular_trade(user.id, seller_id)
-    # if is_circular:
-    #     raise HTTPException(status_code=400, detail=f"Trade blocked: {circular_reason}")
+    # Circular trade detection (served from the in-memory trade graph)
+    seller_id = str(listing["posted_by"])
+    is_circular, circular_reason = await CircularTradeDetector.detect_circular_trade(user.id, seller_id)
+    if is_circular:
+        raise HTTPException(status_code=400, detail=f"Trade blocked: {circular_reason}")
     
     user_data = await db.users.find_one({"_id": buyer_id})
     if not user_data:
@@ -573,20 +633,20 @@ async def buy_listing(listing_id: str, user=Depends(get_current_user)):
     })
 
     # ✅ Check for auto-refill after debit
-    was_refilled, refill_message, new_balance = await WalletAutoRefill.check_and_refill_wallet(str(buyer_id))
-    if was_refilled:
-        print(f"Auto-refilled buyer wallet after purchase: {refill_message}")
+    await enqueue_auto_refill(str(buyer_id))
 
     # ✅ Credit seller wallet
     seller_id = listing["posted_by"]
     if not isinstance(seller_id, ObjectId):
         seller_id = ObjectId(seller_id)
 
-    credit_result = await db.users.update_one(
+    seller_wallet = await db.users.find_one_and_update(
         {"_id": seller_id},
-        {"$inc": {"wallet_balance": price}}
+        {"$inc": {"wallet_balance": price}},
+        projection={"wallet_balance": 1},
+        return_document=ReturnDocument.AFTER
     )
-    if credit_result.modified_count == 0:
+    if seller_wallet is None:
         raise HTTPException(status_code=500, detail="Failed to credit seller wallet")
 
     await db.wallet_history.insert_one({
@@ -598,13 +658,13 @@ async def buy_listing(listing_id: str, user=Depends(get_current_user)):
     })
     
     # Record in credit transactions table
-    await WalletAutoRefill.record_credit_transaction(
+    await enqueue_credit_transaction(
         user_id=str(seller_id),
         amount=price,
         transaction_type=CreditTransactionType.SALE_PROCEEDS,
         reference_id=listing_id,
         description=f"Sold listing: {listing['title']}",
-        is_auto_refill=False
+        new_balance=seller_wallet["wallet_balance"]
     )
 
     # Mark listing as sold
@@ -619,6 +679,8 @@ async def buy_listing(listing_id: str, user=Depends(get_current_user)):
             }
         }
     )
+    TradeGraph.add_sale(listing_id, seller_id, buyer_id, now)
+    await HomeFeed.mark_dirty()
 
     return {"message": "Listing purchased successfully ✅"}
 
@@ -662,7 +724,7 @@ async def get_purchased_listings(user: TokenUser = Depends(get_current_user)):
         listing["is_available"] = not listing.get("is_sold", False)
         listing["created_at"] = listing.get("created_at", datetime.now(timezone.utc))
         listing["updated_at"] = listing.get("updated_at", datetime.now(timezone.utc))
-        listing["images"] = [get_optimized_image_url(pid) for pid in listing.get("images", [])]
+        ImageUrls.apply(listing)
         listing["condition"] = listing.get("condition")
         listing["location"] = listing.get("location")
 
@@ -682,7 +744,9 @@ async def search_listings(
     query: Optional[str] = None,
     exclude_sold: bool = True,
     page: int = 1,
-    limit: int = 20,
+    limit: int = settings.listings_page_size,
+    include_facets: bool = False,
+    viewer_id: Optional[str] = Depends(get_optional_user_id)
 ):
     search_query = {}
 
@@ -709,33 +773,45 @@ async def search_listings(
     # Calculate pagination
     skip = (page - 1) * limit
     
-    # Get total count for pagination info
-    total_count = await db.listings.count_documents(search_query)
-    
-    # Get paginated results
-    results_cursor = db.listings.find(search_query).skip(skip).limit(limit).sort("created_at", -1)
-    results = await results_cursor.to_list(length=limit)
+    async with ReadRouting.session(viewer_id) as session:
+        listings_collection = ReadRouting.replica("listings")
+
+        # Totals (and facets) are capped and cached per filter, so paging doesn't recount
+        facets = None
+        if include_facets:
+            facets = await SearchFacets.facets(listings_collection, search_query, session=session)
+        total_count, total_is_approximate = await SearchFacets.total(listings_collection, search_query, session=session)
+
+        # Get paginated results; the extra row tells us whether there is a next page
+        results_cursor = listings_collection.find(search_query, session=session).skip(skip).limit(limit + 1).sort("created_at", -1)
+        results = await results_cursor.to_list(length=limit + 1)
+    has_next = len(results) > limit
+    results = results[:limit]
 
     # Process results
     for listing in results:
         listing["id"] = str(listing["_id"])
         listing["posted_by"] = str(listing.get("posted_by", ""))
         listing["buyer_id"] = str(listing.get("buyer_id", ""))
-        listing["images"] = [get_optimized_image_url(pid) for pid in listing.get("images", [])]
+        ImageUrls.apply(listing)
         listing.pop("_id", None)
     
     # Return paginated response
-    return {
+    response = {
         "listings": results,
         "pagination": {
             "page": page,
             "limit": limit,
             "total": total_count,
+            "total_is_approximate": total_is_approximate,
             "pages": (total_count + limit - 1) // limit,
-            "has_next": page * limit < total_count,
+            "has_next": has_next,
             "has_prev": page > 1
         }
     }
+    if facets is not None:
+        response["facets"] = facets
+    return response
 
 @router.get("/my-listings", response_model=List[ListingResponse])
 async def get_my_listings(user: TokenUser = Depends(get_current_user)):
@@ -748,7 +824,7 @@ async def get_my_listings(user: TokenUser = Depends(get_current_user)):
         listing["created_at"] = listing.get("created_at", datetime.now(timezone.utc).isoformat())
         listing["updated_at"] = listing.get("updated_at", datetime.now(timezone.utc).isoformat())
         listing["is_available"] = not listing.get("is_sold", False)
-        listing["images"] = [get_optimized_image_url(pid) for pid in listing.get("images", [])]
+        ImageUrls.apply(listing)
         
         # 🛠️ Add missing fields for frontend
         listing["views"] = listing.get("views", 0)
@@ -765,44 +841,63 @@ async def get_my_listings(user: TokenUser = Depends(get_current_user)):
     return result
 
 @router.get("/recent", response_model=List[ListingResponse])
-async def get_recent_listings(limit: int = 3):
+async def get_recent_listings(limit: int = settings.recent_listings_limit):
+    cached = HomeFeed.page("recent", 0, limit)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
     listings_cursor = db.listings.find({"is_sold": False}).sort("created_at", -1).limit(limit)
     listings = await listings_cursor.to_list(length=limit)
 
-    result = []
-    for listing in listings:
-        listing["id"] = str(listing["_id"])
-        listing["posted_by"] = str(listing.get("posted_by", ""))
-        listing["buyer_id"] = str(listing.get("buyer_id", ""))
-        listing["is_available"] = not listing.get("is_sold", False)
-        listing["created_at"] = listing.get("created_at", datetime.now(timezone.utc))
-        listing["updated_at"] = listing.get("updated_at", datetime.now(timezone.utc))
-        listing["images"] = [get_optimized_image_url(pid) for pid in listing.get("images", [])]
+    seller_ids = list({ObjectId(str(listing["posted_by"])) for listing in listings if ObjectId.is_valid(str(listing.get("posted_by", "")))})
+    sellers = await db.users.find({"_id": {"$in": seller_ids}}, {"name": 1, "reg_no": 1}).to_list(None)
+    seller_map = {str(seller["_id"]): seller for seller in sellers}
 
-        listing["condition"] = listing.get("condition")
-        listing["location"] = listing.get("location")
+    return [recent_listing_card(listing, seller_map.get(str(listing.get("posted_by")))) for listing in listings]
 
-        # Lookup seller info
-        try:
-            seller = await db.users.find_one(
-                {"_id": ObjectId(listing["posted_by"])},
-                {"name": 1, "reg_no": 1}
-            )
-            listing["seller_name"] = seller.get("name", "Unknown") if seller else "Unknown"
-            listing["seller_reg_no"] = seller.get("reg_no", "N/A") if seller else "N/A"
-        except:
-            listing["seller_name"] = "Unknown"
-            listing["seller_reg_no"] = "N/A"
+def recent_listing_card(listing: dict, seller: Optional[dict]) -> dict:
+    """A listing as /listings/recent returns it (a ListingResponse), JSON-ready"""
+    listing["id"] = str(listing["_id"])
+    listing["posted_by"] = str(listing.get("posted_by", ""))
+    listing["buyer_id"] = str(listing.get("buyer_id", ""))
+    listing["is_available"] = not listing.get("is_sold", False)
+    listing["created_at"] = listing.get("created_at", datetime.now(timezone.utc))
+    listing["updated_at"] = listing.get("updated_at", datetime.now(timezone.utc))
+    ImageUrls.apply(listing)
 
-        result.append(ListingResponse(**listing))
+    listing["condition"] = listing.get("condition")
+    listing["location"] = listing.get("location")
+    listing["seller_name"] = seller.get("name", "Unknown") if seller else "Unknown"
+    listing["seller_reg_no"] = seller.get("reg_no", "N/A") if seller else "N/A"
 
-    return result
+    return ListingResponse(**listing).model_dump(mode="json")
 
 @router.get("/{listing_id}", response_model=ListingResponse)
-async def get_listing_by_id(listing_id: str):
-    listing = await db.listings.find_one({"_id": ObjectId(listing_id)})
-    if not listing:
-        raise HTTPException(status_code=404, detail="Listing not found")
+async def get_listing_by_id(
+    listing_id: str,
+    request: Request,
+    response: Response,
+    viewer_id: Optional[str] = Depends(get_optional_user_id)
+):
+    async with ReadRouting.session(viewer_id) as session:
+        listing = await ReadRouting.replica("listings").find_one({"_id": ObjectId(listing_id)}, session=session)
+        if not listing:
+            raise HTTPException(status_code=404, detail="Listing not found")
+
+        # ✅ Look up the seller for seller_name and seller_reg_no
+        try:
+            seller = await ReadRouting.replica("users").find_one(
+                {"_id": ObjectId(listing.get("posted_by", ""))},
+                {"name": 1, "reg_no": 1},
+                session=session
+            )
+        except Exception:
+            seller = None
+
+    # Revalidations end here, before any of the response is built
+    not_modified = HttpCache.not_modified(request, response, HttpCache.document_etag(listing, seller))
+    if not_modified:
+        return not_modified
 
     # Format basic fields
     listing["id"] = str(listing["_id"])
@@ -811,22 +906,14 @@ async def get_listing_by_id(listing_id: str):
     listing["is_available"] = not listing.get("is_sold", False)
     listing["created_at"] = listing.get("created_at", datetime.now(timezone.utc))
     listing["updated_at"] = listing.get("updated_at", datetime.now(timezone.utc))
-    listing["images"] = [get_optimized_image_url(pid) for pid in listing.get("images", [])]
+    ImageUrls.apply(listing)
     listing["condition"] = listing.get("condition")
     listing["location"] = listing.get("location")
     listing["is_sold"] = listing.get("is_sold", False)
 
     # ✅ Inject seller_name and seller_reg_no for existing response model
-    try:
-        seller = await db.users.find_one(
-            {"_id": ObjectId(listing["posted_by"])},
-            {"name": 1, "reg_no": 1}
-        )
-        listing["seller_name"] = seller.get("name", "Unknown") if seller else "Unknown"
-        listing["seller_reg_no"] = seller.get("reg_no", "N/A") if seller else "N/A"
-    except Exception:
-        listing["seller_name"] = "Unknown"
-        listing["seller_reg_no"] = "N/A"
+    listing["seller_name"] = seller.get("name", "Unknown") if seller else "Unknown"
+    listing["seller_reg_no"] = seller.get("reg_no", "N/A") if seller else "N/A"
 
     return ListingResponse(**listing)
 
@@ -851,31 +938,35 @@ async def update_listing(
     
     # 1. Delete removed public_ids from Cloudinary
     to_delete = list(set(existing_ids) - set(images_to_keep))
-    for public_id in to_delete:
-        uploader.destroy(public_id)
+    await enqueue_image_deletes(to_delete)
 
     # 2. Upload new images to Cloudinary
     new_image_ids = []
+    new_variants = []
     for image in new_images:
         uploaded = await upload_image_to_cloudinary(await image.read())
         new_image_ids.append(uploaded["public_id"])
+        new_variants.append(uploaded["variants"])
 
     # 3. Final image list = kept + new
     final_image_ids = images_to_keep + new_image_ids
+    kept_variants = ImageUrls.for_listing({**listing, "images": images_to_keep})
 
     # 4. Apply metadata updates
     update_dict = update_data.model_dump(exclude_unset=True)
     update_dict["images"] = final_image_ids
+    update_dict["image_variants"] = kept_variants + new_variants
     update_dict["updated_at"] = datetime.now(timezone.utc)
 
     await db.listings.update_one(
         {"_id": ObjectId(listing_id)},
         {"$set": update_dict}
     )
+    await HomeFeed.mark_dirty()
 
     return {
         "message": "Listing updated successfully ✅",
-        "updated_images": [get_optimized_image_url(pid) for pid in final_image_ids]
+        "updated_images": [variant["card"] for variant in update_dict["image_variants"]]
     }
 
 @router.delete("/{listing_id}")
@@ -891,16 +982,13 @@ async def delete_listing(
     if str(listing["posted_by"]) != str(user.id):
         raise HTTPException(status_code=403, detail="You are not allowed to delete this listing")
 
-    # 🧹 Step 1: Delete all images from Cloudinary
+    # 🧹 Step 1: Queue deletion of all images from Cloudinary (retried until they're gone)
     image_ids = listing.get("images", [])
-    for public_id in image_ids:
-        try:
-            await asyncio.to_thread(uploader.destroy, public_id)
-        except Exception as e:
-            print(f"⚠️ Failed to delete image: {public_id} — {e}")
+    await enqueue_image_deletes(image_ids)
 
     # 🗑️ Step 2: Delete the listing from DB
     await db.listings.delete_one({"_id": ObjectId(listing_id)})
+    await HomeFeed.mark_dirty()
 
     return {
         "message": "Listing deleted successfully 🗑️",
@@ -933,6 +1021,7 @@ async def mark_listing_as_available(
             }
         }
     )
+    await HomeFeed.mark_dirty()
 
     return {"message": "Listing marked as available again ✅"}
 
@@ -961,6 +1050,7 @@ async def mark_listing_as_unavailable(
             }
         }
     )
+    await HomeFeed.mark_dirty()
 
     return {"message": "Listing marked as unavailable ✅"}
 
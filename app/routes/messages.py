@@ -5,7 +5,9 @@ from app.utils.auth import get_current_user
 from app.utils.cloudinary import get_optimized_image_url
 from app.models.message import MessageCreate, ChatResponse
 from app.database import db
+from app.config import settings
 from app.utils.rate_limiter import RateLimiter
+from app.utils.near_duplicate import NearDuplicateDetector
 from datetime import datetime, timezone
 from typing import List
 from app.routes.listings import _notify
@@ -15,8 +17,10 @@ router = APIRouter(prefix="/messages", tags=["Messages"])
 
 @router.post("/send", response_model=dict)
 async def send_message(data: MessageCreate, user: TokenUser = Depends(get_current_user)):
-    # 1. Rate limiting: Check message rate limit (3 per 10s)
-    can_send, rate_limit_msg = await RateLimiter.check_message_rate_limit(user.id, window_seconds=10, max_requests=3)
+    # 1. Rate limiting: Check message rate limit (MESSAGE_RATE_MAX per MESSAGE_RATE_WINDOW_SECONDS)
+    can_send, rate_limit_msg = await RateLimiter.check_message_rate_limit(
+        user.id, window_seconds=settings.message_rate_window_seconds, max_requests=settings.message_rate_max
+    )
     if not can_send:
         raise HTTPException(status_code=429, detail=rate_limit_msg)
 
@@ -30,7 +34,12 @@ async def send_message(data: MessageCreate, user: TokenUser = Depends(get_curren
     if not receiver_exists or not listing_exists:
         raise HTTPException(status_code=404, detail="Receiver or listing not found.")
 
-    # 4. Insert the message
+    # 4. Reject the same message blasted to many receivers
+    is_blast, blast_reason, signature = await NearDuplicateDetector.check_message(user.id, data.receiver_id, data.message)
+    if is_blast:
+        raise HTTPException(status_code=429, detail=blast_reason)
+
+    # 5. Insert the message
     message_doc = {
         "sender_id": ObjectId(user.id),
         "receiver_id": ObjectId(data.receiver_id),
@@ -38,15 +47,15 @@ async def send_message(data: MessageCreate, user: TokenUser = Depends(get_curren
         "message": data.message,
         "timestamp": datetime.now(timezone.utc)
     }
-    await db.messages.insert_one(message_doc)
+    result = await db.messages.insert_one(message_doc)
+    await NearDuplicateDetector.record_message(result.inserted_id, user.id, data.receiver_id, signature)
 
-    # 5. Create a notification for the receiver
-    sender = await db.users.find_one({"_id": ObjectId(user.id)}, {"name": 1})
+    # 6. Create a notification for the receiver
     await _notify(
         ObjectId(data.receiver_id),
         "message",
         "New Message",
-        f"{sender.get('name', 'Someone')} sent you a new message about {listing_exists.get('title', 'a listing')}",
+        f"{user.name or 'Someone'} sent you a new message about {listing_exists.get('title', 'a listing')}",
         meta={
             "sender_id": str(user.id),
             "listing_id": str(data.listing_id),
@@ -64,7 +73,7 @@ async def get_chat(
     user: TokenUser = Depends(get_current_user),
     # Add pagination parameters
     skip: int = 0,
-    limit: int = Query(default=50, lte=100)
+    limit: int = Query(default=settings.messages_page_size, lte=settings.messages_max_page_size)
 ):
     sender_obj_id = ObjectId(user.id)
     receiver_obj_id = ObjectId(receiver_id)
@@ -0,0 +1,28 @@
+import hmac
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.config import settings
+from app.utils.job_metrics import JobMetrics
+from app.utils.request_metrics import RequestMetrics
+from app.utils.compression import ResponseCompressor
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus-style metrics for scheduled background jobs, HTTP requests and response compression.
+    With METRICS_TOKEN set, scrapes must send it as a bearer token and also get the money-flow totals.
+    """
+    include_sensitive = False
+    if settings.metrics_token:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+        include_sensitive = True
+
+    return PlainTextResponse(
+        JobMetrics.render_prometheus(include_sensitive) + RequestMetrics.render_prometheus() + ResponseCompressor.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from app.models.review import ReviewCreate, ReviewResponse, ReviewUpdate
 from app.models.user import TokenUser
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, get_optional_user_id
+from app.utils.read_routing import ReadRouting
+from app.utils.http_cache import HttpCache
 from app.utils.sanitizer import InputSanitizer
 from app.database import db
 from bson import ObjectId
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
@@ -81,27 +83,39 @@ async def create_review(
     )
 
 @router.get("/listing/{listing_id}", response_model=List[ReviewResponse])
-async def get_listing_reviews(listing_id: str):
+async def get_listing_reviews(
+    listing_id: str,
+    request: Request,
+    response: Response,
+    viewer_id: Optional[str] = Depends(get_optional_user_id)
+):
     """Get all reviews for a specific listing"""
     
-    # Check if listing exists
-    listing = await db.listings.find_one({"_id": ObjectId(listing_id)})
-    if not listing:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    
-    # Get reviews
-    reviews_cursor = db.reviews.find(
-        {"listing_id": ObjectId(listing_id)}
-    ).sort("created_at", -1)
-    
-    reviews = await reviews_cursor.to_list(length=None)
-    
-    # Get reviewer info for each review
-    reviewer_ids = [review["reviewer_id"] for review in reviews]
-    reviewers = await db.users.find(
-        {"_id": {"$in": reviewer_ids}},
-        {"name": 1, "reg_no": 1}
-    ).to_list(length=None)
+    async with ReadRouting.session(viewer_id) as session:
+        # Check if listing exists
+        listing = await ReadRouting.replica("listings").find_one({"_id": ObjectId(listing_id)}, {"_id": 1}, session=session)
+        if not listing:
+            raise HTTPException(status_code=404, detail="Listing not found")
+
+        # Get reviews
+        reviews_cursor = ReadRouting.replica("reviews").find(
+            {"listing_id": ObjectId(listing_id)},
+            session=session
+        ).sort("created_at", -1)
+
+        reviews = await reviews_cursor.to_list(length=None)
+
+        # Get reviewer info for each review
+        reviewer_ids = [review["reviewer_id"] for review in reviews]
+        reviewers = await ReadRouting.replica("users").find(
+            {"_id": {"$in": reviewer_ids}},
+            {"name": 1, "reg_no": 1},
+            session=session
+        ).to_list(length=None)
+
+    not_modified = HttpCache.not_modified(request, response, HttpCache.document_etag(*reviews, *reviewers))
+    if not_modified:
+        return not_modified
     
     reviewer_map = {
         str(reviewer["_id"]): {
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from app.utils.auth import get_current_user
 from app.utils.rate_limiter import RateLimiter
+from app.utils.idempotency import IdempotencyGuard
 from app.utils.wallet_auto_refill import WalletAutoRefill
 from app.models.credit_transaction import CreditTransactionType
-from app.database import db, client
+from app.tasks.jobs import enqueue_credit_transaction
+from app.database import db
+from app.config import settings
 from bson import ObjectId
 from app.models.wallet import WalletAdd, WalletResponse
 from datetime import datetime, timezone
+from pymongo import ReturnDocument
 from pymongo.errors import PyMongoError
+from typing import Optional
 
 router = APIRouter(prefix="/wallet", tags=["Wallet"])
 
@@ -21,18 +26,30 @@ async def wallet_balance(user=Depends(get_current_user)):
 
 # ✅ Add money (Top-Up) to wallet
 @router.post("/topup")
-async def top_up_wallet(data: WalletAdd, user=Depends(get_current_user)):
+async def top_up_wallet(
+    data: WalletAdd,
+    user=Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    return await IdempotencyGuard.run(
+        idempotency_key, user.id, "wallet.topup",
+        lambda: _top_up_wallet(data, user),
+        body=data.model_dump()
+    )
+
+async def _top_up_wallet(data: WalletAdd, user):
     if data.amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid top-up amount")
 
     # 1. Check daily credit limit
-    can_credit, credit_limit_msg = await RateLimiter.check_daily_credit_limit(user.id, max_amount=10000.0)
+    can_credit, credit_limit_msg = await RateLimiter.check_daily_credit_limit(user.id, max_amount=settings.daily_credit_limit)
     if not can_credit:
         raise HTTPException(status_code=429, detail=credit_limit_msg)
 
-    # 2. Check top-up limit
-    if (user.wallet_balance or 0) + data.amount > 50000:
-        raise HTTPException(status_code=400, detail="Wallet balance cannot exceed ₹50,000")
+    # 2. Check top-up limit (the access token doesn't carry the balance)
+    balance_doc = await db.users.find_one({"_id": ObjectId(user.id)}, {"wallet_balance": 1})
+    if (balance_doc or {}).get("wallet_balance", 0) + data.amount > settings.wallet_max_balance:
+        raise HTTPException(status_code=400, detail=f"Wallet balance cannot exceed ₹{settings.wallet_max_balance:,.0f}")
 
     # 3. Check top-up count today
     start_of_day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -42,14 +59,16 @@ async def top_up_wallet(data: WalletAdd, user=Depends(get_current_user)):
         "timestamp": {"$gte": start_of_day}
     })
 
-    if topups_today >= 2:
-        raise HTTPException(status_code=400, detail="You can only top-up twice per day")
+    if topups_today >= settings.topups_per_day:
+        raise HTTPException(status_code=400, detail=f"You can only top-up {settings.topups_per_day} times per day")
 
     # 4. Update wallet (without transaction for standalone MongoDB)
     try:
-        await db.users.update_one(
+        updated = await db.users.find_one_and_update(
             {"_id": ObjectId(user.id)},
-            {"$inc": {"wallet_balance": data.amount}}
+            {"$inc": {"wallet_balance": data.amount}},
+            projection={"wallet_balance": 1},
+            return_document=ReturnDocument.AFTER
         )
         await db.wallet_history.insert_one({
             "user_id": ObjectId(user.id),
@@ -60,12 +79,12 @@ async def top_up_wallet(data: WalletAdd, user=Depends(get_current_user)):
         })
         
         # Record in credit transactions table
-        await WalletAutoRefill.record_credit_transaction(
+        await enqueue_credit_transaction(
             user_id=user.id,
             amount=data.amount,
             transaction_type=CreditTransactionType.MANUAL_TOPUP,
             description=data.ref_note,
-            is_auto_refill=False
+            new_balance=updated["wallet_balance"]
         )
     except PyMongoError as e:
         print(f"Top-up failed: {e}")
@@ -90,10 +109,19 @@ async def get_transaction_history(user=Depends(get_current_user)):
 
     return txns
 
-# ✅ Manual refill to ₹50,000
+# ✅ Manual refill to the auto-refill target
 @router.post("/refill")
-async def manual_refill_wallet(user=Depends(get_current_user)):
-    """Manually refill wallet to ₹50,000"""
+async def manual_refill_wallet(
+    user=Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """Manually refill wallet to the auto-refill target (REFILL_AMOUNT)"""
+    return await IdempotencyGuard.run(
+        idempotency_key, user.id, "wallet.refill",
+        lambda: _manual_refill_wallet(user)
+    )
+
+async def _manual_refill_wallet(user):
     
     # Get current user balance
     user_doc = await db.users.find_one({"_id": ObjectId(user.id)}, {"wallet_balance": 1})
@@ -101,12 +129,12 @@ async def manual_refill_wallet(user=Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="User not found")
     
     current_balance = user_doc.get("wallet_balance", 0.0)
-    target_balance = 50000.0
+    target_balance = settings.refill_amount
     refill_amount = target_balance - current_balance
     
     # Check if refill is needed
     if refill_amount <= 0:
-        return {"message": "Wallet is already at maximum balance (₹50,000)", "refilled": False}
+        return {"message": f"Wallet is already at maximum balance (₹{target_balance:,.0f})", "refilled": False}
     
     # Check daily refill limit (same as auto-refill)
     today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -117,8 +145,8 @@ async def manual_refill_wallet(user=Depends(get_current_user)):
         "created_at": {"$gte": today}
     })
     
-    if refills_today >= 3:  # Same limit as auto-refill
-        raise HTTPException(status_code=429, detail="Daily refill limit reached (3 refills per day)")
+    if refills_today >= settings.max_daily_refills:  # Same limit as auto-refill
+        raise HTTPException(status_code=429, detail=f"Daily refill limit reached ({settings.max_daily_refills} refills per day)")
     
     # Perform refill (without transaction for standalone MongoDB)
     try:
@@ -133,7 +161,7 @@ async def manual_refill_wallet(user=Depends(get_current_user)):
             "user_id": ObjectId(user.id),
             "type": "credit",
             "amount": refill_amount,
-            "ref_note": "Manual refill to ₹50,000",
+            "ref_note": f"Manual refill to ₹{target_balance:,.0f}",
             "timestamp": datetime.now(timezone.utc)
         })
         
@@ -142,8 +170,9 @@ async def manual_refill_wallet(user=Depends(get_current_user)):
             user_id=user.id,
             amount=refill_amount,
             transaction_type=CreditTransactionType.AUTO_REFILL,
-            description="Manual refill to ₹50,000",
-            is_auto_refill=True
+            description=f"Manual refill to ₹{target_balance:,.0f}",
+            is_auto_refill=True,
+            new_balance=target_balance
         )
         
     except PyMongoError as e:
@@ -151,7 +180,7 @@ async def manual_refill_wallet(user=Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="Manual refill failed")
     
     return {
-        "message": f"Wallet refilled to ₹50,000 (added ₹{refill_amount:,.0f})",
+        "message": f"Wallet refilled to ₹{target_balance:,.0f} (added ₹{refill_amount:,.0f})",
         "refilled": True,
         "refill_amount": refill_amount,
         "new_balance": target_balance
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.database import db
+from app.models.credit_transaction import CreditTransactionType
+from app.utils.cloudinary import destroy_image
+from app.utils.job_queue import JobQueue
+from app.utils.wallet_auto_refill import WalletAutoRefill
+
+# Handlers for deferred side effects. Delivery is at-least-once, so each one is idempotent.
+
+async def enqueue_notifications(notifications: list):
+    """Queue notification documents; ids are assigned now so a retried job can't insert them twice"""
+    for notification in notifications:
+        notification.setdefault("_id", ObjectId())
+        notification.setdefault("created_at", datetime.now(timezone.utc))
+    await JobQueue.enqueue("notifications.create", {"notifications": notifications})
+
+@JobQueue.handler("notifications.create", lane="high")
+async def create_notifications(payload: dict, job: dict):
+    try:
+        await db.notifications.insert_many(payload["notifications"], ordered=False)
+    except BulkWriteError as e:
+        # Already inserted by an earlier attempt
+        if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+
+@JobQueue.handler("cloudinary.destroy", lane="low", max_attempts=8)
+async def destroy_cloudinary_image(payload: dict, job: dict):
+    result = await destroy_image(payload["public_id"])
+    if result.get("result") not in ("ok", "not found"):
+        raise RuntimeError(f"Cloudinary destroy returned {result}")
+
+@JobQueue.handler("credits.record")
+async def record_credit_transaction(payload: dict, job: dict):
+    try:
+        await WalletAutoRefill.record_credit_transaction(
+            user_id=payload["user_id"],
+            amount=payload["amount"],
+            transaction_type=CreditTransactionType(payload["transaction_type"]),
+            reference_id=payload.get("reference_id"),
+            description=payload.get("description"),
+            is_auto_refill=payload.get("is_auto_refill", False),
+            transaction_id=job["_id"],
+            new_balance=payload.get("new_balance")
+        )
+    except DuplicateKeyError:
+        pass
+
+@JobQueue.handler("wallet.auto_refill")
+async def auto_refill_wallet(payload: dict, job: dict):
+    was_refilled, refill_message, _ = await WalletAutoRefill.check_and_refill_wallet(payload["user_id"])
+    if was_refilled:
+        print(f"Auto-refilled wallet for {payload['user_id']}: {refill_message}")
+
+async def enqueue_auto_refill(user_id: str):
+    # One pending check per user is enough; the check itself reads the latest balance
+    await JobQueue.enqueue("wallet.auto_refill", {"user_id": user_id}, dedupe_key=f"wallet.auto_refill:{user_id}")
+
+async def enqueue_credit_transaction(user_id: str, amount: float, transaction_type: CreditTransactionType,
+                                     reference_id: str = None, description: str = None, new_balance: float = None):
+    # new_balance is the balance returned by the write itself; by the time the job runs it may have moved on
+    await JobQueue.enqueue("credits.record", {
+        "user_id": user_id,
+        "amount": amount,
+        "transaction_type": transaction_type.value,
+        "reference_id": reference_id,
+        "description": description,
+        "new_balance": new_balance
+    })
+
+async def enqueue_image_deletes(public_ids: list):
+    for public_id in public_ids:
+        await JobQueue.enqueue("cloudinary.destroy", {"public_id": public_id})
@@ -0,0 +1,32 @@
+from app.tasks.image_cleanup import delete_old_listing_images
+from app.tasks.wallet_auto_refill_task import check_all_users_for_auto_refill, get_money_flow_summary
+from app.tasks.fraud_ring_analysis import analyze_fraud_rings
+from app.utils.leader_lease import LeaderLease, leader_only
+from app.utils.trade_graph import TradeGraph
+from app.utils.token_revocation import TokenRevocation
+from app.utils.home_feed import HomeFeed
+from app.config import settings
+
+# SCHEDULER_MODE / JOB_CONSUMER_MODE:
+# "embedded": API processes elect one leader to run cluster jobs and consume queued jobs (default)
+# "worker":   API processes leave both to `python -m app.worker`
+
+# Jobs that must run exactly once across all processes and replicas
+scheduler_lease = LeaderLease(
+    "scheduler",
+    lease_seconds=settings.scheduler_lease_seconds,
+    heartbeat_seconds=settings.scheduler_heartbeat_seconds
+)
+
+def add_cluster_jobs(scheduler):
+    """Jobs that must run on one node only; they are skipped unless this node holds the lease"""
+    scheduler.add_job(leader_only(scheduler_lease, delete_old_listing_images), "interval", hours=settings.image_cleanup_interval_hours)
+    scheduler.add_job(leader_only(scheduler_lease, check_all_users_for_auto_refill), "interval", minutes=settings.auto_refill_interval_minutes)
+    scheduler.add_job(leader_only(scheduler_lease, get_money_flow_summary), "interval", hours=settings.money_flow_interval_hours)  # Log money flow
+    scheduler.add_job(leader_only(scheduler_lease, analyze_fraud_rings), "interval", hours=settings.fraud_ring_interval_hours)  # Batch wash-trading ring analysis
+
+def add_local_jobs(scheduler):
+    """Jobs that refresh this process's in-memory state and must run in every API process"""
+    scheduler.add_job(TradeGraph.sync, "interval", seconds=settings.trade_graph_sync_seconds)  # Pick up sales made by other workers
+    scheduler.add_job(TokenRevocation.sync, "interval", seconds=settings.token_revocation_sync_seconds)  # Pick up logouts from other workers
+    scheduler.add_job(HomeFeed.sync, "interval", seconds=settings.home_feed_sync_seconds)  # Pick up listing changes from other workers
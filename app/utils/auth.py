@@ -1,17 +1,21 @@
 import jwt
+import secrets
 from datetime import datetime, timedelta, timezone
-import os
+from typing import Optional
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from app.database import db
-from bson import ObjectId
 from pydantic import BaseModel
+from app.config import settings
+from app.utils.token_revocation import TokenRevocation
+from app.utils.read_routing import current_user_id
 
 class TokenUser(BaseModel):
     id: str
     email: str
     role: str
-    wallet_balance: float = 0.0
+    name: Optional[str] = None
+    reg_no: Optional[str] = None
+    wallet_balance: float = 0.0  # Not carried in the token; read the balance from the DB when it matters
 
     @property
     def is_admin(self) -> bool:
@@ -19,20 +23,19 @@ class TokenUser(BaseModel):
     
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")  # This is just a dummy path; it's required
 
-SECRET_KEY = os.getenv("JWT_SECRET_KEY")
-ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
-
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    now = datetime.now(timezone.utc)
+    # Short-lived; renewed via /auth/refresh
+    expire = now + timedelta(minutes=settings.access_token_expire_minutes)
+    # jti lets a single token be revoked before it expires
+    to_encode.update({"exp": expire, "iat": now, "jti": secrets.token_hex(16)})
+    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 def decode_access_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
         return payload
     except jwt.ExpiredSignatureError:
         raise Exception("Token expired")
@@ -40,25 +43,38 @@ def decode_access_token(token: str) -> dict:
         raise Exception("Invalid token")
     
 async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> TokenUser:
+    """Authenticate from the token's own claims; only a revocation-filter hit touches the DB"""
     try:
         payload = decode_access_token(token)
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=str(e))
 
-        user_doc = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user_doc:
-            raise HTTPException(status_code=404, detail="User not found")
+    user_id = payload.get("sub")
+    if not user_id or not payload.get("email"):
+        raise HTTPException(status_code=401, detail="Invalid token")
 
-        # Attach the full document to the request state for later use
-        request.state.user = user_doc
+    jti = payload.get("jti")
+    if jti and await TokenRevocation.is_revoked(jti):
+        raise HTTPException(status_code=401, detail="Token revoked")
 
-        # Return the TokenUser as before for backward compatibility
-        return TokenUser(
-            id=str(user_doc["_id"]),
-            email=user_doc["email"],
-            role=user_doc.get("role", "student"),
-            wallet_balance=user_doc.get("wallet_balance", 0.0)
-        )
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=str(e))
+    # Attach the token claims to the request state for later use
+    request.state.user = payload
+    current_user_id.set(user_id)
+
+    return TokenUser(
+        id=user_id,
+        email=payload["email"],
+        role=payload.get("role", "student"),
+        name=payload.get("name"),
+        reg_no=payload.get("reg_no")
+    )
+
+async def get_optional_user_id(request: Request) -> Optional[str]:
+    """User id from the bearer token on public routes, or None. Not an authorization check."""
+    authorization = request.headers.get("Authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        return decode_access_token(authorization[7:]).get("sub")
+    except Exception:
+        return None
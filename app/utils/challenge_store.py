@@ -0,0 +1,77 @@
+import heapq
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timezone
+from app.database import db
+from app.config import settings
+
+class ChallengeStore(ABC):
+    """Records consumed challenge tokens so each one can only be used once"""
+
+    async def ensure_indexes(self):
+        pass
+
+    @abstractmethod
+    async def consume(self, nonce: str, expires_at: float) -> bool:
+        """Mark a token nonce as used until it expires. Returns False if it was already used."""
+
+class InMemoryChallengeStore(ChallengeStore):
+    """
+    Single-worker store. Entries expire through a min-heap keyed by expiry, so
+    each sweep only touches expired entries. At max_size it refuses new tokens
+    rather than forget unexpired ones, which would let them be replayed.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._expiry: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+    def _sweep(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, nonce = heapq.heappop(self._heap)
+            if self._expiry.get(nonce) == expires_at:
+                del self._expiry[nonce]
+
+    async def consume(self, nonce: str, expires_at: float) -> bool:
+        now = time.time()
+        self._sweep(now)
+
+        if nonce in self._expiry:
+            return False
+
+        # Fail closed: every stored nonce is still live, and dropping one would make it redeemable again
+        if len(self._expiry) >= self.max_size:
+            raise HTTPException(status_code=503, detail="Too many logins in progress, please try again shortly.")
+
+        self._expiry[nonce] = expires_at
+        heapq.heappush(self._heap, (expires_at, nonce))
+        return True
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+class MongoChallengeStore(ChallengeStore):
+    """Shared store for multi-worker deployments, expired by a TTL index"""
+
+    async def ensure_indexes(self):
+        await db.used_challenges.create_index("expires_at", expireAfterSeconds=0)
+
+    async def consume(self, nonce: str, expires_at: float) -> bool:
+        try:
+            await db.used_challenges.insert_one({
+                "_id": nonce,
+                "expires_at": datetime.fromtimestamp(expires_at, timezone.utc)
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+
+def get_challenge_store() -> ChallengeStore:
+    """Pick the store from CHALLENGE_STORE (memory | mongo)"""
+    if settings.challenge_store == "mongo":
+        return MongoChallengeStore()
+    return InMemoryChallengeStore(max_size=settings.challenge_store_max_size)
@@ -1,48 +1,124 @@
 import asyncio
-import cloudinary
-import cloudinary.uploader
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET")
-)
-
-CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
-BASE_URL = f"https://res.cloudinary.com/{CLOUD_NAME}/image/upload"
-
-def get_optimized_image_url(public_id: str) -> str:
-    if public_id.startswith("http"):
-        return public_id
-    
-    # Construct the URL with transformations
-    transformations = "w_400,c_scale,f_auto,q_auto"
-    return f"{BASE_URL}/{transformations}/{public_id}"
+import base64
+import hashlib
+from functools import lru_cache
+from typing import List, Optional
+from app.config import settings
+
+BASE_URL = f"https://res.cloudinary.com/{settings.cloudinary_cloud_name}/image/upload"
+
+_sdk_configured = False
+
+def get_uploader():
+    """Import and configure the Cloudinary SDK on first use, so app startup doesn't pay for it"""
+    global _sdk_configured
+    import cloudinary
+    import cloudinary.uploader
+    if not _sdk_configured:
+        cloudinary.config(
+            cloud_name=settings.cloudinary_cloud_name,
+            api_key=settings.cloudinary_api_key,
+            api_secret=settings.cloudinary_api_secret
+        )
+        _sdk_configured = True
+    return cloudinary.uploader
+
+# Responsive widths for srcset; "card" is the long-standing w_400 listing image
+VARIANT_TRANSFORMATIONS = {
+    "thumb": "w_160,c_scale,f_auto,q_auto",
+    "card": "w_400,c_scale,f_auto,q_auto",
+    "detail": "w_1080,c_limit,f_auto,q_auto",
+}
+VARIANT_WIDTHS = {"thumb": 160, "card": 400, "detail": 1080}
+# A few hundred bytes, blurred, shown while the real image loads
+LQIP_TRANSFORMATION = "w_24,c_scale,e_blur:200,q_auto:low,f_auto"
+
+class ImageUrls:
+    """
+    Builds Cloudinary delivery URLs. Results are memoized per public_id, and
+    listings store their variants in `image_variants` at upload time, so
+    serving a listing usually builds no URLs at all.
+    """
+
+    @staticmethod
+    def _signature(to_sign: str) -> str:
+        # Cloudinary's short URL signature: the first 8 characters of the URL-safe SHA-1
+        digest = hashlib.sha1((to_sign + (settings.cloudinary_api_secret or "")).encode()).digest()
+        return f"s--{base64.urlsafe_b64encode(digest)[:8].decode()}--"
+
+    @staticmethod
+    @lru_cache(maxsize=settings.image_url_cache_size)
+    def url(public_id: str, transformation: str, version: Optional[int] = None) -> str:
+        if public_id.startswith("http"):
+            return public_id
+        parts = [transformation]
+        if settings.cloudinary_signed_urls:
+            parts.insert(0, ImageUrls._signature(f"{transformation}/{public_id}"))
+        if version:
+            # Versioned URLs change when the image is replaced, so CDNs never serve the old one
+            parts.append(f"v{version}")
+        return f"{BASE_URL}/{'/'.join(parts)}/{public_id}"
+
+    @staticmethod
+    @lru_cache(maxsize=settings.image_url_cache_size)
+    def variants(public_id: str, version: Optional[int] = None) -> dict:
+        """Every size of an image plus its srcset and LQIP placeholder. Shared; don't modify it."""
+        variant = {"public_id": public_id, "version": version}
+        for name, transformation in VARIANT_TRANSFORMATIONS.items():
+            variant[name] = ImageUrls.url(public_id, transformation, version)
+        variant["lqip"] = ImageUrls.url(public_id, LQIP_TRANSFORMATION, version)
+        variant["srcset"] = ", ".join(f"{variant[name]} {width}w" for name, width in VARIANT_WIDTHS.items())
+        return variant
+
+    @staticmethod
+    def for_listing(listing: dict) -> List[dict]:
+        """The stored variants when they match the listing's images, else built (memoized)"""
+        images = listing.get("images") or []
+        stored = listing.get("image_variants") or []
+        if len(stored) == len(images) and all(v.get("public_id") == pid for v, pid in zip(stored, images)):
+            return stored
+        stored_by_id = {v.get("public_id"): v for v in stored}
+        return [stored_by_id.get(pid) or ImageUrls.variants(pid) for pid in images]
+
+    @staticmethod
+    def apply(listing: dict) -> dict:
+        """Sets `image_variants` and the card-size `images` URLs on a listing being returned"""
+        listing["image_variants"] = ImageUrls.for_listing(listing)
+        listing["images"] = [variant["card"] for variant in listing["image_variants"]]
+        return listing
+
+def get_optimized_image_url(public_id: Optional[str]) -> Optional[str]:
+    """Card-size URL for a single image (memoized)"""
+    if not public_id:
+        return None
+    return ImageUrls.url(public_id, VARIANT_TRANSFORMATIONS["card"])
 
 # --- Refactored Async Upload Helper ---
 async def upload_image_to_cloudinary(file_contents: bytes):
     """
-    Runs the synchronous Cloudinary upload function in a separate thread 
+    Runs the synchronous Cloudinary upload function in a separate thread
     to avoid blocking the main asyncio event loop.
     """
     try:
         # Use asyncio.to_thread to run the blocking call
         result = await asyncio.to_thread(
-            cloudinary.uploader.upload,
+            get_uploader().upload,
             file_contents,
             folder="BrokeBuyListings"
         )
         public_id = result["public_id"]
         optimized_url = get_optimized_image_url(public_id)
-        
+
         return {
             "public_id": public_id,
-            "optimized_url": optimized_url
+            "version": result.get("version"),
+            "optimized_url": optimized_url,
+            "variants": ImageUrls.variants(public_id, result.get("version"))
         }
     except Exception as e:
         # Propagate exceptions to be caught by the endpoint handler
         raise e
+
+async def destroy_image(public_id: str) -> dict:
+    """Delete an image from Cloudinary without blocking the event loop"""
+    return await asyncio.to_thread(get_uploader().destroy, public_id)
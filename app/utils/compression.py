@@ -0,0 +1,115 @@
+import asyncio
+import gzip
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+class ResponseCompressor:
+    """
+    Picks an encoding for a response and compresses it. Shared responses
+    (public and ETagged) are kept by path and ETag in a byte-bounded LRU, so a
+    hot listing page is compressed once and then served from memory until it
+    changes; one-off bodies are compressed without being stored, so they
+    can't evict them. Large bodies are compressed on a worker thread so they
+    don't stall the event loop.
+    """
+
+    _cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+    _cache_bytes = 0
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def encodings() -> Tuple[str, ...]:
+        """Supported encodings, most preferred first"""
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    @staticmethod
+    def choose_encoding(accept_encoding: str) -> Optional[str]:
+        """The best encoding the client accepts (q > 0), or None"""
+        accepted = {}
+        for part in accept_encoding.split(","):
+            name, _, params = part.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name.strip().lower()] = q
+        for encoding in ResponseCompressor.encodings():
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return None
+
+    @staticmethod
+    def compressible(content_type: str, size: int) -> bool:
+        if size < settings.compression_min_bytes:
+            return False
+        media_type = content_type.split(";")[0].strip().lower()
+        return any(
+            media_type == allowed or (allowed.endswith("/*") and media_type.startswith(allowed[:-1]))
+            for allowed in settings.compression_types.split(",")
+        )
+
+    @staticmethod
+    def compress_sync(body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=settings.compression_brotli_quality)
+        return gzip.compress(body, compresslevel=settings.compression_gzip_level, mtime=0)
+
+    @staticmethod
+    async def compress(body: bytes, encoding: str, cache_key: Optional[str] = None) -> bytes:
+        """
+        `cache_key` identifies a shared body (e.g. path and ETag) and makes it
+        cacheable; bodies without one are compressed and not stored.
+        """
+        key = (encoding, cache_key)
+        if cache_key is not None:
+            cached = ResponseCompressor._cache.get(key)
+            if cached is not None:
+                ResponseCompressor._cache.move_to_end(key)
+                ResponseCompressor.hits += 1
+                return cached
+            ResponseCompressor.misses += 1
+
+        if len(body) >= settings.compression_offload_bytes:
+            compressed = await asyncio.to_thread(ResponseCompressor.compress_sync, body, encoding)
+        else:
+            compressed = ResponseCompressor.compress_sync(body, encoding)
+        if cache_key is not None:
+            ResponseCompressor._store(key, compressed)
+        return compressed
+
+    @staticmethod
+    def _store(key: Tuple[str, str], compressed: bytes):
+        limit = settings.compression_cache_mb * 1024 * 1024
+        if len(compressed) > limit:
+            return
+        if key not in ResponseCompressor._cache:
+            ResponseCompressor._cache_bytes += len(compressed)
+        ResponseCompressor._cache[key] = compressed
+        while ResponseCompressor._cache_bytes > limit:
+            _, evicted = ResponseCompressor._cache.popitem(last=False)
+            ResponseCompressor._cache_bytes -= len(evicted)
+
+    @staticmethod
+    def render_prometheus() -> str:
+        """Render compressed-body cache metrics in the Prometheus text exposition format"""
+        metrics = [
+            ("brokebuy_compression_cache_hits_total", "counter", "Responses served from the compressed-body cache", ResponseCompressor.hits),
+            ("brokebuy_compression_cache_misses_total", "counter", "Cacheable responses compressed on demand", ResponseCompressor.misses),
+            ("brokebuy_compression_cache_bytes", "gauge", "Bytes held by the compressed-body cache", ResponseCompressor._cache_bytes),
+        ]
+        lines = []
+        for metric, metric_type, help_text, value in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
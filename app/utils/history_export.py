@@ -0,0 +1,141 @@
+import csv
+import io
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+from bson import ObjectId
+
+class _ChunkSink:
+    """Write-only file object that hands its bytes back after every row group"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+class HistoryExporter:
+    """Streams a collection as CSV or Parquet straight from a batched cursor"""
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def _format_value(value):
+        if isinstance(value, ObjectId):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def _typed_value(value, column_type: str):
+        """Value for a typed Parquet column; anything that doesn't fit is written as null"""
+        if value is None:
+            return None
+        if column_type == "timestamp":
+            if not isinstance(value, datetime):
+                return None
+            # MongoDB hands back naive UTC datetimes
+            return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        if column_type == "float64":
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+        if column_type == "bool":
+            return bool(value)
+        return str(value)
+
+    @staticmethod
+    async def _iter_batches(collection, query: dict, columns: List[str], batch_size: int,
+                            format_value=None) -> AsyncIterator[List[dict]]:
+        """Yield lists of flattened rows in _id order, holding at most one batch in memory"""
+        format_value = format_value or (lambda column, value: HistoryExporter._format_value(value))
+        projection = {column: 1 for column in columns}
+        cursor = collection.find(query, projection).sort("_id", 1).batch_size(batch_size)
+
+        batch = []
+        async for doc in cursor:
+            batch.append({
+                column: format_value(column, doc.get(column))
+                for column in columns
+            })
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    async def stream_csv(collection, query: dict, columns: List[str], batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+        """Stream rows as CSV, one chunk per cursor batch"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        writer.writeheader()
+        yield buffer.getvalue().encode()
+
+        async for batch in HistoryExporter._iter_batches(collection, query, columns, batch_size):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue().encode()
+
+    @staticmethod
+    async def stream_parquet(collection, query: dict, columns: List[str], column_types: Optional[Dict[str, str]] = None,
+                             batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+        """
+        Stream rows as Parquet, writing one row group per cursor batch.
+        `column_types` maps columns to "float64", "timestamp" (microseconds, UTC) or
+        "bool"; the rest are strings. The schema is fixed up front so every batch matches it.
+        """
+        # pyarrow is optional; the route checks availability before streaming
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        column_types = column_types or {}
+        arrow_types = {"float64": pa.float64(), "timestamp": pa.timestamp("us", tz="UTC"), "bool": pa.bool_()}
+        schema = pa.schema([(column, arrow_types.get(column_types.get(column), pa.string())) for column in columns])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+
+        def typed(column, value):
+            return HistoryExporter._typed_value(value, column_types.get(column, "string"))
+
+        try:
+            async for batch in HistoryExporter._iter_batches(collection, query, columns, batch_size, typed):
+                table = pa.Table.from_pydict(
+                    {column: [row[column] for row in batch] for column in columns},
+                    schema=schema
+                )
+                writer.write_table(table)
+                yield sink.drain()
+        finally:
+            writer.close()
+
+        yield sink.drain()
+
+    @staticmethod
+    def parquet_available() -> bool:
+        try:
+            import pyarrow.parquet  # noqa: F401
+            return True
+        except ImportError:
+            return False
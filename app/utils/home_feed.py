@@ -0,0 +1,115 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from app.database import db
+from app.config import settings
+
+FEED_STATE_ID = "listings"
+
+class HomeFeed:
+    """
+    The newest HOME_FEED_SIZE unsold listings, hydrated with their sellers and
+    ready to serve, so the landing page (/listings/recent and the first pages
+    of /listings/) is a memory read. Listing writes bump a version in
+    MongoDB and wait for this process's feed to rebuild; other processes notice
+    the new version within HOME_FEED_SYNC_SECONDS.
+    """
+
+    MAX_ENCODED_PAGES = 64
+
+    _cards: List[dict] = []          # /listings/ shape
+    _recent_cards: List[dict] = []   # /listings/recent (ListingResponse) shape
+    _encoded: Dict[Tuple[str, int, int], bytes] = {}
+    _version: Optional[int] = None
+    _built_at = 0.0
+    _refresh_task: Optional[asyncio.Task] = None
+    _refresh_again = False
+
+    @staticmethod
+    async def _current_version() -> int:
+        state = await db.home_feed_state.find_one({"_id": FEED_STATE_ID}, {"version": 1})
+        return (state or {}).get("version", 0)
+
+    @staticmethod
+    async def refresh():
+        """Rebuild the feed from MongoDB: one query for the listings and one for their sellers"""
+        from app.routes.listings import listing_card, recent_listing_card
+
+        version = await HomeFeed._current_version()
+        listings = await db.listings.find({"is_sold": False}).sort("created_at", -1).limit(settings.home_feed_size).to_list(None)
+        seller_ids = list({ObjectId(str(listing["posted_by"])) for listing in listings if ObjectId.is_valid(str(listing.get("posted_by", "")))})
+        sellers = await db.users.find({"_id": {"$in": seller_ids}}, {"name": 1, "reg_no": 1}).to_list(None)
+        seller_map = {str(seller["_id"]): seller for seller in sellers}
+
+        recent_cards = [recent_listing_card(dict(listing), seller_map.get(str(listing.get("posted_by")))) for listing in listings]
+        cards = [listing_card(listing, seller_map.get(str(listing.get("posted_by")))) for listing in listings]
+
+        HomeFeed._cards, HomeFeed._recent_cards, HomeFeed._encoded = cards, recent_cards, {}
+        HomeFeed._version = version
+        HomeFeed._built_at = time.monotonic()
+
+    @staticmethod
+    async def sync():
+        """Rebuild when another process changed listings, or to pick up seller renames after HOME_FEED_MAX_AGE_SECONDS"""
+        if HomeFeed._version != await HomeFeed._current_version() or time.monotonic() - HomeFeed._built_at > settings.home_feed_max_age_seconds:
+            await HomeFeed.refresh()
+
+    @staticmethod
+    async def mark_dirty():
+        """
+        Call after any write that can change which unsold listings are newest.
+        Returns once this process's feed includes the write, so the writer's
+        next request here sees it.
+        """
+        await db.home_feed_state.update_one({"_id": FEED_STATE_ID}, {"$inc": {"version": 1}}, upsert=True)
+        # Shielded: the rebuild is shared with other writers and outlives a cancelled request
+        await asyncio.shield(HomeFeed._schedule_refresh())
+
+    @staticmethod
+    def _schedule_refresh() -> asyncio.Task:
+        # Writes that land during a rebuild trigger one more rebuild afterwards, not one each
+        if HomeFeed._refresh_task is not None and not HomeFeed._refresh_task.done():
+            HomeFeed._refresh_again = True
+            return HomeFeed._refresh_task
+        HomeFeed._refresh_task = asyncio.create_task(HomeFeed._refresh_until_clean())
+        return HomeFeed._refresh_task
+
+    @staticmethod
+    async def _refresh_until_clean():
+        while True:
+            HomeFeed._refresh_again = False
+            try:
+                await HomeFeed.refresh()
+            except Exception as e:
+                print(f"⚠️ Failed to rebuild home feed: {e}")
+                return
+            if not HomeFeed._refresh_again:
+                return
+
+    @staticmethod
+    def _fresh() -> bool:
+        # A feed that hasn't rebuilt for twice its max age means syncs are failing; read MongoDB instead
+        return HomeFeed._version is not None and time.monotonic() - HomeFeed._built_at <= 2 * settings.home_feed_max_age_seconds
+
+    @staticmethod
+    def page(kind: str, skip: int, limit: int) -> Optional[bytes]:
+        """
+        JSON for `limit` cards from `skip` ("listings" or "recent"), or None when
+        the page reaches past the feed and has to come from MongoDB.
+        """
+        cards = HomeFeed._cards if kind == "listings" else HomeFeed._recent_cards
+        if not settings.home_feed or not HomeFeed._fresh() or skip < 0 or limit < 1:
+            return None
+        # Past the end of a full feed there may be older listings the feed doesn't hold
+        if skip + limit > len(cards) and len(cards) >= settings.home_feed_size:
+            return None
+
+        key = (kind, skip, limit)
+        encoded = HomeFeed._encoded.get(key)
+        if encoded is None:
+            encoded = json.dumps(cards[skip:skip + limit], ensure_ascii=False, separators=(",", ":")).encode()
+            if len(HomeFeed._encoded) < HomeFeed.MAX_ENCODED_PAGES:
+                HomeFeed._encoded[key] = encoded
+        return encoded
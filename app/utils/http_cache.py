@@ -0,0 +1,68 @@
+import hashlib
+from typing import Dict, NamedTuple, Optional
+import bson
+from fastapi import Request, Response
+from app.config import settings
+
+class CachePolicy(NamedTuple):
+    max_age: int                  # Seconds a browser or CDN may reuse the response without asking
+    stale_while_revalidate: int   # Further seconds it may serve the stale copy while refetching
+
+# Public read endpoints by route template. Anything not listed gets no caching headers.
+POLICIES: Dict[str, CachePolicy] = {
+    "/listings/": CachePolicy(30, 60),
+    "/listings/recent": CachePolicy(30, 120),
+    "/listings/search": CachePolicy(15, 60),
+    "/listings/{listing_id}": CachePolicy(10, 60),
+    "/reviews/listing/{listing_id}": CachePolicy(60, 300),
+}
+
+class HttpCache:
+    """
+    Cache-Control policies and weak ETags for anonymous read endpoints.
+    Anonymous responses are public so a CDN can share them; signed-in users
+    get `private, no-cache` so they always revalidate and see their own
+    writes, which costs them a 304 rather than a full body.
+    """
+
+    @staticmethod
+    def policy_for(route_path: Optional[str]) -> Optional[CachePolicy]:
+        if not settings.http_cache or route_path is None:
+            return None
+        return POLICIES.get(route_path)
+
+    @staticmethod
+    def cache_control(policy: CachePolicy, authenticated: bool) -> str:
+        if authenticated:
+            return "private, no-cache"
+        return f"public, max-age={policy.max_age}, stale-while-revalidate={policy.stale_while_revalidate}"
+
+    @staticmethod
+    def weak_etag(content: bytes) -> str:
+        return f'W/"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+    @staticmethod
+    def document_etag(*documents: Optional[dict]) -> str:
+        """ETag over the stored documents a response is built from, computed before building it"""
+        return HttpCache.weak_etag(b"".join(bson.encode(document or {}) for document in documents))
+
+    @staticmethod
+    def matches(if_none_match: Optional[str], etag: str) -> bool:
+        """If-None-Match uses weak comparison, so W/ prefixes are ignored"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+    @staticmethod
+    def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+        """
+        Returns a 304 when the client already has `etag`, so the handler can skip
+        building the body. Otherwise tags `response` with it and returns None.
+        """
+        if HttpCache.matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return None
@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo.errors import DuplicateKeyError
+from app.database import db
+from app.config import settings
+
+class IdempotencyGuard:
+    """Replays stored responses for retried requests that carry an Idempotency-Key header"""
+
+    MAX_KEY_LENGTH = 255
+
+    @staticmethod
+    async def ensure_indexes():
+        """Create the TTL index that expires old idempotency keys"""
+        await db.idempotency_keys.create_index(
+            "created_at",
+            expireAfterSeconds=settings.idempotency_key_ttl_seconds
+        )
+
+    @staticmethod
+    async def run(
+        key: Optional[str],
+        user_id: str,
+        scope: str,
+        handler: Callable[[], Awaitable[dict]],
+        body: Optional[dict] = None
+    ):
+        """
+        Execute handler at most once per (user, key).
+        The first request claims the key with a single insert; duplicates cost one point read.
+        `body` is fingerprinted so a reused key with a different payload is rejected.
+        The claim's IDEMPOTENCY_LOCK_SECONDS lease is renewed while the handler runs. A claim
+        is never taken over, even once its lease lapses: the holder may have moved money
+        before dying, so duplicates get a 409 rather than a second execution.
+        """
+        if not key:
+            return await handler()
+
+        if len(key) > IdempotencyGuard.MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail="Idempotency-Key is too long")
+
+        doc_id = f"{user_id}:{key}"
+        fingerprint = IdempotencyGuard.fingerprint(body)
+        now = datetime.now(timezone.utc)
+        locked_until = now + timedelta(seconds=settings.idempotency_lock_seconds)
+
+        try:
+            # The unique _id makes this insert the lock for concurrent duplicates
+            await db.idempotency_keys.insert_one({
+                "_id": doc_id,
+                "scope": scope,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "locked_until": locked_until,
+                "created_at": now
+            })
+        except DuplicateKeyError:
+            return await IdempotencyGuard._replay(doc_id, scope, fingerprint)
+
+        heartbeat = asyncio.create_task(IdempotencyGuard._heartbeat(doc_id))
+        try:
+            result = await handler()
+        except HTTPException as e:
+            heartbeat.cancel()
+            if e.status_code < 500:
+                # Client errors are deterministic, so retries get the same answer
+                if not await IdempotencyGuard._complete(doc_id, e.status_code, {"detail": e.detail}):
+                    await IdempotencyGuard._release(doc_id)
+            else:
+                await IdempotencyGuard._release(doc_id)
+            raise
+        except BaseException:
+            heartbeat.cancel()
+            # Unexpected failures and cancellations (client disconnects) release the key so the client can retry
+            await IdempotencyGuard._release(doc_id)
+            raise
+
+        heartbeat.cancel()
+        # If this fails the key stays in progress: retries get a 409 instead of moving money again
+        await IdempotencyGuard._complete(doc_id, 200, jsonable_encoder(result))
+        return result
+
+    @staticmethod
+    async def _heartbeat(doc_id: str):
+        """Renew the claim's lease until cancelled, so a slow handler never looks abandoned"""
+        interval = settings.idempotency_lock_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await db.idempotency_keys.update_one(
+                    {"_id": doc_id, "status": "in_progress"},
+                    {"$set": {"locked_until": datetime.now(timezone.utc) + timedelta(seconds=settings.idempotency_lock_seconds)}}
+                )
+            except Exception as e:
+                print(f"⚠️ Could not renew idempotency lease for {doc_id}: {e}")
+
+    @staticmethod
+    def fingerprint(body: Optional[dict]) -> Optional[str]:
+        if body is None:
+            return None
+        return hashlib.sha256(json.dumps(jsonable_encoder(body), sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    async def _release(doc_id: str):
+        # Shielded so a cancelled request still gets its delete out; the lease covers a failed one
+        try:
+            await asyncio.shield(db.idempotency_keys.delete_one({"_id": doc_id, "status": "in_progress"}))
+        except BaseException as e:
+            print(f"⚠️ Could not release idempotency key {doc_id}; it frees up when its lease expires: {e!r}")
+
+    @staticmethod
+    async def _complete(doc_id: str, status_code: int, response: dict) -> bool:
+        """Store the response for replays; False if it couldn't be stored"""
+        try:
+            await db.idempotency_keys.update_one(
+                {"_id": doc_id},
+                {"$set": {
+                    "status": "completed",
+                    "status_code": status_code,
+                    "response": response,
+                    "completed_at": datetime.now(timezone.utc)
+                }}
+            )
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not store the response for idempotency key {doc_id}; it stays in progress: {e}")
+            return False
+
+    @staticmethod
+    async def _replay(doc_id: str, scope: str, fingerprint: Optional[str]) -> JSONResponse:
+        existing = await db.idempotency_keys.find_one({"_id": doc_id})
+
+        if existing and (existing.get("scope") != scope or existing.get("fingerprint") != fingerprint):
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+
+        if not existing:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+
+        if existing.get("status") == "in_progress":
+            locked_until = existing.get("locked_until")
+            if locked_until and locked_until.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
+                # The holder stopped renewing its lease; whether it finished is unknown
+                raise HTTPException(
+                    status_code=409,
+                    detail="The outcome of the request with this Idempotency-Key is unknown; check your history before retrying with a new key"
+                )
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+
+        return JSONResponse(
+            status_code=existing["status_code"],
+            content=existing["response"],
+            headers={"Idempotent-Replayed": "true"}
+        )
@@ -0,0 +1,134 @@
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Set
+from app.database import db
+
+class JobRun:
+    """Counters collected while a single background job run is in progress"""
+
+    def __init__(self, job_name: str):
+        self.job_name = job_name
+        self.started_at = datetime.now(timezone.utc)
+        self.rows_scanned = 0
+        self.rows_written = 0
+        self.errors = 0
+        self.error_messages: List[str] = []
+        self.values: Dict[str, float] = {}
+        self.sensitive: Set[str] = set()
+
+    def scanned(self, count: int = 1):
+        self.rows_scanned += count
+
+    def written(self, count: int = 1):
+        self.rows_written += count
+
+    def error(self, exc: Exception):
+        self.errors += 1
+        # Keep the persisted document small even if every row fails
+        if len(self.error_messages) < 20:
+            self.error_messages.append(str(exc))
+
+    def set_value(self, key: str, value: float, sensitive: bool = False):
+        """Publish a job-specific numeric result (e.g. a summary total); sensitive ones need METRICS_TOKEN to scrape"""
+        self.values[key] = float(value)
+        if sensitive:
+            self.sensitive.add(key)
+
+class JobMetrics:
+    """Metrics sink for scheduled jobs, exposed on /metrics and persisted to job_runs"""
+
+    # job name -> aggregated state for the Prometheus endpoint
+    _jobs: Dict[str, dict] = {}
+
+    @staticmethod
+    @asynccontextmanager
+    async def track(job_name: str):
+        """Record duration, row counts and errors for one run of a job"""
+        run = JobRun(job_name)
+        start = time.perf_counter()
+        try:
+            yield run
+        except Exception as e:
+            run.error(e)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            JobMetrics._record(run, duration)
+            await JobMetrics._persist(run, duration)
+
+    @staticmethod
+    def _record(run: JobRun, duration: float):
+        state = JobMetrics._jobs.setdefault(run.job_name, {
+            "runs_total": 0,
+            "errors_total": 0,
+            "last_success": None,
+            "values": {},
+            "sensitive": set()
+        })
+        state["runs_total"] += 1
+        state["errors_total"] += run.errors
+        state["last_duration_seconds"] = duration
+        state["last_rows_scanned"] = run.rows_scanned
+        state["last_rows_written"] = run.rows_written
+        state["last_errors"] = run.errors
+        state["values"].update(run.values)
+        state["sensitive"].update(run.sensitive)
+        if run.errors == 0:
+            state["last_success"] = datetime.now(timezone.utc)
+
+    @staticmethod
+    async def _persist(run: JobRun, duration: float):
+        try:
+            await db.job_runs.insert_one({
+                "job": run.job_name,
+                "started_at": run.started_at,
+                "finished_at": datetime.now(timezone.utc),
+                "duration_seconds": duration,
+                "rows_scanned": run.rows_scanned,
+                "rows_written": run.rows_written,
+                "errors": run.errors,
+                "error_messages": run.error_messages,
+                "success": run.errors == 0,
+                "values": run.values
+            })
+        except Exception as e:
+            # A metrics outage must never fail the job itself
+            print(f"⚠️ Failed to persist job run for {run.job_name}: {e}")
+
+    @staticmethod
+    def render_prometheus(include_sensitive: bool = False) -> str:
+        """Render job metrics in the Prometheus text exposition format"""
+        gauges = [
+            ("brokebuy_job_runs_total", "counter", "Total runs of the job", "runs_total"),
+            ("brokebuy_job_errors_total", "counter", "Total errors raised by the job", "errors_total"),
+            ("brokebuy_job_last_duration_seconds", "gauge", "Duration of the last run", "last_duration_seconds"),
+            ("brokebuy_job_last_rows_scanned", "gauge", "Rows scanned by the last run", "last_rows_scanned"),
+            ("brokebuy_job_last_rows_written", "gauge", "Rows written by the last run", "last_rows_written"),
+            ("brokebuy_job_last_errors", "gauge", "Errors in the last run", "last_errors"),
+        ]
+
+        lines = []
+        for metric, metric_type, help_text, key in gauges:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for job_name, state in JobMetrics._jobs.items():
+                lines.append(f'{metric}{{job="{job_name}"}} {state.get(key, 0)}')
+
+        lines.append("# HELP brokebuy_job_last_success_timestamp_seconds Unix time of the last run without errors")
+        lines.append("# TYPE brokebuy_job_last_success_timestamp_seconds gauge")
+        for job_name, state in JobMetrics._jobs.items():
+            if state["last_success"]:
+                lines.append(
+                    f'brokebuy_job_last_success_timestamp_seconds{{job="{job_name}"}} {state["last_success"].timestamp()}'
+                )
+
+        lines.append("# HELP brokebuy_job_value Job-specific values published by the last run")
+        lines.append("# TYPE brokebuy_job_value gauge")
+        for job_name, state in JobMetrics._jobs.items():
+            for key, value in state["values"].items():
+                if key in state["sensitive"] and not include_sensitive:
+                    continue
+                lines.append(f'brokebuy_job_value{{job="{job_name}",key="{key}"}} {value}')
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,196 @@
+import asyncio
+import os
+import random
+import secrets
+import socket
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.database import db
+
+JobHandler = Callable[[dict, dict], Awaitable[None]]
+
+class JobQueue:
+    """
+    Durable job queue on MongoDB for side effects that don't need to block a request.
+
+    Delivery is at-least-once: a claimed job is hidden for JOB_VISIBILITY_TIMEOUT
+    seconds and handed to another consumer if it isn't completed in time, so
+    handlers must be idempotent. Failed jobs are retried with exponential
+    backoff up to max_attempts, then kept with status "failed". Each lane has
+    its own concurrency limit, so a backlog of low-priority work can't hold
+    up high-priority jobs.
+    """
+
+    BACKOFF_BASE_SECONDS = 2.0
+    BACKOFF_MAX_SECONDS = 600.0
+    DONE_RETENTION = timedelta(days=7)
+
+    _handlers: Dict[str, dict] = {}
+    _tasks = []
+
+    @staticmethod
+    def lanes() -> Dict[str, int]:
+        """Lane -> concurrent jobs per consumer"""
+        return {
+            "high": settings.job_lane_high_concurrency,
+            "default": settings.job_lane_default_concurrency,
+            "low": settings.job_lane_low_concurrency
+        }
+
+    @staticmethod
+    async def ensure_indexes():
+        await db.jobs.create_index([("lane", 1), ("status", 1), ("run_at", 1)])
+        await db.jobs.create_index([("lane", 1), ("status", 1), ("locked_until", 1)])
+        # Only set while a job is pending, so the same work can't be queued twice
+        await db.jobs.create_index("dedupe_key", unique=True, sparse=True)
+        await db.jobs.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    def handler(job_type: str, lane: str = "default", max_attempts: int = 5):
+        """Register an async handler(payload, job) for a job type"""
+        def register(func: JobHandler) -> JobHandler:
+            JobQueue._handlers[job_type] = {"func": func, "lane": lane, "max_attempts": max_attempts}
+            return func
+        return register
+
+    @staticmethod
+    async def enqueue(job_type: str, payload: dict, delay_seconds: float = 0,
+                      dedupe_key: Optional[str] = None, lane: Optional[str] = None) -> Optional[str]:
+        """
+        Persist a job for a consumer to run. Call it from route handlers in place of the inline side effect.
+        Returns the job id, or None if a job with the same dedupe_key is already pending.
+        """
+        config = JobQueue._handlers.get(job_type, {})
+        now = datetime.now(timezone.utc)
+        doc = {
+            "type": job_type,
+            "payload": payload,
+            "lane": lane or config.get("lane", "default"),
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": config.get("max_attempts", 5),
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "locked_until": None,
+            "locked_by": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        if dedupe_key:
+            doc["dedupe_key"] = dedupe_key
+        try:
+            result = await db.jobs.insert_one(doc)
+        except DuplicateKeyError:
+            return None
+        return str(result.inserted_id)
+
+    @staticmethod
+    async def claim(lane: str, consumer_id: str) -> Optional[dict]:
+        """Take the next due job in a lane, including jobs whose previous consumer timed out"""
+        now = datetime.now(timezone.utc)
+        return await db.jobs.find_one_and_update(
+            {
+                "lane": lane,
+                "$or": [
+                    {"status": "queued", "run_at": {"$lte": now}},
+                    {"status": "running", "locked_until": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_by": consumer_id,
+                    "locked_until": now + timedelta(seconds=settings.job_visibility_timeout),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    async def _complete(job: dict, consumer_id: str):
+        now = datetime.now(timezone.utc)
+        await db.jobs.update_one(
+            {"_id": job["_id"], "locked_by": consumer_id},
+            {
+                "$set": {"status": "done", "finished_at": now, "updated_at": now, "expires_at": now + JobQueue.DONE_RETENTION},
+                "$unset": {"dedupe_key": 1, "locked_until": 1}
+            }
+        )
+
+    @staticmethod
+    async def _fail(job: dict, consumer_id: str, error: str):
+        now = datetime.now(timezone.utc)
+        if job["attempts"] >= job["max_attempts"]:
+            update = {
+                "$set": {"status": "failed", "last_error": error, "finished_at": now, "updated_at": now},
+                "$unset": {"dedupe_key": 1, "locked_until": 1}
+            }
+        else:
+            backoff = min(JobQueue.BACKOFF_MAX_SECONDS, JobQueue.BACKOFF_BASE_SECONDS * 2 ** (job["attempts"] - 1))
+            update = {"$set": {
+                "status": "queued",
+                "last_error": error,
+                "run_at": now + timedelta(seconds=backoff * random.uniform(0.8, 1.2)),
+                "locked_until": None,
+                "updated_at": now
+            }}
+        # A job another consumer has taken over after a timeout belongs to that consumer now
+        await db.jobs.update_one({"_id": job["_id"], "locked_by": consumer_id}, update)
+
+    @staticmethod
+    async def run_job(job: dict, consumer_id: str):
+        config = JobQueue._handlers.get(job["type"])
+        if config is None:
+            await JobQueue._fail(job, consumer_id, f"No handler registered for {job['type']}")
+            return
+        try:
+            await config["func"](job["payload"], job)
+        except Exception as e:
+            print(f"⚠️ Job {job['type']} ({job['_id']}) failed on attempt {job['attempts']}: {e}")
+            traceback.print_exc()
+            await JobQueue._fail(job, consumer_id, str(e))
+            return
+        await JobQueue._complete(job, consumer_id)
+
+    @staticmethod
+    async def _consume_lane(lane: str, concurrency: int, consumer_id: str):
+        slots = asyncio.Semaphore(concurrency)
+        running = set()
+        while True:
+            await slots.acquire()
+            try:
+                job = await JobQueue.claim(lane, consumer_id)
+            except Exception as e:
+                print(f"⚠️ Failed to claim a {lane} job: {e}")
+                job = None
+            if job is None:
+                slots.release()
+                await asyncio.sleep(settings.job_poll_interval_seconds)
+                continue
+
+            task = asyncio.get_running_loop().create_task(JobQueue.run_job(job, consumer_id))
+            running.add(task)
+            task.add_done_callback(lambda t: (running.discard(t), slots.release()))
+
+    @staticmethod
+    def start_consumers(consumer_id: Optional[str] = None) -> str:
+        """Start one polling loop per lane in the running event loop"""
+        consumer_id = consumer_id or f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        loop = asyncio.get_running_loop()
+        for lane, concurrency in JobQueue.lanes().items():
+            JobQueue._tasks.append(loop.create_task(JobQueue._consume_lane(lane, concurrency, consumer_id)))
+        return consumer_id
+
+    @staticmethod
+    async def stop_consumers():
+        """Stop polling; jobs cut off mid-run are redelivered after the visibility timeout"""
+        for task in JobQueue._tasks:
+            task.cancel()
+        await asyncio.gather(*JobQueue._tasks, return_exceptions=True)
+        JobQueue._tasks.clear()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import secrets
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pymongo.errors import DuplicateKeyError
+from app.database import db
+
+class LeaderLease:
+    """
+    Leader election through a lease document in MongoDB. The holder renews
+    the lease on a heartbeat; if it dies, another node takes over once the
+    lease expires. A node only considers itself leader while its last
+    successful renewal is still within the lease, so a stalled node steps
+    down before anyone else can take over.
+    """
+
+    def __init__(self, name: str, lease_seconds: float = 30, heartbeat_seconds: float = 10):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._valid_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+
+    async def try_acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if we already hold it"""
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        was_leader = self.is_leader
+        try:
+            # Matches only a lease we hold or one that has expired; upserting over anyone else's raises DuplicateKeyError
+            await db.leader_leases.update_one(
+                {"_id": self.name, "$or": [{"holder": self.node_id}, {"expires_at": {"$lt": now}}]},
+                {"$set": {
+                    "holder": self.node_id,
+                    "expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "renewed_at": now
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            self._valid_until = 0.0
+            if was_leader:
+                print(f"⚠️ Lost the {self.name} lease")
+            return False
+
+        # Measured from before the write, so our view never outlives the stored lease
+        self._valid_until = started + self.lease_seconds
+        if not was_leader:
+            print(f"👑 {self.node_id} is now the {self.name} leader")
+        return True
+
+    async def _heartbeat(self):
+        while True:
+            try:
+                await self.try_acquire()
+            except Exception as e:
+                print(f"⚠️ {self.name} lease heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+
+    async def stop(self):
+        """Stop renewing and hand the lease back so another node takes over right away"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.is_leader:
+            self._valid_until = 0.0
+            await db.leader_leases.delete_one({"_id": self.name, "holder": self.node_id})
+
+def leader_only(lease: LeaderLease, job):
+    """Wrap a scheduled job so it only runs on the node holding the lease"""
+    async def run():
+        if not lease.is_leader:
+            return
+        await job()
+    run.__name__ = getattr(job, "__name__", "job")
+    return run
@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.database import db
+
+# Without JWT_SECRET_KEY (dev only; prod requires it) credential keys are salted per
+# process instead, so they are never a plain hash of the password. Sessions are then
+# only shared within one worker.
+_PROCESS_SALT = secrets.token_bytes(32)
+
+class LoginCoalescer:
+    """
+    Single-flight SRM logins with a shared cache of validated SRM sessions.
+
+    Concurrent logins for the same credentials share one scraper call: inside a
+    worker they await the same future, across workers they wait on a lease
+    document in MongoDB and pick up the session the lease holder caches.
+    """
+
+    FAILURE_TTL_SECONDS = 10   # Invalid credentials are remembered briefly to absorb retries
+    LEASE_SECONDS = 30         # Longest a worker may hold the login for an account
+    POLL_INTERVAL_SECONDS = 0.1
+
+    _inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    async def ensure_indexes():
+        """TTL indexes so cached sessions and abandoned leases clean themselves up"""
+        await db.srm_session_cache.create_index("expires_at", expireAfterSeconds=0)
+        await db.srm_session_cache.create_index("account")
+        await db.login_leases.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    def credential_key(account: str, password: str) -> str:
+        """Keyed hash of the credentials, so a session is only reused for the same password"""
+        secret = settings.jwt_secret_key.encode() if settings.jwt_secret_key else _PROCESS_SALT
+        return hmac.new(secret, f"{account}\x00{password}".encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    async def invalidate_account(account: str):
+        """Drop every cached SRM session for an account (e.g. on logout)"""
+        await db.srm_session_cache.delete_many({"account": account})
+
+    @staticmethod
+    async def get_session(account: str, key: str, authenticate: Callable[[], Awaitable[str]]) -> str:
+        """Return a validated SRM token for these credentials, calling authenticate at most once per burst"""
+        inflight = LoginCoalescer._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        LoginCoalescer._inflight[key] = future
+        try:
+            token = await LoginCoalescer._get_shared_session(account, key, authenticate)
+            future.set_result(token)
+            return token
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no other request was waiting on it
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                # The leading request was cancelled (client disconnect, timeout); don't leave waiters hanging
+                future.set_exception(HTTPException(status_code=503, detail="Login was interrupted, please try again."))
+                future.exception()
+            del LoginCoalescer._inflight[key]
+
+    @staticmethod
+    async def _read_cache(key: str) -> Optional[str]:
+        cached = await db.srm_session_cache.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+        )
+        if not cached:
+            return None
+        if cached.get("error"):
+            raise HTTPException(status_code=cached["error"]["status_code"], detail=cached["error"]["detail"])
+        return cached["token"]
+
+    @staticmethod
+    async def _acquire_lease(key: str) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            # Takes over a lease that has expired; inserting over a live lease raises DuplicateKeyError
+            await db.login_leases.update_one(
+                {"_id": key, "expires_at": {"$lt": now}},
+                {"$set": {"expires_at": now + timedelta(seconds=LoginCoalescer.LEASE_SECONDS)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    @staticmethod
+    async def _get_shared_session(account: str, key: str, authenticate: Callable[[], Awaitable[str]]) -> str:
+        token = await LoginCoalescer._read_cache(key)
+        if token:
+            return token
+
+        deadline = time.monotonic() + LoginCoalescer.LEASE_SECONDS
+        while not await LoginCoalescer._acquire_lease(key):
+            # Another worker is logging this account in; wait for the session it caches
+            await asyncio.sleep(LoginCoalescer.POLL_INTERVAL_SECONDS)
+            token = await LoginCoalescer._read_cache(key)
+            if token:
+                return token
+            if time.monotonic() > deadline:
+                raise HTTPException(status_code=503, detail="Login is taking too long, please try again.")
+
+        try:
+            try:
+                token = await authenticate()
+            except HTTPException as e:
+                if e.status_code == 401:
+                    await LoginCoalescer._store(account, key, {
+                        "error": {"status_code": e.status_code, "detail": e.detail}
+                    }, timedelta(seconds=LoginCoalescer.FAILURE_TTL_SECONDS))
+                raise
+
+            await LoginCoalescer._store(account, key, {"token": token}, timedelta(minutes=settings.srm_session_ttl_minutes))
+            return token
+        finally:
+            await db.login_leases.delete_one({"_id": key})
+
+    @staticmethod
+    async def _store(account: str, key: str, fields: dict, ttl: timedelta):
+        now = datetime.now(timezone.utc)
+        await db.srm_session_cache.replace_one(
+            {"_id": key},
+            {"account": account, "created_at": now, "expires_at": now + ttl, **fields},
+            upsert=True
+        )
@@ -0,0 +1,184 @@
+import hashlib
+import re
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from app.database import db
+
+class MinHashSignature:
+    """
+    MinHash signature of a text's character shingles, built with one-permutation
+    hashing: each shingle is hashed once and lands in one of NUM_HASHES bins, so
+    a signature costs O(shingles) instead of O(shingles * NUM_HASHES).
+    """
+
+    NUM_HASHES = 64
+    BANDS = 16              # 16 bands of 4 rows: pairs above ~0.5 similarity usually share a band
+    ROWS = NUM_HASHES // BANDS
+    SHINGLE_SIZE = 5
+    EMPTY = 0xFFFFFFFF
+
+    _normalize = re.compile(r'[^a-z0-9]+')
+
+    def __init__(self, values: array):
+        self.values = values
+
+    @staticmethod
+    def shingles(text: str) -> set:
+        text = MinHashSignature._normalize.sub(' ', text.lower()).strip()
+        size = MinHashSignature.SHINGLE_SIZE
+        if len(text) <= size:
+            return {text} if text else set()
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    @classmethod
+    def from_text(cls, text: str) -> Optional["MinHashSignature"]:
+        shingles = cls.shingles(text)
+        if not shingles:
+            return None
+
+        bins = array('I', [cls.EMPTY]) * cls.NUM_HASHES
+        for shingle in shingles:
+            h = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+            slot = h >> 58  # Top 6 bits pick the bin
+            value = h & 0xFFFFFFFF
+            if value < bins[slot]:
+                bins[slot] = value
+
+        # Densify: an empty bin borrows the next filled bin's value so short texts still compare
+        for slot in range(cls.NUM_HASHES):
+            if bins[slot] == cls.EMPTY:
+                for offset in range(1, cls.NUM_HASHES):
+                    donor = bins[(slot + offset) % cls.NUM_HASHES]
+                    if donor != cls.EMPTY:
+                        bins[slot] = donor
+                        break
+        return cls(bins)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "MinHashSignature":
+        values = array('I')
+        values.frombytes(data)
+        return cls(values)
+
+    def to_bytes(self) -> bytes:
+        return self.values.tobytes()
+
+    def band_keys(self) -> List[str]:
+        """One key per band; texts sharing any key are candidate near-duplicates"""
+        keys = []
+        for band in range(self.BANDS):
+            rows = self.values[band * self.ROWS:(band + 1) * self.ROWS].tobytes()
+            keys.append(f"{band:x}:{hashlib.blake2b(rows, digest_size=6).hexdigest()}")
+        return keys
+
+    def similarity(self, other: "MinHashSignature") -> float:
+        """Estimated Jaccard similarity of the two shingle sets"""
+        return sum(a == b for a, b in zip(self.values, other.values)) / self.NUM_HASHES
+
+class NearDuplicateDetector:
+    """
+    LSH index of recent listings and messages in MongoDB. A lookup only fetches
+    items sharing a band key with the new text (an indexed multikey query), so
+    the cost per new item doesn't grow with the number of stored items.
+    """
+
+    SIMILARITY_THRESHOLD = 0.7
+    LISTING_WINDOW = timedelta(days=7)
+    MESSAGE_WINDOW = timedelta(hours=1)
+    MESSAGE_MIN_LENGTH = 40        # Short messages ("Is this available?") are legitimately repeated
+    MESSAGE_REPEAT_LIMIT = 3       # Same message to this many other receivers counts as a blast
+    MAX_CANDIDATES = 50
+
+    @staticmethod
+    async def ensure_indexes():
+        await db.similarity_index.create_index([("kind", 1), ("bands", 1)])
+        # Per-user lookups, so one user's items aren't crowded out of MAX_CANDIDATES by everyone else's
+        await db.similarity_index.create_index([("kind", 1), ("user_id", 1), ("bands", 1)])
+        await db.similarity_index.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    async def _find_similar(kind: str, signature: MinHashSignature, extra_query: Optional[dict] = None) -> List[dict]:
+        query = {
+            "kind": kind,
+            "bands": {"$in": signature.band_keys()},
+            "expires_at": {"$gt": datetime.now(timezone.utc)},
+            **(extra_query or {})
+        }
+        candidates = await db.similarity_index.find(
+            query, {"item_id": 1, "user_id": 1, "peer_id": 1, "signature": 1}
+        ).limit(NearDuplicateDetector.MAX_CANDIDATES).to_list(None)
+
+        return [
+            candidate for candidate in candidates
+            if signature.similarity(MinHashSignature.from_bytes(candidate["signature"])) >= NearDuplicateDetector.SIMILARITY_THRESHOLD
+        ]
+
+    @staticmethod
+    async def _record(kind: str, item_id: ObjectId, user_id: str, signature: MinHashSignature,
+                      window: timedelta, peer_id: Optional[str] = None):
+        now = datetime.now(timezone.utc)
+        await db.similarity_index.insert_one({
+            "kind": kind,
+            "item_id": item_id,
+            "user_id": user_id,
+            "peer_id": peer_id,
+            "bands": signature.band_keys(),
+            "signature": signature.to_bytes(),
+            "created_at": now,
+            "expires_at": now + window
+        })
+
+    @staticmethod
+    async def check_listing(user_id: str, title: str, description: str) -> Tuple[bool, str, Optional[MinHashSignature], Optional[str]]:
+        """
+        Check a new listing against recent ones.
+        Returns (is_rejected, reason, signature, near_duplicate_of). Reposts by the same
+        seller are rejected; a match from another seller is only reported for review.
+        """
+        signature = MinHashSignature.from_text(f"{title}\n{description}")
+        if signature is None:
+            return False, "", None, None
+
+        # The seller's own listings first: a popular item can share bands with far more than MAX_CANDIDATES others
+        own_matches = await NearDuplicateDetector._find_similar("listing", signature, {"user_id": user_id})
+        if own_matches:
+            return True, "You already posted a very similar listing recently.", signature, str(own_matches[0]["item_id"])
+
+        matches = await NearDuplicateDetector._find_similar("listing", signature, {"user_id": {"$ne": user_id}})
+        near_duplicate_of = str(matches[0]["item_id"]) if matches else None
+        return False, "", signature, near_duplicate_of
+
+    @staticmethod
+    async def record_listing(listing_id: ObjectId, user_id: str, signature: Optional[MinHashSignature]):
+        if signature is not None:
+            await NearDuplicateDetector._record("listing", listing_id, user_id, signature, NearDuplicateDetector.LISTING_WINDOW)
+
+    @staticmethod
+    async def check_message(user_id: str, receiver_id: str, message: str) -> Tuple[bool, str, Optional[MinHashSignature]]:
+        """
+        Check whether a sender is blasting the same message to many receivers.
+        Returns (is_rejected, reason, signature).
+        """
+        if len(message.strip()) < NearDuplicateDetector.MESSAGE_MIN_LENGTH:
+            return False, "", None
+
+        signature = MinHashSignature.from_text(message)
+        if signature is None:
+            return False, "", None
+
+        # Messages to this receiver don't count, so they mustn't use up MAX_CANDIDATES either
+        matches = await NearDuplicateDetector._find_similar("message", signature, {"user_id": user_id, "peer_id": {"$ne": receiver_id}})
+        other_receivers = {match["peer_id"] for match in matches}
+        if len(other_receivers) >= NearDuplicateDetector.MESSAGE_REPEAT_LIMIT:
+            return True, "You've sent this message to too many people recently.", signature
+
+        return False, "", signature
+
+    @staticmethod
+    async def record_message(message_id: ObjectId, user_id: str, receiver_id: str, signature: Optional[MinHashSignature]):
+        if signature is not None:
+            await NearDuplicateDetector._record(
+                "message", message_id, user_id, signature, NearDuplicateDetector.MESSAGE_WINDOW, peer_id=receiver_id
+            )
@@ -0,0 +1,193 @@
+import asyncio
+import contextvars
+import json
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from pymongo import monitoring
+from app.config import settings
+
+# Commands that are cursor/session bookkeeping rather than queries of their own
+IGNORED_COMMANDS = {"getMore", "killCursors", "endSessions", "hello", "isMaster", "ismaster", "ping", "buildInfo"}
+
+# Where each command keeps the filter or pipeline that defines its shape
+SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+    "insert": (),
+}
+
+# Keys the driver adds to every command; they can't be sent back inside an explain
+DRIVER_FIELDS = {"lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern"}
+
+def _shape(value):
+    """Replace literal values with their type so identical queries with different arguments compare equal"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shape(value[0]), "..."] if value else []
+    return f"<{type(value).__name__}>"
+
+def query_shape(command_name: str, command: dict) -> str:
+    fields = {name: command[name] for name in SHAPE_FIELDS.get(command_name, ()) if name in command}
+    if command_name == "update":
+        fields = {"q": [update.get("q") for update in fields.get("updates", [])[:1]]}
+    elif command_name == "delete":
+        fields = {"q": [delete.get("q") for delete in fields.get("deletes", [])[:1]]}
+    return f"{command_name} {command.get(command_name)} {json.dumps(_shape(fields), default=str)}"
+
+def summarize_plan(explain: dict) -> str:
+    """Collapse an explain() winning plan into e.g. 'FETCH > IXSCAN {"posted_by": 1}'"""
+    plan = explain.get("queryPlanner", {}).get("winningPlan")
+    if plan is None:
+        # Aggregations nest the planner output under their first stage
+        for stage in explain.get("stages", []):
+            plan = stage.get("$cursor", {}).get("queryPlanner", {}).get("winningPlan")
+            if plan:
+                break
+    stages = []
+    while plan:
+        plan = plan.get("queryPlan", plan)
+        label = plan.get("stage", "?")
+        if "keyPattern" in plan:
+            label += f" {json.dumps(plan['keyPattern'], default=str)}"
+        stages.append(label)
+        plan = plan.get("inputStage")
+    return " > ".join(stages) or "unknown"
+
+class QueryProfile:
+    """Commands issued by one request, grouped by query shape"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.total_commands = 0
+        self.total_time = 0.0
+        self.shapes: Dict[str, dict] = {}
+        self._started: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        shape = query_shape(event.command_name, event.command)
+        with self._lock:
+            self._started[event.request_id] = (shape, event.database_name, event.command_name, event.command)
+
+    def finished(self, event):
+        with self._lock:
+            started = self._started.pop(event.request_id, None)
+            if started is None:
+                return
+            shape, database_name, command_name, command = started
+            duration = event.duration_micros / 1e6
+            entry = self.shapes.setdefault(shape, {
+                "count": 0, "time": 0.0, "max_time": 0.0,
+                "database": database_name, "command_name": command_name, "command": command
+            })
+            entry["count"] += 1
+            entry["time"] += duration
+            entry["max_time"] = max(entry["max_time"], duration)
+            self.total_commands += 1
+            self.total_time += duration
+
+current_profile: contextvars.ContextVar[Optional[QueryProfile]] = contextvars.ContextVar("current_profile", default=None)
+
+class QueryProfilerListener(monitoring.CommandListener):
+    """pymongo command listener feeding the profile of the current request"""
+
+    def started(self, event):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.started(event)
+
+    def succeeded(self, event):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.finished(event)
+
+    def failed(self, event):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.finished(event)
+
+class QueryProfiler:
+    """
+    Development/staging profiler: flags query shapes repeated within one request
+    (N+1 patterns) and slow shapes, whose plans are captured once with explain().
+    """
+
+
+    _reports = deque(maxlen=200)
+    _report_hooks: List[Callable[[dict], None]] = []
+    # query shape -> winning plan summary
+    _explains: Dict[str, str] = {}
+
+    @staticmethod
+    def add_report_hook(hook: Callable[[dict], None]):
+        QueryProfiler._report_hooks.append(hook)
+
+    @staticmethod
+    def remove_report_hook(hook: Callable[[dict], None]):
+        QueryProfiler._report_hooks.remove(hook)
+
+    @staticmethod
+    def recent_reports() -> List[dict]:
+        return list(QueryProfiler._reports)
+
+    @staticmethod
+    def finish(profile: QueryProfile) -> dict:
+        """Build the report for a finished request, log it if anything stands out and explain slow shapes"""
+        n_plus_one = []
+        slow = []
+        for shape, entry in profile.shapes.items():
+            if entry["count"] >= settings.query_profiler_n_plus_one:
+                n_plus_one.append({"shape": shape, "count": entry["count"], "time_ms": round(entry["time"] * 1000, 1)})
+            if entry["max_time"] * 1000 >= settings.query_profiler_slow_ms:
+                slow.append({
+                    "shape": shape,
+                    "max_time_ms": round(entry["max_time"] * 1000, 1),
+                    "plan": QueryProfiler._explains.get(shape)
+                })
+                if shape not in QueryProfiler._explains:
+                    QueryProfiler._explains[shape] = "pending"
+                    # A fresh context keeps the explain itself out of this and the next request's counts
+                    contextvars.Context().run(asyncio.get_running_loop().create_task, QueryProfiler._explain(shape, entry))
+
+        report = {
+            "event": "query_profile",
+            "method": profile.method,
+            "route": profile.route,
+            "path": profile.path,
+            "queries": profile.total_commands,
+            "db_time_ms": round(profile.total_time * 1000, 1),
+            "shapes": len(profile.shapes),
+            "n_plus_one": n_plus_one,
+            "slow": slow
+        }
+        QueryProfiler._reports.append(report)
+        for hook in QueryProfiler._report_hooks:
+            hook(report)
+
+        if n_plus_one or slow:
+            print(json.dumps({"level": "warning", **report}))
+        return report
+
+    @staticmethod
+    async def _explain(shape: str, entry: dict):
+        # Imported here: app.database registers this module's listener at import time
+        from app.database import client
+
+        command = {key: value for key, value in entry["command"].items() if key not in DRIVER_FIELDS}
+        try:
+            explain = await client[entry["database"]].command({"explain": command, "verbosity": "queryPlanner"})
+            QueryProfiler._explains[shape] = summarize_plan(explain)
+            print(json.dumps({"level": "info", "event": "slow_query_plan", "shape": shape, "plan": QueryProfiler._explains[shape]}))
+        except Exception as e:
+            QueryProfiler._explains[shape] = f"explain failed: {e}"
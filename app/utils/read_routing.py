@@ -0,0 +1,101 @@
+import contextvars
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+from pymongo import monitoring
+from pymongo.read_preferences import SecondaryPreferred
+from app.config import settings
+
+# The user whose request is running, set by get_current_user. Motor copies the
+# context into its executor threads, so the write listener sees it too.
+current_user_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_user_id", default=None)
+
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+class ReadRouting:
+    """
+    Sends designated read-only queries to secondaries when the deployment is a
+    replica set. Replica reads can lag the primary by up to REPLICA_MAX_STALENESS_SECONDS,
+    so a user who wrote within that window reads through a causally consistent
+    session that waits for their own write to be replicated.
+
+    Write times are remembered in this process only, so a user whose next
+    read lands on another worker can miss their write. READ_REPLICAS is off
+    by default; turn it on only with a single worker or sticky sessions.
+    """
+
+    MAX_TRACKED_WRITERS = 50_000
+
+    _last_writes: Dict[str, Tuple[float, object, object]] = {}   # user id -> (monotonic time, operationTime, $clusterTime)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def replica(collection_name: str):
+        """Collection handle that prefers secondaries no staler than REPLICA_MAX_STALENESS_SECONDS"""
+        from app.database import db
+        if not settings.read_replicas:
+            return db[collection_name]
+        return db.get_collection(
+            collection_name,
+            read_preference=SecondaryPreferred(max_staleness=settings.replica_max_staleness_seconds)
+        )
+
+    @staticmethod
+    def record_write(user_id: str, operation_time, cluster_time):
+        now = time.monotonic()
+        with ReadRouting._lock:
+            if len(ReadRouting._last_writes) >= ReadRouting.MAX_TRACKED_WRITERS:
+                cutoff = now - settings.replica_max_staleness_seconds
+                ReadRouting._last_writes = {
+                    uid: entry for uid, entry in ReadRouting._last_writes.items() if entry[0] >= cutoff
+                }
+            ReadRouting._last_writes[user_id] = (now, operation_time, cluster_time)
+
+    @staticmethod
+    def recent_write(user_id: Optional[str]) -> Optional[Tuple[float, object, object]]:
+        """The user's last write, if a replica might not have it yet"""
+        if not user_id:
+            return None
+        entry = ReadRouting._last_writes.get(user_id)
+        if entry is None or time.monotonic() - entry[0] > settings.replica_max_staleness_seconds:
+            return None
+        return entry
+
+    @staticmethod
+    @asynccontextmanager
+    async def session(user_id: Optional[str]):
+        """
+        Yields a causal session for a reader with a recent write, or None.
+        Pass it as `session=` to every read made through replica().
+        """
+        entry = ReadRouting.recent_write(user_id) if settings.read_replicas else None
+        if entry is None:
+            yield None
+            return
+
+        from app.database import client
+        _, operation_time, cluster_time = entry
+        async with await client.start_session(causal_consistency=True) as session:
+            if cluster_time:
+                session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+            yield session
+
+class WriteTimeListener(monitoring.CommandListener):
+    """Remembers the operation time of each user's latest write for read-your-writes"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name not in WRITE_COMMANDS:
+            return
+        user_id = current_user_id.get()
+        # Only replica sets report operationTime
+        operation_time = event.reply.get("operationTime")
+        if user_id and operation_time is not None:
+            ReadRouting.record_write(user_id, operation_time, event.reply.get("$clusterTime"))
+
+    def failed(self, event):
+        pass
@@ -0,0 +1,65 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from bson import ObjectId
+from fastapi import HTTPException
+from app.database import db
+from app.config import settings
+
+class RefreshTokenStore:
+    """Rotating refresh tokens stored (hashed) in a TTL-indexed collection"""
+
+    @staticmethod
+    async def ensure_indexes():
+        await db.refresh_tokens.create_index("expires_at", expireAfterSeconds=0)
+        await db.refresh_tokens.create_index("family_id")
+        await db.refresh_tokens.create_index("user_id")
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    async def issue(user_id: str, family_id: Optional[str] = None) -> str:
+        """Create a refresh token; rotations keep the family of the token they replace"""
+        token = secrets.token_urlsafe(48)
+        now = datetime.now(timezone.utc)
+        await db.refresh_tokens.insert_one({
+            "_id": RefreshTokenStore._hash(token),
+            "user_id": ObjectId(user_id),
+            "family_id": family_id or secrets.token_hex(16),
+            "used_at": None,
+            "created_at": now,
+            "expires_at": now + timedelta(days=settings.refresh_token_expire_days)
+        })
+        return token
+
+    @staticmethod
+    async def rotate(token: str) -> Tuple[str, str]:
+        """
+        Redeem a refresh token exactly once.
+        Returns (user_id, new_refresh_token); reusing a redeemed token revokes its whole family.
+        """
+        token_hash = RefreshTokenStore._hash(token)
+        now = datetime.now(timezone.utc)
+
+        doc = await db.refresh_tokens.find_one_and_update(
+            {"_id": token_hash, "used_at": None, "expires_at": {"$gt": now}},
+            {"$set": {"used_at": now}}
+        )
+        if not doc:
+            stale = await db.refresh_tokens.find_one({"_id": token_hash})
+            if stale and stale.get("used_at"):
+                # A redeemed token came back: assume it was stolen and end the session family
+                await db.refresh_tokens.delete_many({"family_id": stale["family_id"]})
+            raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+        user_id = str(doc["user_id"])
+        new_token = await RefreshTokenStore.issue(user_id, doc["family_id"])
+        return user_id, new_token
+
+    @staticmethod
+    async def revoke_user(user_id: str):
+        """Revoke every refresh token of a user (e.g. on logout)"""
+        await db.refresh_tokens.delete_many({"user_id": ObjectId(user_id)})
@@ -0,0 +1,156 @@
+import bisect
+import contextvars
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+from pymongo import monitoring
+import bson
+from app.config import settings
+
+class RequestStats:
+    """Counters collected while a single request is in progress"""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.db_commands = 0
+        self.db_time = 0.0
+        self.db_bytes = 0
+        # Motor runs commands on executor threads, possibly several at once per request
+        self._lock = threading.Lock()
+
+    def add_command(self, duration: float, reply_bytes: int):
+        with self._lock:
+            self.db_commands += 1
+            self.db_time += duration
+            self.db_bytes += reply_bytes
+
+# The stats of the request currently being served. Motor copies the context
+# into its executor threads, so the command listener sees the same object.
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+class RequestCommandListener(monitoring.CommandListener):
+    """pymongo command listener that charges each command to the current request"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        stats = current_request.get()
+        if stats is not None:
+            # Measuring the reply means encoding it again, so it's opt-in
+            reply_bytes = len(bson.encode(event.reply)) if settings.request_metrics_reply_bytes else 0
+            stats.add_command(event.duration_micros / 1e6, reply_bytes)
+
+    def failed(self, event):
+        stats = current_request.get()
+        if stats is not None:
+            stats.add_command(event.duration_micros / 1e6, 0)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+    def render(self, metric: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {self.total}')
+        lines.append(f'{metric}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{metric}_count{{{labels}}} {self.total}')
+        return lines
+
+class RequestMetrics:
+    """Per-route request latency and database usage, exposed on /metrics"""
+
+
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    COMMAND_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+    # (method, route) -> histograms and counters
+    _routes: Dict[Tuple[str, str], dict] = {}
+
+    @staticmethod
+    def record(stats: RequestStats, status_code: int, duration: float):
+        key = (stats.method, stats.route)
+        state = RequestMetrics._routes.get(key)
+        if state is None:
+            state = RequestMetrics._routes[key] = {
+                "duration": Histogram(RequestMetrics.LATENCY_BUCKETS),
+                "db_time": Histogram(RequestMetrics.LATENCY_BUCKETS),
+                "db_commands": Histogram(RequestMetrics.COMMAND_BUCKETS),
+                "db_bytes_total": 0,
+                "errors_total": 0
+            }
+        state["duration"].observe(duration)
+        state["db_time"].observe(stats.db_time)
+        state["db_commands"].observe(stats.db_commands)
+        state["db_bytes_total"] += stats.db_bytes
+        if status_code >= 500:
+            state["errors_total"] += 1
+
+        if duration * 1000 > settings.slow_request_ms:
+            print(json.dumps({
+                "level": "warning",
+                "event": "slow_request",
+                "method": stats.method,
+                "route": stats.route,
+                "path": stats.path,
+                "status": status_code,
+                "duration_ms": round(duration * 1000, 1),
+                "budget_ms": settings.slow_request_ms,
+                "db_commands": stats.db_commands,
+                "db_time_ms": round(stats.db_time * 1000, 1),
+                "db_bytes": stats.db_bytes
+            }))
+
+    @staticmethod
+    def server_timing(stats: RequestStats, duration: float) -> str:
+        """Server-Timing header value for browser devtools"""
+        return (
+            f'app;dur={duration * 1000:.1f}, '
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_commands} commands, {stats.db_bytes} bytes"'
+        )
+
+    @staticmethod
+    def render_prometheus() -> str:
+        """Render request metrics in the Prometheus text exposition format"""
+        histograms = [
+            ("brokebuy_http_request_duration_seconds", "Request wall time", "duration"),
+            ("brokebuy_http_request_db_seconds", "Time spent in MongoDB commands per request", "db_time"),
+            ("brokebuy_http_request_db_commands", "MongoDB commands issued per request", "db_commands"),
+        ]
+        counters = [
+            ("brokebuy_http_request_db_bytes_total", "Bytes returned by MongoDB (0 unless REQUEST_METRICS_REPLY_BYTES)", "db_bytes_total"),
+            ("brokebuy_http_request_errors_total", "Requests answered with a 5xx status", "errors_total"),
+        ]
+
+        lines = []
+        for metric, help_text, key in histograms:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (method, route), state in RequestMetrics._routes.items():
+                lines.extend(state[key].render(metric, f'method="{method}",route="{route}"'))
+
+        for metric, help_text, key in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (method, route), state in RequestMetrics._routes.items():
+                lines.append(f'{metric}{{method="{method}",route="{route}"}} {state[key]}')
+
+        return "\n".join(lines) + "\n"
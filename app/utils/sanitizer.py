@@ -1,10 +1,11 @@
 import re
 import html
-from typing import Optional
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
 
 class InputSanitizer:
     """Utility class for sanitizing user inputs"""
-    
+
     # Common spam patterns
     SPAM_PATTERNS = [
         r'https?://[^\s]+',  # URLs
@@ -13,105 +14,124 @@ class InputSanitizer:
         r'\b\d{10,}\b',      # Phone numbers (10+ digits)
         r'[^\w\s.,!?\-]',    # Special characters except basic punctuation
     ]
-    
+
+    # All spam patterns as one alternation, so text is redacted in a single pass.
+    # Alternatives keep the order above, so a URL wins over its own special characters.
+    SPAM_REGEX = re.compile('|'.join(f'(?:{pattern})' for pattern in SPAM_PATTERNS), re.IGNORECASE)
+
+    # Common spam keywords, matched anywhere in the lowercased text
+    SPAM_KEYWORDS = [
+        'click here', 'buy now', 'free money', 'earn money',
+        'work from home', 'make money', 'get rich', 'investment',
+        'loan', 'credit', 'debt', 'insurance', 'casino', 'gambling'
+    ]
+    SPAM_KEYWORD_REGEX = re.compile('|'.join(re.escape(keyword) for keyword in SPAM_KEYWORDS))
+
+    # If any word makes up more than this share of a text (over 10 words), it's likely spam
+    MAX_WORD_SHARE = 0.3
+
     # Allowed characters for names (letters, spaces, hyphens, apostrophes)
     NAME_PATTERN = re.compile(r'^[a-zA-Z\s\-\'\.]+$')
-    
+    NAME_STRIP_REGEX = re.compile(r'[^a-zA-Z\s\-\'\.]')
+
     # Allowed characters for bio/description (letters, numbers, spaces, basic punctuation)
     BIO_PATTERN = re.compile(r'^[a-zA-Z0-9\s.,!?\-\(\)]+$')
-    
+    BIO_STRIP_REGEX = re.compile(r'[^a-zA-Z0-9\s.,!?\-\(\)]')
+
     @staticmethod
     def sanitize_name(name: str) -> str:
         """Sanitize user name input"""
         if not name:
             return ""
-        
+
         # Remove extra whitespace
         name = ' '.join(name.split())
-        
+
         # Check if name contains only allowed characters
         if not InputSanitizer.NAME_PATTERN.match(name):
             # Remove invalid characters
-            name = re.sub(r'[^a-zA-Z\s\-\'\.]', '', name)
-        
+            name = InputSanitizer.NAME_STRIP_REGEX.sub('', name)
+
         # Limit length
         name = name[:50]
-        
+
         return name.strip()
-    
+
     @staticmethod
     def sanitize_bio(bio: str) -> str:
         """Sanitize user bio/description input"""
         if not bio:
             return ""
-        
+
         # Remove extra whitespace
         bio = ' '.join(bio.split())
-        
-        # Check for spam patterns
-        for pattern in InputSanitizer.SPAM_PATTERNS:
-            bio = re.sub(pattern, '[REDACTED]', bio, flags=re.IGNORECASE)
-        
+
+        # Redact spam patterns
+        bio = InputSanitizer.SPAM_REGEX.sub('[REDACTED]', bio)
+
         # Check if bio contains only allowed characters
         if not InputSanitizer.BIO_PATTERN.match(bio):
             # Remove invalid characters but keep basic punctuation
-            bio = re.sub(r'[^a-zA-Z0-9\s.,!?\-\(\)]', '', bio)
-        
+            bio = InputSanitizer.BIO_STRIP_REGEX.sub('', bio)
+
         # Limit length
         bio = bio[:500]
-        
+
         return bio.strip()
-    
+
     @staticmethod
     def sanitize_text(text: str, max_length: int = 1000) -> str:
         """General text sanitization"""
         if not text:
             return ""
-        
+
         # HTML escape
         text = html.escape(text)
-        
+
         # Remove extra whitespace
         text = ' '.join(text.split())
-        
-        # Check for spam patterns
-        for pattern in InputSanitizer.SPAM_PATTERNS:
-            text = re.sub(pattern, '[REDACTED]', text, flags=re.IGNORECASE)
-        
+
+        # Redact spam patterns
+        text = InputSanitizer.SPAM_REGEX.sub('[REDACTED]', text)
+
         # Limit length
         text = text[:max_length]
-        
+
         return text.strip()
-    
+
+    @staticmethod
+    def sanitize_fields(fields: Dict[str, Tuple[Optional[str], int]]) -> Dict[str, Optional[str]]:
+        """
+        Sanitize several fields at once: {name: (text, max_length)} -> {name: sanitized}.
+        Missing (None or empty) values come back as None.
+        """
+        return {
+            name: InputSanitizer.sanitize_text(text, max_length=max_length) if text else None
+            for name, (text, max_length) in fields.items()
+        }
+
     @staticmethod
     def is_spam(text: str) -> bool:
         """Check if text contains spam patterns"""
         if not text:
             return False
-        
+
         text_lower = text.lower()
-        
+
         # Check for common spam keywords
-        spam_keywords = [
-            'click here', 'buy now', 'free money', 'earn money',
-            'work from home', 'make money', 'get rich', 'investment',
-            'loan', 'credit', 'debt', 'insurance', 'casino', 'gambling'
-        ]
-        
-        for keyword in spam_keywords:
-            if keyword in text_lower:
-                return True
-        
+        if InputSanitizer.SPAM_KEYWORD_REGEX.search(text_lower):
+            return True
+
         # Check for excessive repetition
-        words = text.split()
+        words = text_lower.split()
         if len(words) > 10:
-            word_counts = {}
-            for word in words:
-                word_counts[word.lower()] = word_counts.get(word.lower(), 0) + 1
-            
-            # If any word appears more than 30% of the time, it's likely spam
-            max_repetition = max(word_counts.values()) if word_counts else 0
-            if max_repetition > len(words) * 0.3:
+            [(_, max_repetition)] = Counter(words).most_common(1)
+            if max_repetition > len(words) * InputSanitizer.MAX_WORD_SHARE:
                 return True
-        
+
         return False
+
+    @staticmethod
+    def any_spam(texts: Iterable[Optional[str]]) -> bool:
+        """True if any of the texts looks like spam"""
+        return any(InputSanitizer.is_spam(text) for text in texts)
@@ -0,0 +1,122 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.config import settings
+
+class SearchFacets:
+    """
+    Totals and facet counts for listing search. Counting stops at
+    SEARCH_EXACT_COUNT_LIMIT, above which the total is reported as
+    approximate, and results are cached per filter for
+    SEARCH_FACET_CACHE_SECONDS so paging through a search doesn't recount.
+    """
+
+    MAX_CACHED_QUERIES = 1000
+
+    _cache: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+
+    @staticmethod
+    async def ensure_indexes():
+        """Serves the is_sold filter with newest-first sorting (search, /listings/ and the home feed)"""
+        from app.database import db
+        await db.listings.create_index([("is_sold", 1), ("created_at", -1)])
+
+    @staticmethod
+    def _cached(key: str):
+        entry = SearchFacets._cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        SearchFacets._cache.move_to_end(key)
+        return entry[1]
+
+    @staticmethod
+    def _store(key: str, value):
+        SearchFacets._cache[key] = (time.monotonic() + settings.search_facet_cache_seconds, value)
+        SearchFacets._cache.move_to_end(key)
+        while len(SearchFacets._cache) > SearchFacets.MAX_CACHED_QUERIES:
+            SearchFacets._cache.popitem(last=False)
+
+    @staticmethod
+    def _key(kind: str, match: dict) -> str:
+        return kind + json.dumps(match, sort_keys=True, default=str)
+
+    @staticmethod
+    def price_boundaries() -> list:
+        return [float(edge) for edge in settings.search_price_buckets.split(",")] + [float("inf")]
+
+    @staticmethod
+    async def total(collection, match: dict, session=None) -> Tuple[int, bool]:
+        """(total, is_approximate): exact up to SEARCH_EXACT_COUNT_LIMIT, capped above it"""
+        key = SearchFacets._key("total", match)
+        cached = SearchFacets._cached(key)
+        if cached is None:
+            # The limit lets the server stop counting early on broad searches
+            count = await collection.count_documents(match, limit=settings.search_exact_count_limit + 1, session=session)
+            cached = SearchFacets._capped(count)
+            SearchFacets._store(key, cached)
+        return cached
+
+    @staticmethod
+    def _capped(count: int) -> Tuple[int, bool]:
+        if count > settings.search_exact_count_limit:
+            return settings.search_exact_count_limit, True
+        return count, False
+
+    @staticmethod
+    def pipeline(match: dict) -> list:
+        boundaries = SearchFacets.price_boundaries()
+        return [
+            {"$match": match},
+            {"$facet": {
+                "categories": [
+                    {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                    {"$limit": settings.search_facet_max_categories}
+                ],
+                "conditions": [
+                    {"$group": {"_id": "$condition", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}}
+                ],
+                "prices": [
+                    {"$bucket": {"groupBy": "$price", "boundaries": boundaries, "default": "other", "output": {"count": {"$sum": 1}}}}
+                ],
+                "total": [
+                    {"$limit": settings.search_exact_count_limit + 1},
+                    {"$count": "count"}
+                ]
+            }}
+        ]
+
+    @staticmethod
+    async def facets(collection, match: dict, session=None) -> dict:
+        """Category, condition and price-bucket counts plus the total, from one $facet aggregation"""
+        key = SearchFacets._key("facets", match)
+        cached = SearchFacets._cached(key)
+        if cached is not None:
+            return cached
+
+        rows = await collection.aggregate(SearchFacets.pipeline(match), session=session).to_list(1)
+        row = rows[0] if rows else {}
+        boundaries = SearchFacets.price_boundaries()
+        bucket_counts = {bucket["_id"]: bucket["count"] for bucket in row.get("prices", [])}
+        total, approximate = SearchFacets._capped((row.get("total") or [{}])[0].get("count", 0))
+
+        facets = {
+            "categories": [{"value": c["_id"], "count": c["count"]} for c in row.get("categories", []) if c["_id"]],
+            "conditions": [{"value": c["_id"], "count": c["count"]} for c in row.get("conditions", []) if c["_id"]],
+            "price_buckets": [
+                {
+                    "min": low,
+                    "max": None if high == float("inf") else high,
+                    "count": bucket_counts.get(low, 0)
+                }
+                for low, high in zip(boundaries, boundaries[1:])
+            ],
+            "total": total,
+            "total_is_approximate": approximate
+        }
+        SearchFacets._store(key, facets)
+        # The facet total doubles as the page total for the same filters
+        SearchFacets._store(SearchFacets._key("total", match), (total, approximate))
+        return facets
@@ -1,11 +1,20 @@
-import random
+import base64
 import hashlib
+import hmac
+import json
+import random
+import secrets
 import time
-from typing import Dict, Tuple
+from typing import Optional, Tuple
+from app.config import settings
+
+# Signs challenge tokens when neither CHALLENGE_SECRET_KEY nor JWT_SECRET_KEY is set.
+# Tokens then only verify in the worker that issued them, but can't be forged.
+_PROCESS_SECRET = secrets.token_bytes(32)
 
 class SecurityChallenge:
     """Simple security challenge system as an alternative to ReCAPTCHA"""
-    
+
     # Simple math problems for challenge
     MATH_PROBLEMS = [
         ("What is 2 + 3?", "5"),
@@ -19,7 +28,7 @@ class SecurityChallenge:
         ("What is 6 + 9?", "15"),
         ("What is 18 - 5?", "13")
     ]
-    
+
     # Simple word problems
     WORD_PROBLEMS = [
         ("What color is the sky?", "blue"),
@@ -28,36 +37,68 @@ class SecurityChallenge:
         ("What comes after Monday?", "tuesday"),
         ("How many wheels does a car have?", "4")
     ]
-    
+
+    ALL_PROBLEMS = MATH_PROBLEMS + WORD_PROBLEMS
+
+    @staticmethod
+    def _secret() -> bytes:
+        secret = settings.challenge_secret_key or settings.jwt_secret_key
+        return secret.encode() if secret else _PROCESS_SECRET
+
+    @staticmethod
+    def _sign(payload: bytes) -> str:
+        digest = hmac.new(SecurityChallenge._secret(), payload, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
     @staticmethod
     def generate_challenge() -> Tuple[str, str]:
-        """Generate a random challenge and return (question, answer_hash)"""
-        
+        """
+        Generate a random challenge and return (question, session_token).
+        The token is HMAC-signed and carries everything needed to verify the answer,
+        so no server-side session has to be stored.
+        """
+
         # Randomly choose between math and word problems
+        math_count = len(SecurityChallenge.MATH_PROBLEMS)
         if random.choice([True, False]):
-            question, answer = random.choice(SecurityChallenge.MATH_PROBLEMS)
+            index = random.randrange(math_count)
         else:
-            question, answer = random.choice(SecurityChallenge.WORD_PROBLEMS)
-        
-        # Create a hash of the answer for verification
-        answer_hash = hashlib.sha256(answer.lower().strip().encode()).hexdigest()
-        
-        return question, answer_hash
-    
-    @staticmethod
-    def verify_challenge(user_answer: str, answer_hash: str) -> bool:
-        """Verify if the user's answer matches the expected answer"""
-        
-        if not user_answer or not answer_hash:
-            return False
-        
-        # Hash the user's answer and compare
-        user_hash = hashlib.sha256(user_answer.lower().strip().encode()).hexdigest()
-        return user_hash == answer_hash
-    
+            index = math_count + random.randrange(len(SecurityChallenge.WORD_PROBLEMS))
+        question, _ = SecurityChallenge.ALL_PROBLEMS[index]
+
+        # Reference the question by index so the answer never leaves the server
+        claims = {
+            "q": index,
+            "exp": int(time.time()) + settings.challenge_ttl_seconds,
+            "nonce": secrets.token_urlsafe(12)
+        }
+        payload = base64.urlsafe_b64encode(json.dumps(claims, separators=(",", ":")).encode()).rstrip(b"=")
+
+        return question, f"{payload.decode()}.{SecurityChallenge._sign(payload)}"
+
     @staticmethod
-    def generate_session_token() -> str:
-        """Generate a unique session token for the challenge"""
-        timestamp = str(int(time.time()))
-        random_str = str(random.randint(1000, 9999))
-        return hashlib.sha256(f"{timestamp}{random_str}".encode()).hexdigest()[:16]
+    def verify_challenge(session_token: str, user_answer: str) -> Tuple[bool, str, Optional[dict]]:
+        """
+        Verify a signed challenge token and the user's answer without any lookup.
+        Returns (is_valid, error_message, claims)
+        """
+
+        if not session_token or not user_answer:
+            return False, "Invalid or expired challenge session", None
+
+        try:
+            payload, signature = session_token.split(".", 1)
+            if not hmac.compare_digest(signature, SecurityChallenge._sign(payload.encode())):
+                return False, "Invalid or expired challenge session", None
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+            _, answer = SecurityChallenge.ALL_PROBLEMS[claims["q"]]
+        except (ValueError, KeyError, IndexError, TypeError):
+            return False, "Invalid or expired challenge session", None
+
+        if time.time() > claims["exp"]:
+            return False, "Challenge session expired", None
+
+        if user_answer.lower().strip() != answer:
+            return False, "Incorrect challenge answer", None
+
+        return True, "", claims
@@ -0,0 +1,148 @@
+import asyncio
+import importlib.util
+import random
+import time
+from typing import TYPE_CHECKING, Optional
+from fastapi import HTTPException
+from app.config import settings
+
+# httpx is imported when the pool opens, keeping it off the app's import path
+if TYPE_CHECKING:
+    import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class CircuitBreaker:
+    """Stops calling the scraper after repeated failures, then lets one trial request through"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_owner: Optional[asyncio.Task] = None   # The half-open trial request, while it runs
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.trial_owner is not None:
+            # Everyone else fails fast while the single trial is in flight
+            return False
+        self.trial_owner = asyncio.current_task()
+        return True
+
+    def end_trial(self):
+        """Release the trial slot if the current task holds it (e.g. it was cancelled mid-request)"""
+        if self.trial_owner is not None and self.trial_owner is asyncio.current_task():
+            self.trial_owner = None
+
+    def record_success(self):
+        self.trial_owner = None
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.trial_owner = None
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            # Also re-opens after a failed half-open trial
+            self.opened_at = time.monotonic()
+
+class SRMClient:
+    """App-lifetime, connection-pooled HTTP client for the SRM scraper service"""
+
+    RETRY_STATUS_CODES = {502, 503, 504}
+    # Safe to resend after the request may have reached the scraper
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+    def __init__(self):
+        self.timeout = settings.srm_timeout_seconds
+        self.connect_timeout = settings.srm_connect_timeout_seconds
+        self.max_connections = settings.srm_max_connections
+        self.max_keepalive = settings.srm_max_keepalive_connections
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.srm_breaker_failures,
+            reset_timeout=settings.srm_breaker_reset_seconds
+        )
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    async def start(self):
+        """Open the shared connection pool (at app startup, or on the first SRM call in scripts)"""
+        if self._client is not None:
+            return
+        import httpx
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=30.0
+            ),
+            http2=HTTP2_AVAILABLE
+        )
+
+    async def close(self):
+        """Close the pool (called on app shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        if not self.breaker.allow_request():
+            raise HTTPException(status_code=503, detail="SRM authentication service is temporarily unavailable.")
+
+        try:
+            return await self._send(method, url, **kwargs)
+        finally:
+            self.breaker.end_trial()
+
+    async def _send(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        if self._client is None:
+            await self.start()
+        import httpx
+
+        # A non-idempotent request (POST /login) is only retried when it never left this process
+        idempotent = method in self.IDEMPOTENT_METHODS
+        for attempt in range(settings.srm_max_retries + 1):
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                self.breaker.record_failure()
+                if attempt >= settings.srm_max_retries or not self.breaker.allow_request():
+                    raise HTTPException(status_code=503, detail="SRM authentication service is unreachable.")
+            except (httpx.ReadTimeout, httpx.RemoteProtocolError):
+                self.breaker.record_failure()
+                if not idempotent or attempt >= settings.srm_max_retries or not self.breaker.allow_request():
+                    raise HTTPException(status_code=503, detail="SRM authentication service is unreachable.")
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if not idempotent or attempt >= settings.srm_max_retries or not self.breaker.allow_request():
+                    return response
+
+            # Exponential backoff with full jitter so retry storms don't line up
+            await asyncio.sleep(random.uniform(0, settings.srm_retry_backoff_seconds * (2 ** attempt)))
+
+    async def login(self, payload: dict) -> "httpx.Response":
+        return await self._request("POST", f"{settings.srm_scraper_url}/login", json=payload)
+
+    async def get_profile(self, token: str) -> "httpx.Response":
+        return await self._request("GET", f"{settings.srm_scraper_url}/profile", headers={"X-CSRF-Token": token})
+
+    async def logout(self, token: str) -> "httpx.Response":
+        return await self._request("DELETE", settings.srm_logout_url, headers={"X-CSRF-Token": token})
+
+srm_client = SRMClient()
+
+__all__ = ["srm_client", "SRMClient"]
@@ -0,0 +1,41 @@
+import time
+
+# Taken before anything else is imported, so the import phase is fully timed
+_started = time.perf_counter()
+
+class StartupProfile:
+    """
+    Times a cold start: app module imports, then each startup step. Imported
+    first thing in app.main and kept free of app imports, so the clock starts
+    before any heavy import.
+    """
+
+    _started = _started
+    _last = _started
+    phases: dict = {}
+
+    @staticmethod
+    def mark(phase: str):
+        """Close the current phase under the given name"""
+        now = time.perf_counter()
+        StartupProfile.phases[phase] = now - StartupProfile._last
+        StartupProfile._last = now
+
+    @staticmethod
+    def total_ms() -> float:
+        return (StartupProfile._last - StartupProfile._started) * 1000
+
+    @staticmethod
+    def report():
+        import json
+        from app.config import settings
+
+        total_ms = StartupProfile.total_ms()
+        print(json.dumps({
+            "event": "cold_start",
+            "total_ms": round(total_ms, 1),
+            "target_ms": settings.cold_start_target_ms,
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in StartupProfile.phases.items()}
+        }))
+        if total_ms > settings.cold_start_target_ms:
+            print(f"⚠️ Cold start took {total_ms:.0f} ms, over the {settings.cold_start_target_ms:.0f} ms target")
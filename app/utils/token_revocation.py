@@ -0,0 +1,63 @@
+import hashlib
+from datetime import datetime, timezone
+from app.database import db
+
+class BloomFilter:
+    """Fixed-size bloom filter over a bytearray using double hashing"""
+
+    def __init__(self, size_bits: int = 1 << 20, hash_count: int = 7):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self.bits = bytearray(size_bits // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class TokenRevocation:
+    """
+    Revoked access tokens (by jti). Every request checks the in-memory bloom filter;
+    only a filter hit (a revoked token or a rare false positive) is confirmed in MongoDB.
+    The filter is rebuilt periodically from revoked_tokens to pick up other workers' revocations.
+    """
+
+    _filter = BloomFilter()
+
+    @staticmethod
+    async def ensure_indexes():
+        await db.revoked_tokens.create_index("expires_at", expireAfterSeconds=0)
+
+    @staticmethod
+    async def revoke(jti: str, expires_at: datetime):
+        """Revoke an access token until it would have expired anyway"""
+        TokenRevocation._filter.add(jti)
+        await db.revoked_tokens.update_one(
+            {"_id": jti},
+            {"$set": {"expires_at": expires_at, "revoked_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    @staticmethod
+    async def is_revoked(jti: str) -> bool:
+        if jti not in TokenRevocation._filter:
+            return False
+        return await db.revoked_tokens.find_one({"_id": jti}, {"_id": 1}) is not None
+
+    @staticmethod
+    async def sync():
+        """Rebuild the filter from unexpired revocations (drops expired ones as a side effect)"""
+        rebuilt = BloomFilter(TokenRevocation._filter.size_bits, TokenRevocation._filter.hash_count)
+        cursor = db.revoked_tokens.find({"expires_at": {"$gt": datetime.now(timezone.utc)}}, {"_id": 1})
+        async for doc in cursor:
+            rebuilt.add(doc["_id"])
+        TokenRevocation._filter = rebuilt
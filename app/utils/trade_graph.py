@@ -0,0 +1,163 @@
+import heapq
+from collections import defaultdict, deque
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from app.database import db
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+class TradeGraph:
+    """
+    Rolling in-memory multigraph of recent sales (seller -> buyer edges).
+    Loaded once at startup, updated on every sale in this process and
+    periodically synced with sales recorded by other workers.
+    """
+
+    WINDOW_DAYS = 7
+    RAPID_WINDOW_HOURS = 24
+    RAPID_TRADE_LIMIT = 3
+    MAX_CYCLE_LENGTH = 4        # Longest buyer -> ... -> seller chain we look for
+    SYNC_OVERLAP_SECONDS = 60   # Re-read this much history on sync to catch late writes
+
+    # seller -> buyer -> sale timestamps (ms) between them
+    _out: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+    # Min-heap of (timestamp, seller, buyer, listing_id), used for expiry; late
+    # writes from other workers can arrive out of timestamp order
+    _edges: List[Tuple[int, str, str, str]] = []
+    # (listing_id, timestamp) of every sale in the graph, so syncs don't double count
+    _sale_keys: Set[Tuple[str, int]] = set()
+    _last_synced: Optional[datetime] = None
+
+    @staticmethod
+    def _to_ms(value: datetime) -> int:
+        # MongoDB keeps millisecond precision, so compare sales at that resolution
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return (value - EPOCH) // timedelta(milliseconds=1)
+
+    @staticmethod
+    def add_sale(listing_id, seller_id, buyer_id, sold_at: datetime):
+        """Record a completed sale"""
+        listing_id, seller_id, buyer_id = str(listing_id), str(seller_id), str(buyer_id)
+        ts = TradeGraph._to_ms(sold_at)
+        key = (listing_id, ts)
+        if key in TradeGraph._sale_keys:
+            return
+
+        TradeGraph._sale_keys.add(key)
+        TradeGraph._out[seller_id][buyer_id].append(ts)
+        heapq.heappush(TradeGraph._edges, (ts, seller_id, buyer_id, listing_id))
+
+    @staticmethod
+    def _expire(now_ms: int):
+        cutoff = now_ms - TradeGraph.WINDOW_DAYS * 86400 * 1000
+        edges = TradeGraph._edges
+        while edges and edges[0][0] < cutoff:
+            ts, seller_id, buyer_id, listing_id = heapq.heappop(edges)
+            TradeGraph._sale_keys.discard((listing_id, ts))
+
+            timestamps = TradeGraph._out[seller_id][buyer_id]
+            timestamps.remove(ts)
+            if not timestamps:
+                del TradeGraph._out[seller_id][buyer_id]
+                if not TradeGraph._out[seller_id]:
+                    del TradeGraph._out[seller_id]
+
+    @staticmethod
+    async def _ingest(since: datetime, until: datetime) -> int:
+        cursor = db.listings.find(
+            {"is_sold": True, "sold_at": {"$gte": since, "$lte": until}, "buyer_id": {"$ne": None}},
+            {"posted_by": 1, "buyer_id": 1, "sold_at": 1}
+        ).sort("sold_at", 1)
+
+        count = 0
+        async for listing in cursor:
+            TradeGraph.add_sale(listing["_id"], listing["posted_by"], listing["buyer_id"], listing["sold_at"])
+            count += 1
+        return count
+
+    @staticmethod
+    async def load():
+        """Build the graph from sales inside the rolling window"""
+        TradeGraph._out.clear()
+        TradeGraph._edges.clear()
+        TradeGraph._sale_keys.clear()
+
+        now = datetime.now(timezone.utc)
+        await TradeGraph._ingest(now - timedelta(days=TradeGraph.WINDOW_DAYS), now)
+        TradeGraph._last_synced = now
+        print(f"✅ Trade graph loaded with {len(TradeGraph._edges)} recent sales")
+
+    @staticmethod
+    async def sync():
+        """Pull sales recorded since the last sync (e.g. by other workers)"""
+        if TradeGraph._last_synced is None:
+            await TradeGraph.load()
+            return
+
+        now = datetime.now(timezone.utc)
+        since = TradeGraph._last_synced - timedelta(seconds=TradeGraph.SYNC_OVERLAP_SECONDS)
+        await TradeGraph._ingest(since, now)
+        TradeGraph._last_synced = now
+        TradeGraph._expire(TradeGraph._to_ms(now))
+
+    @staticmethod
+    def count_trades(seller_id: str, buyer_id: str, since_ms: int) -> int:
+        timestamps = TradeGraph._out.get(str(seller_id), {}).get(str(buyer_id), ())
+        return sum(1 for ts in timestamps if ts >= since_ms)
+
+    @staticmethod
+    def has_indirect_path(source: str, target: str, max_length: int) -> bool:
+        """Depth-bounded BFS for a path of 2..max_length sales from source to target"""
+        source, target = str(source), str(target)
+        visited = {source, target}
+        queue = deque([(source, 0)])
+
+        while queue:
+            current, depth = queue.popleft()
+            if depth >= max_length:
+                continue
+            for neighbour in TradeGraph._out.get(current, {}):
+                if neighbour == target:
+                    # A direct edge is handled by the direct-trade check
+                    if depth > 0:
+                        return True
+                    continue
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    queue.append((neighbour, depth + 1))
+
+        return False
+
+    @staticmethod
+    def check_trade(buyer_id: str, seller_id: str) -> Tuple[bool, str]:
+        """
+        Check a prospective sale (seller -> buyer) against recent trades.
+        Returns (is_circular, reason)
+        """
+        buyer_id, seller_id = str(buyer_id), str(seller_id)
+        now_ms = TradeGraph._to_ms(datetime.now(timezone.utc))
+        TradeGraph._expire(now_ms)
+
+        out = TradeGraph._out
+        buyer_sold_to_seller = seller_id in out.get(buyer_id, {})
+        seller_sold_to_buyer = buyer_id in out.get(seller_id, {})
+
+        # Direct circular trade (A sells to B, B sells to A)
+        if buyer_sold_to_seller and seller_sold_to_buyer:
+            return True, "Direct circular trade detected: both users have sold items to each other recently"
+
+        # Complex circular pattern: this sale would close buyer -> ... -> seller -> buyer
+        if TradeGraph.has_indirect_path(buyer_id, seller_id, TradeGraph.MAX_CYCLE_LENGTH):
+            return True, "Complex circular trade pattern detected"
+
+        # Rapid back-and-forth trading in the last 24 hours
+        recent_cutoff = now_ms - TradeGraph.RAPID_WINDOW_HOURS * 3600 * 1000
+        total_trades = (
+            TradeGraph.count_trades(seller_id, buyer_id, recent_cutoff)
+            + TradeGraph.count_trades(buyer_id, seller_id, recent_cutoff)
+        )
+        if total_trades > TradeGraph.RAPID_TRADE_LIMIT:
+            return True, "Rapid back-and-forth trading detected"
+
+        return False, ""
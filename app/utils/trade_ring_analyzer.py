@@ -0,0 +1,256 @@
+from array import array
+from itertools import islice
+from typing import Dict, List, Optional
+
+class TradeRingAnalyzer:
+    """
+    Array-backed analysis of the full seller -> buyer trade graph.
+    Edges are collected into flat arrays, packed into CSR form and scanned
+    with an iterative Tarjan SCC pass. SCCs over MAX_RING_SIZE are broken
+    down to the trades that sit on short cycles, then to reciprocal trades,
+    so a ring can't hide inside a large component.
+
+    Looking for 3-cycles through an edge checks at most MAX_NEIGHBOURS_SCANNED
+    neighbours, which keeps the analysis linear in the number of trades even
+    around hub accounts. A 3-cycle through two hubs can be missed that way;
+    2-cycles never are.
+    """
+
+    MIN_RING_SIZE = 2
+    MAX_RING_SIZE = 50  # Larger SCCs are split into tighter loops before scoring
+    MIN_RING_TRADES = 3
+    MAX_CYCLE_LENGTH = 3
+    MAX_CYCLES_PER_RING = 20
+    MAX_NEIGHBOURS_SCANNED = 64
+
+    def __init__(self):
+        self.user_index: Dict[str, int] = {}
+        self.user_ids: List[str] = []
+        self.src = array("l")
+        self.dst = array("l")
+        self.amount = array("d")
+        self.sold_at = array("d")
+
+    def _node(self, user_id: str) -> int:
+        index = self.user_index.get(user_id)
+        if index is None:
+            index = len(self.user_ids)
+            self.user_index[user_id] = index
+            self.user_ids.append(user_id)
+        return index
+
+    def add_trade(self, seller_id, buyer_id, amount: float, sold_at: float):
+        """Append one sale as an edge (self-trades are ignored)"""
+        seller_id, buyer_id = str(seller_id), str(buyer_id)
+        if seller_id == buyer_id:
+            return
+        self.src.append(self._node(seller_id))
+        self.dst.append(self._node(buyer_id))
+        self.amount.append(float(amount or 0.0))
+        self.sold_at.append(sold_at)
+
+    def _build_csr(self):
+        return self._csr(len(self.user_ids), self.src, self.dst)
+
+    @staticmethod
+    def _csr(n: int, src, dst):
+        """Counting-sort edges by source into offsets/targets arrays"""
+        offsets = array("l", [0]) * (n + 1)
+        for s in src:
+            offsets[s + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        cursor = array("l", offsets[:n])
+        order = array("l", [0]) * len(src)
+        for edge, s in enumerate(src):
+            order[cursor[s]] = edge
+            cursor[s] += 1
+
+        targets = array("l", (dst[edge] for edge in order))
+        return offsets, targets
+
+    @staticmethod
+    def _strongly_connected_components(n: int, offsets, targets) -> array:
+        """Iterative Tarjan; returns the component id of every node"""
+        unvisited = -1
+        index = array("l", [unvisited]) * n
+        lowlink = array("l", [0]) * n
+        on_stack = bytearray(n)
+        component = array("l", [unvisited]) * n
+        stack: List[int] = []
+        next_index = 0
+        next_component = 0
+
+        for root in range(n):
+            if index[root] != unvisited:
+                continue
+
+            # Each frame is (node, position of the next outgoing edge to visit)
+            work = [(root, offsets[root])]
+            index[root] = lowlink[root] = next_index
+            next_index += 1
+            stack.append(root)
+            on_stack[root] = 1
+
+            while work:
+                node, edge = work[-1]
+                if edge < offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    child = targets[edge]
+                    if index[child] == unvisited:
+                        index[child] = lowlink[child] = next_index
+                        next_index += 1
+                        stack.append(child)
+                        on_stack[child] = 1
+                        work.append((child, offsets[child]))
+                    elif on_stack[child] and index[child] < lowlink[node]:
+                        lowlink[node] = index[child]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = next_component
+                        if member == node:
+                            break
+                    next_component += 1
+
+        return component
+
+    def _short_cycles(self, members: List[int], adjacency: Dict[int, set]) -> List[List[str]]:
+        """Sample cycles of length 2..MAX_CYCLE_LENGTH inside one component"""
+        cycles = []
+        member_set = set(members)
+
+        for u in members:
+            for v in adjacency.get(u, ()):
+                # Report every cycle once, starting from its smallest node
+                if v <= u:
+                    continue
+                if u in adjacency.get(v, ()):
+                    cycles.append([u, v])
+                if self.MAX_CYCLE_LENGTH >= 3:
+                    for w in islice(adjacency.get(v, ()), self.MAX_NEIGHBOURS_SCANNED):
+                        if w > u and w != v and w in member_set and u in adjacency.get(w, ()):
+                            cycles.append([u, v, w])
+                if len(cycles) >= self.MAX_CYCLES_PER_RING:
+                    return [[self.user_ids[node] for node in cycle] for cycle in cycles[:self.MAX_CYCLES_PER_RING]]
+
+        return [[self.user_ids[node] for node in cycle] for cycle in cycles]
+
+    def _adjacency(self, edges: List[int]) -> Dict[int, set]:
+        adjacency: Dict[int, set] = {}
+        for edge in edges:
+            adjacency.setdefault(self.src[edge], set()).add(self.dst[edge])
+        return adjacency
+
+    def _split(self, edges: List[int], reciprocal_only: bool) -> List[List[int]]:
+        """
+        Keep the edges that lie on a 2-cycle (or, unless reciprocal_only, a
+        3-cycle) and return the edge lists of the SCCs they form.
+        """
+        adjacency = self._adjacency(edges)
+        incoming: Dict[int, set] = {}
+        for u, targets_ in adjacency.items():
+            for v in targets_:
+                incoming.setdefault(v, set()).add(u)
+
+        on_cycle: Dict[tuple, bool] = {}   # repeat trades between a pair share one check
+        kept = []
+        for edge in edges:
+            u, v = self.src[edge], self.dst[edge]
+            found = on_cycle.get((u, v))
+            if found is None:
+                found = u in adjacency.get(v, ())
+                if not found and not reciprocal_only and self.MAX_CYCLE_LENGTH >= 3:
+                    # A 3-cycle u -> v -> w -> u needs w among v's buyers and u's sellers
+                    after, before = adjacency.get(v, set()), incoming.get(u, set())
+                    small, large = (after, before) if len(after) <= len(before) else (before, after)
+                    found = any(w in large for w in islice(small, self.MAX_NEIGHBOURS_SCANNED))
+                on_cycle[(u, v)] = found
+            if found:
+                kept.append(edge)
+
+        local: Dict[int, int] = {}
+        for edge in kept:
+            local.setdefault(self.src[edge], len(local))
+            local.setdefault(self.dst[edge], len(local))
+        src = array("l", (local[self.src[edge]] for edge in kept))
+        dst = array("l", (local[self.dst[edge]] for edge in kept))
+        offsets, targets = self._csr(len(local), src, dst)
+        component = self._strongly_connected_components(len(local), offsets, targets)
+
+        groups: Dict[int, List[int]] = {}
+        for edge, s, d in zip(kept, src, dst):
+            if component[s] == component[d]:
+                groups.setdefault(component[s], []).append(edge)
+        return list(groups.values())
+
+    def _ring(self, edges: List[int]) -> Optional[dict]:
+        """Score the loop formed by these edges, or None if it's too small or quiet to flag"""
+        # Every member of an SCC has an outgoing edge inside it
+        members = sorted({self.src[edge] for edge in edges})
+        if len(members) < self.MIN_RING_SIZE or len(edges) < self.MIN_RING_TRADES:
+            return None
+
+        adjacency = self._adjacency(edges)
+        distinct_edges = sum(len(targets_) for targets_ in adjacency.values())
+        reciprocated = sum(
+            1 for u, targets_ in adjacency.items() for v in targets_ if u in adjacency.get(v, ())
+        )
+        reciprocity = reciprocated / distinct_edges if distinct_edges else 0.0
+
+        # Every SCC is a closed trading loop; reciprocity and volume per member raise the score
+        score = round(reciprocity * 50 + min(len(edges) / len(members), 10) * 5, 2)
+
+        return {
+            "members": sorted(self.user_ids[node] for node in members),
+            "size": len(members),
+            "trade_count": len(edges),
+            "total_amount": sum(self.amount[edge] for edge in edges),
+            "reciprocity": round(reciprocity, 4),
+            "cycles": self._short_cycles(members, adjacency),
+            "first_trade_at": min(self.sold_at[edge] for edge in edges),
+            "last_trade_at": max(self.sold_at[edge] for edge in edges),
+            "score": score
+        }
+
+    def find_rings(self) -> List[dict]:
+        """Return flagged rings (SCCs with enough internal trading), highest score first"""
+        n = len(self.user_ids)
+        if n == 0:
+            return []
+
+        offsets, targets = self._build_csr()
+        component = self._strongly_connected_components(n, offsets, targets)
+
+        # Group internal edges per component in one pass over the edge arrays
+        edges_by_component: Dict[int, List[int]] = {}
+        for edge in range(len(self.src)):
+            c = component[self.src[edge]]
+            if c == component[self.dst[edge]]:
+                edges_by_component.setdefault(c, []).append(edge)
+
+        # Stage 0 is a whole SCC, stage 1 its short-cycle core, stage 2 its reciprocal core
+        pending = [(edges, 0) for edges in edges_by_component.values()]
+        rings = []
+        while pending:
+            edges, stage = pending.pop()
+            size = len({self.src[edge] for edge in edges})
+            if size > self.MAX_RING_SIZE and stage < 2:
+                pending.extend((part, stage + 1) for part in self._split(edges, reciprocal_only=stage == 1))
+                continue
+            ring = self._ring(edges)
+            if ring is not None:
+                rings.append(ring)
+
+        rings.sort(key=lambda ring: ring["score"], reverse=True)
+        return rings
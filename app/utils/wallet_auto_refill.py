@@ -1,15 +1,12 @@
 from datetime import datetime, timezone, timedelta
 from bson import ObjectId
 from app.database import db
+from app.config import settings
 from app.models.credit_transaction import CreditTransactionType
 from typing import Tuple
 
 class WalletAutoRefill:
-    """Handles automatic wallet refilling when balance goes below threshold"""
-    
-    REFILL_THRESHOLD = 20000.0  # Refill when balance goes below 20k
-    REFILL_AMOUNT = 50000.0     # Refill to 50k
-    MAX_DAILY_REFILLS = 3       # Maximum auto-refills per day
+    """Handles automatic wallet refilling when balance goes below REFILL_THRESHOLD"""
     
     @staticmethod
     async def check_and_refill_wallet(user_id: str) -> Tuple[bool, str, float]:
@@ -26,7 +23,7 @@ class WalletAutoRefill:
         current_balance = user.get("wallet_balance", 0.0)
         
         # Check if refill is needed
-        if current_balance >= WalletAutoRefill.REFILL_THRESHOLD:
+        if current_balance >= settings.refill_threshold:
             return False, "No refill needed", current_balance
         
         # Check daily refill limit
@@ -38,11 +35,11 @@ class WalletAutoRefill:
             "created_at": {"$gte": today}
         })
         
-        if refills_today >= WalletAutoRefill.MAX_DAILY_REFILLS:
-            return False, f"Daily auto-refill limit reached ({WalletAutoRefill.MAX_DAILY_REFILLS})", current_balance
+        if refills_today >= settings.max_daily_refills:
+            return False, f"Daily auto-refill limit reached ({settings.max_daily_refills})", current_balance
         
         # Calculate refill amount
-        refill_amount = WalletAutoRefill.REFILL_AMOUNT - current_balance
+        refill_amount = settings.refill_amount - current_balance
         
         # Perform refill
         new_balance = await WalletAutoRefill._perform_refill(user_id, refill_amount)
@@ -56,7 +53,7 @@ class WalletAutoRefill:
         # Update user balance
         await db.users.update_one(
             {"_id": ObjectId(user_id)},
-            {"$set": {"wallet_balance": WalletAutoRefill.REFILL_AMOUNT}}
+            {"$set": {"wallet_balance": settings.refill_amount}}
         )
         
         # Record in wallet history
@@ -64,7 +61,7 @@ class WalletAutoRefill:
             "user_id": ObjectId(user_id),
             "type": "credit",
             "amount": amount,
-            "ref_note": f"Auto-refill: Balance below ₹{WalletAutoRefill.REFILL_THRESHOLD:,.0f}",
+            "ref_note": f"Auto-refill: Balance below ₹{settings.refill_threshold:,.0f}",
             "timestamp": datetime.now(timezone.utc)
         })
         
@@ -73,14 +70,14 @@ class WalletAutoRefill:
             "user_id": ObjectId(user_id),
             "amount": amount,
             "transaction_type": CreditTransactionType.AUTO_REFILL.value,
-            "description": f"Auto-refill: Balance below ₹{WalletAutoRefill.REFILL_THRESHOLD:,.0f}",
+            "description": f"Auto-refill: Balance below ₹{settings.refill_threshold:,.0f}",
             "is_auto_refill": True,
             "created_at": datetime.now(timezone.utc),
-            "previous_balance": WalletAutoRefill.REFILL_AMOUNT - amount,
-            "new_balance": WalletAutoRefill.REFILL_AMOUNT
+            "previous_balance": settings.refill_amount - amount,
+            "new_balance": settings.refill_amount
         })
         
-        return WalletAutoRefill.REFILL_AMOUNT
+        return settings.refill_amount
     
     @staticmethod
     async def record_credit_transaction(
@@ -89,17 +86,26 @@ class WalletAutoRefill:
         transaction_type: CreditTransactionType,
         reference_id: str = None,
         description: str = None,
-        is_auto_refill: bool = False
+        is_auto_refill: bool = False,
+        transaction_id: ObjectId = None,
+        new_balance: float = None
     ) -> str:
-        """Record a credit transaction in the credit_transactions table"""
+        """
+        Record a credit transaction in the credit_transactions table.
+        Passing a transaction_id makes retries safe: a second insert with it raises DuplicateKeyError.
+        Pass new_balance (the balance right after the credit) when recording later than the write.
+        """
         
-        # Get current balance for logging
-        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"wallet_balance": 1})
-        previous_balance = user.get("wallet_balance", 0.0) if user else 0.0
-        new_balance = previous_balance + amount
+        if new_balance is None:
+            # Get current balance for logging
+            user = await db.users.find_one({"_id": ObjectId(user_id)}, {"wallet_balance": 1})
+            new_balance = (user.get("wallet_balance", 0.0) if user else 0.0) + amount
+        previous_balance = new_balance - amount
         
         # Insert credit transaction record
+        transaction = {"_id": transaction_id} if transaction_id else {}
         result = await db.credit_transactions.insert_one({
+            **transaction,
             "user_id": ObjectId(user_id),
             "amount": amount,
             "transaction_type": transaction_type.value,
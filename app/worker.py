@@ -0,0 +1,48 @@
+"""
+Dedicated background process for SCHEDULER_MODE=worker and
+JOB_CONSUMER_MODE=worker deployments.
+
+Runs the cluster-wide scheduled jobs (image cleanup, auto-refill, money flow
+summary, fraud ring analysis) and consumes the job queue (notifications,
+Cloudinary deletes, credit bookkeeping), so API processes only serve
+requests. Several worker replicas can run at once; the scheduler lease makes
+sure each scheduled job still runs on only one of them, and queued jobs are
+claimed by one consumer at a time.
+
+Usage: python -m app.worker
+"""
+
+import asyncio
+import signal
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from app.tasks.scheduler import add_cluster_jobs, scheduler_lease
+from app.tasks import jobs  # registers job handlers
+from app.utils.job_queue import JobQueue
+from app.config import reload_settings
+
+async def main():
+    scheduler = AsyncIOScheduler()
+    add_cluster_jobs(scheduler)
+
+    await JobQueue.ensure_indexes()
+    await scheduler_lease.try_acquire()
+    scheduler_lease.start()
+    scheduler.start()
+    consumer_id = JobQueue.start_consumers()
+    print(f"🛠️ Worker {scheduler_lease.node_id} started (job consumer {consumer_id})")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    # kill -HUP re-reads .env and the environment without a restart
+    loop.add_signal_handler(signal.SIGHUP, reload_settings)
+    await stop.wait()
+
+    scheduler.shutdown()
+    await JobQueue.stop_consumers()
+    await scheduler_lease.stop()
+    print("🛑 Worker stopped")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Cloudinary upload API for tests and load runs.
+
+Answers uploads and deletes with the same response shapes as Cloudinary,
+without storing anything. Point the backend at it with:
+
+    CLOUDINARY_CLOUD_NAME=loadtest
+    CLOUDINARY_API_KEY=stub
+    CLOUDINARY_API_SECRET=stub
+    CLOUDINARY_UPLOAD_PREFIX=http://localhost:3002
+
+Optional knobs:
+    CLOUDINARY_STUB_LATENCY_MS artificial latency per request (default 0)
+"""
+
+import argparse
+import asyncio
+import os
+import secrets
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request
+import uvicorn
+
+LATENCY_MS = float(os.getenv("CLOUDINARY_STUB_LATENCY_MS", "0"))
+
+app = FastAPI()
+
+async def _simulate_conditions():
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.post("/v1_1/{cloud_name}/image/upload")
+async def upload(cloud_name: str, request: Request):
+    await _simulate_conditions()
+    form = await request.form()
+    folder = form.get("folder")
+    public_id = f"{folder}/{secrets.token_hex(10)}" if folder else secrets.token_hex(10)
+    return {
+        "public_id": public_id,
+        "version": 1,
+        "format": "jpg",
+        "resource_type": "image",
+        "type": "upload",
+        "width": 800,
+        "height": 600,
+        "bytes": 0,
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "secure_url": f"https://res.cloudinary.com/{cloud_name}/image/upload/v1/{public_id}.jpg"
+    }
+
+@app.post("/v1_1/{cloud_name}/image/destroy")
+async def destroy(cloud_name: str):
+    await _simulate_conditions()
+    return {"result": "ok"}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Cloudinary upload API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3002)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1 @@
+"""Load-testing suite: synthetic data seeding and a scenario-driven load runner"""
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Drive realistic traffic against a running backend and report latency per endpoint.
+
+Virtual users log in through /auth/login (run srm_stub_server.py) and then
+loop over weighted scenarios: browse the feed, search, open a listing, chat,
+send a buy request that the seller accepts, and top up the wallet. Each
+endpoint gets p50/p95/p99, throughput and error counts; 429s are counted
+separately since rate limits are expected under load.
+
+Usage:
+    python -m loadtest.run --base-url http://localhost:8000 --users 50 --duration 60 \\
+        --output loadtest/results.json --baseline loadtest/baseline.json
+
+--save-baseline writes the results as the new baseline. With --baseline the
+run exits with status 1 if any endpoint's p95 regressed by more than
+--tolerance or its error rate went up.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+import httpx
+from loadtest.seed import user_email
+
+SEARCH_TERMS = ["textbook", "calculator", "cycle", "table", "notes", "bat", "fridge", "earphones"]
+CATEGORIES = ["Books", "Electronics", "Furniture", "Cycles", "Sports"]
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.rejected = 0
+        self.rate_limited = 0
+
+class Recorder:
+    """Latencies and outcomes per endpoint label"""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        stats = self.endpoints[label]
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.latencies.append(time.perf_counter() - start)
+            stats.errors += 1
+            return None
+        stats.latencies.append(time.perf_counter() - start)
+
+        if response.status_code == 429:
+            stats.rate_limited += 1
+        elif response.status_code >= 500:
+            stats.errors += 1
+        elif response.status_code >= 400:
+            stats.rejected += 1
+        return response
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class VirtualUser:
+    def __init__(self, index: int):
+        self.index = index
+        self.email = user_email(index)
+        self.user_id: Optional[str] = None
+        self.headers: Dict[str, str] = {}
+
+class LoadTest:
+    def __init__(self, base_url: str, users: int, duration: float, think_time: float, seed: int):
+        self.base_url = base_url.rstrip("/")
+        self.users = [VirtualUser(i) for i in range(users)]
+        self.duration = duration
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.recorder = Recorder()
+        self.listings: List[dict] = []
+        self.users_by_id: Dict[str, VirtualUser] = {}
+        self.scenarios = [
+            (self.browse_feed, 35),
+            (self.search, 20),
+            (self.open_listing, 25),
+            (self.chat, 10),
+            (self.buy_and_accept, 5),
+            (self.top_up, 5),
+        ]
+
+    # ---------- Setup ----------
+
+    async def login(self, client: httpx.AsyncClient, user: VirtualUser):
+        res = await self.recorder.request(
+            client, "POST /auth/login", "POST", "/auth/login",
+            json={"account": user.email, "password": "loadtest"}
+        )
+        if res is None or res.status_code != 200:
+            return
+        user.headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+        me = await self.recorder.request(client, "GET /users/me", "GET", "/users/me", headers=user.headers)
+        if me is not None and me.status_code == 200:
+            user.user_id = me.json()["id"]
+            self.users_by_id[user.user_id] = user
+
+    async def setup(self, client: httpx.AsyncClient):
+        semaphore = asyncio.Semaphore(20)
+
+        async def login_one(user):
+            async with semaphore:
+                await self.login(client, user)
+
+        await asyncio.gather(*(login_one(user) for user in self.users))
+        self.users = [user for user in self.users if user.user_id]
+        if not self.users:
+            raise SystemExit("❌ No virtual user could log in (is srm_stub_server.py running and the data seeded?)")
+
+        for page in range(1, 6):
+            res = await client.get("/listings/", params={"page": page, "limit": 100})
+            if res.status_code != 200 or not res.json():
+                break
+            self.listings.extend({"id": item["id"], "posted_by": item["posted_by"]} for item in res.json())
+        if not self.listings:
+            raise SystemExit("❌ No listings found (run python -m loadtest.seed first)")
+        print(f"🔑 {len(self.users)} virtual users logged in, {len(self.listings)} listings in the pool")
+
+    # ---------- Scenarios ----------
+
+    async def browse_feed(self, client, user):
+        await self.recorder.request(client, "GET /listings/", "GET", "/listings/", params={"page": self.rng.randint(1, 5)})
+        await self.recorder.request(client, "GET /listings/recent", "GET", "/listings/recent")
+
+    async def search(self, client, user):
+        params = {"query": self.rng.choice(SEARCH_TERMS)}
+        if self.rng.random() < 0.5:
+            params["category"] = self.rng.choice(CATEGORIES)
+        if self.rng.random() < 0.3:
+            params["max_price"] = self.rng.choice([500, 1000, 5000])
+        await self.recorder.request(client, "GET /listings/search", "GET", "/listings/search", params=params)
+
+    async def open_listing(self, client, user):
+        listing = self.rng.choice(self.listings)
+        await self.recorder.request(client, "GET /listings/{listing_id}", "GET", f"/listings/{listing['id']}")
+        await self.recorder.request(client, "GET /reviews/listing/{listing_id}", "GET", f"/reviews/listing/{listing['id']}")
+
+    async def chat(self, client, user):
+        listing = self.rng.choice(self.listings)
+        if listing["posted_by"] == user.user_id:
+            return
+        await self.recorder.request(
+            client, "POST /messages/send", "POST", "/messages/send", headers=user.headers,
+            json={"receiver_id": listing["posted_by"], "listing_id": listing["id"], "message": "Is this still available?"}
+        )
+        await self.recorder.request(
+            client, "GET /messages/chat/{listing_id}/{receiver_id}", "GET",
+            f"/messages/chat/{listing['id']}/{listing['posted_by']}", headers=user.headers
+        )
+
+    async def buy_and_accept(self, client, user):
+        # Only listings whose seller is logged in can be accepted
+        candidates = [l for l in self.listings if l["posted_by"] in self.users_by_id and l["posted_by"] != user.user_id]
+        if not candidates:
+            return
+        listing = self.rng.choice(candidates)
+        res = await self.recorder.request(
+            client, "POST /listings/{listing_id}/buy-request", "POST",
+            f"/listings/{listing['id']}/buy-request", headers=user.headers, json={"note": "Load test"}
+        )
+        if res is None or res.status_code != 200:
+            return
+        seller = self.users_by_id[listing["posted_by"]]
+        await self.recorder.request(
+            client, "POST /listings/{listing_id}/buy-requests/{request_id}/accept", "POST",
+            f"/listings/{listing['id']}/buy-requests/{res.json()['request_id']}/accept", headers=seller.headers
+        )
+        # Sold listings can't be bought again
+        self.listings = [l for l in self.listings if l["id"] != listing["id"]] or self.listings
+
+    async def top_up(self, client, user):
+        await self.recorder.request(
+            client, "POST /wallet/topup", "POST", "/wallet/topup", headers=user.headers,
+            json={"amount": 100, "ref_note": "Load test top-up"}
+        )
+
+    # ---------- Run ----------
+
+    async def virtual_user_loop(self, client: httpx.AsyncClient, user: VirtualUser, deadline: float):
+        scenarios, weights = zip(*self.scenarios)
+        while time.monotonic() < deadline:
+            scenario = self.rng.choices(scenarios, weights=weights)[0]
+            await scenario(client, user)
+            if self.think_time:
+                await asyncio.sleep(self.rng.uniform(0, self.think_time))
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=len(self.users) + 10)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=30.0, limits=limits) as client:
+            await self.setup(client)
+            # Setup traffic (logins) isn't part of the measured run
+            self.recorder = Recorder()
+
+            start = time.monotonic()
+            deadline = start + self.duration
+            await asyncio.gather(*(self.virtual_user_loop(client, user, deadline) for user in self.users))
+            elapsed = time.monotonic() - start
+
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label, stats in sorted(self.recorder.endpoints.items()):
+            latencies = sorted(stats.latencies)
+            count = len(latencies)
+            endpoints[label] = {
+                "requests": count,
+                "throughput_rps": round(count / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "mean_ms": round(sum(latencies) / count * 1000, 2) if count else 0.0,
+                "errors": stats.errors,
+                "error_rate": round(stats.errors / count, 4) if count else 0.0,
+                "rejected": stats.rejected,
+                "rate_limited": stats.rate_limited
+            }
+        total = sum(endpoint["requests"] for endpoint in endpoints.values())
+        return {
+            "users": len(self.users),
+            "duration_seconds": round(elapsed, 2),
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "endpoints": endpoints
+        }
+
+def print_report(results: dict):
+    print(f"\n📊 {results['total_requests']} requests in {results['duration_seconds']}s "
+          f"({results['throughput_rps']} req/s, {results['users']} users)\n")
+    print(f"{'endpoint':<62} {'reqs':>6} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'5xx':>5} {'4xx':>5} {'429':>5}")
+    for label, e in results["endpoints"].items():
+        print(f"{label:<62} {e['requests']:>6} {e['throughput_rps']:>7} {e['p50_ms']:>8} {e['p95_ms']:>8} "
+              f"{e['p99_ms']:>8} {e['errors']:>5} {e['rejected']:>5} {e['rate_limited']:>5}")
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for label, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["error_rate"] > previous["error_rate"] + 0.01:
+            regressions.append(f"{label}: error rate {previous['error_rate']:.2%} -> {current['error_rate']:.2%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the BrokeBuy API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="measured run length in seconds")
+    parser.add_argument("--think-time", type=float, default=0.5, help="max random pause between scenarios (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(LoadTest(args.base_url, args.users, args.duration, args.think_time, args.seed).run())
+    print_report(results)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            raise SystemExit(1)
+        print("\n✅ No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Seed a local MongoDB with synthetic data for load runs.
+
+Creates users, listings, messages, notifications and wallet history, all
+tagged with loadtest=True so they can be removed again with --reset.
+Users are named loaduser<N>@srmist.edu.in and already carry an srm_id, so
+logging in through the SRM stub skips the profile fetch.
+
+Usage: python -m loadtest.seed --users 200 --listings 2000 --messages 5000 --reset
+"""
+
+import argparse
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+COLLECTIONS = ["users", "listings", "messages", "notifications", "wallet_history"]
+CATEGORIES = ["Books", "Electronics", "Furniture", "Cycles", "Clothing", "Stationery", "Sports", "Others"]
+CONDITIONS = ["New", "Like New", "Good", "Fair"]
+LOCATIONS = ["Hostel A", "Hostel B", "Tech Park", "Main Gate", "Library", "Food Court"]
+ITEMS = [
+    ("Engineering Mathematics textbook", "Books", 150, 600),
+    ("Data Structures in C notes", "Books", 50, 250),
+    ("Scientific calculator fx-991", "Electronics", 400, 1200),
+    ("Study table with drawer", "Furniture", 800, 2500),
+    ("Hero Sprint cycle", "Cycles", 1500, 6000),
+    ("Lab coat size M", "Clothing", 100, 350),
+    ("Drafter and drawing board", "Stationery", 300, 900),
+    ("Cricket bat English willow", "Sports", 700, 3000),
+    ("Bluetooth earphones", "Electronics", 500, 2000),
+    ("Mini fridge 50L", "Electronics", 3000, 8000),
+]
+DETAILS = [
+    "barely used", "a few pencil markings", "works perfectly", "minor scratches",
+    "bought last semester", "selling because I'm graduating", "pickup only", "price slightly negotiable",
+]
+
+def user_email(index: int) -> str:
+    return f"loaduser{index}@srmist.edu.in"
+
+def _listing(rng: random.Random, owner_id: str, now: datetime) -> dict:
+    name, category, low, high = rng.choice(ITEMS)
+    created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 60))
+    is_sold = rng.random() < 0.2
+    return {
+        "title": f"{name} ({rng.choice(CONDITIONS).lower()})",
+        "description": f"{name}, {', '.join(rng.sample(DETAILS, 3))}. Located near {rng.choice(LOCATIONS)}.",
+        "price": float(rng.randrange(low, high, 10)),
+        "category": category,
+        "condition": rng.choice(CONDITIONS),
+        "location": rng.choice(LOCATIONS),
+        "images": [f"BrokeBuyListings/loadtest_{rng.randrange(10**8):08d}" for _ in range(rng.randint(1, 3))],
+        "posted_by": owner_id,
+        "is_sold": is_sold,
+        "is_available": not is_sold,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "loadtest": True
+    }
+
+async def reset(db):
+    for name in COLLECTIONS:
+        result = await db[name].delete_many({"loadtest": True})
+        print(f"🧹 {name}: removed {result.deleted_count} documents")
+
+async def seed(db, users: int, listings: int, messages: int, notifications: int, wallet_entries: int, seed_value: int):
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+
+    user_docs = []
+    for i in range(users):
+        reg_no = f"RA{2100000000000 + i}"
+        user_docs.append({
+            "_id": ObjectId(),
+            "email": user_email(i),
+            "srm_id": f"loadtest-{i}",
+            "reg_no": reg_no,
+            "name": f"Load User {i}",
+            "phone": "",
+            "avatar": "",
+            "role": "student",
+            "wallet_balance": 50000.0,
+            "loadtest": True
+        })
+    await db.users.insert_many(user_docs)
+    user_ids = [doc["_id"] for doc in user_docs]
+    print(f"👤 users: {users}")
+
+    listing_docs = [_listing(rng, str(rng.choice(user_ids)), now) for _ in range(listings)]
+    if listing_docs:
+        await db.listings.insert_many(listing_docs)
+    print(f"📦 listings: {listings}")
+
+    message_docs = []
+    for _ in range(messages):
+        listing = rng.choice(listing_docs)
+        seller = ObjectId(listing["posted_by"])
+        buyer = rng.choice(user_ids)
+        sender, receiver = (buyer, seller) if rng.random() < 0.5 else (seller, buyer)
+        message_docs.append({
+            "sender_id": sender,
+            "receiver_id": receiver,
+            "listing_id": listing["_id"],
+            "message": rng.choice(["Is this still available?", "Can you do a lower price?", "Where can we meet?", "Deal, see you at 5."]),
+            "timestamp": now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            "loadtest": True
+        })
+    if message_docs:
+        await db.messages.insert_many(message_docs)
+    print(f"💬 messages: {messages}")
+
+    notification_docs = [{
+        "user_id": rng.choice(user_ids),
+        "type": rng.choice(["message", "buy_request", "system"]),
+        "title": "Load test notification",
+        "message": "Synthetic notification",
+        "metadata": {},
+        "is_read": rng.random() < 0.6,
+        "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+        "loadtest": True
+    } for _ in range(notifications)]
+    if notification_docs:
+        await db.notifications.insert_many(notification_docs)
+    print(f"🔔 notifications: {notifications}")
+
+    wallet_docs = [{
+        "user_id": rng.choice(user_ids),
+        "type": rng.choice(["credit", "debit"]),
+        "amount": float(rng.randrange(100, 5000, 50)),
+        "ref_note": "Load test entry",
+        "timestamp": now - timedelta(minutes=rng.randint(60 * 24, 60 * 24 * 90)),
+        "loadtest": True
+    } for _ in range(wallet_entries)]
+    if wallet_docs:
+        await db.wallet_history.insert_many(wallet_docs)
+    print(f"💰 wallet history: {wallet_entries}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Seed MongoDB with synthetic load-test data")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--notifications", type=int, default=5000)
+    parser.add_argument("--wallet-history", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42, help="random seed, for reproducible data")
+    parser.add_argument("--reset", action="store_true", help="remove previous load-test data first")
+    parser.add_argument("--reset-only", action="store_true", help="only remove load-test data")
+    args = parser.parse_args()
+
+    mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017/brokebuy")
+    if "localhost" not in mongo_uri and "127.0.0.1" not in mongo_uri and not os.getenv("LOADTEST_ALLOW_REMOTE"):
+        raise SystemExit("❌ Refusing to seed a non-local database (set LOADTEST_ALLOW_REMOTE=1 to override)")
+
+    client = AsyncIOMotorClient(mongo_uri)
+    db = client["brokebuy"]
+    try:
+        if args.reset or args.reset_only:
+            await reset(db)
+        if not args.reset_only:
+            await seed(db, args.users, args.listings, args.messages, args.notifications, args.wallet_history, args.seed)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+pytest plugin asserting a maximum number of MongoDB queries per endpoint.
+
+Enable it with `pytest -p pytest_query_budget` (or `pytest_plugins = ["pytest_query_budget"]`
+in a conftest) and mark tests that call the app:
+
+    @pytest.mark.max_queries(3)
+    def test_recent_listings(client):
+        client.get("/listings/recent")
+
+    @pytest.mark.max_queries(2, route="/listings/{listing_id}")
+    def test_listing_page(client): ...
+
+Every request made during the test (optionally only those matching `route`)
+must stay within the budget. The `query_reports` fixture returns the
+profiler reports collected so far in the test.
+"""
+
+import os
+
+# Must be set before app.utils.query_profiler is imported, which happens when the app is imported
+os.environ.setdefault("QUERY_PROFILER", "true")
+
+import pytest
+from app.utils.query_profiler import QueryProfiler
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "max_queries(n, route=None): fail if a request made by the test issues more than n MongoDB queries"
+    )
+
+@pytest.fixture
+def query_reports(request):
+    return request.node._query_reports
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    item._query_reports = []
+    QueryProfiler.add_report_hook(item._query_reports.append)
+    yield
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_call(item):
+    # Runs after the test body has passed
+    marker = item.get_closest_marker("max_queries")
+    if marker is None:
+        return
+    budget = marker.args[0] if marker.args else marker.kwargs["n"]
+    route = marker.kwargs.get("route")
+
+    for report in item._query_reports:
+        if route is not None and report["route"] != route:
+            continue
+        if report["queries"] > budget:
+            repeated = ", ".join(f"{entry['shape']} x{entry['count']}" for entry in report["n_plus_one"])
+            pytest.fail(
+                f"{report['method']} {report['route']} issued {report['queries']} queries (budget {budget})"
+                + (f"; repeated: {repeated}" if repeated else ""),
+                pytrace=False
+            )
+
+def pytest_runtest_teardown(item):
+    reports = getattr(item, "_query_reports", None)
+    if reports is not None:
+        QueryProfiler.remove_report_hook(reports.append)
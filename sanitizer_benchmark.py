@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark the listing sanitizer against real listing texts.
+
+The corpus is read from a mongodump of the listings collection
+(./atlas_backup/brokebuy/listings.bson, see export_atlas_data.sh) or, if
+that file doesn't exist, from the live database at MONGO_URI. It times the
+legacy pattern-by-pattern sanitizer against the compiled one and checks
+that both flag the same listings as spam.
+
+Usage: python sanitizer_benchmark.py [path/to/listings.bson] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import html
+import os
+import re
+import time
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from app.utils.sanitizer import InputSanitizer
+
+load_dotenv()
+
+DEFAULT_DUMP = "./atlas_backup/brokebuy/listings.bson"
+FIELDS = [("title", 100), ("description", 1000), ("category", 50), ("condition", 50), ("location", 100)]
+
+def legacy_sanitize_text(text: str, max_length: int = 1000) -> str:
+    """The sanitizer as it was before it was compiled, kept here as the baseline"""
+    if not text:
+        return ""
+    text = html.escape(text)
+    text = ' '.join(text.split())
+    for pattern in InputSanitizer.SPAM_PATTERNS:
+        text = re.sub(pattern, '[REDACTED]', text, flags=re.IGNORECASE)
+    return text[:max_length].strip()
+
+def legacy_is_spam(text: str) -> bool:
+    if not text:
+        return False
+    text_lower = text.lower()
+    for keyword in InputSanitizer.SPAM_KEYWORDS:
+        if keyword in text_lower:
+            return True
+    words = text.split()
+    if len(words) > 10:
+        word_counts = {}
+        for word in words:
+            word_counts[word.lower()] = word_counts.get(word.lower(), 0) + 1
+        if max(word_counts.values()) > len(words) * 0.3:
+            return True
+    return False
+
+def load_dump(path: str) -> list:
+    with open(path, "rb") as f:
+        return [{name: doc.get(name) for name, _ in FIELDS} for doc in bson.decode_file_iter(f)]
+
+async def load_database() -> list:
+    client = AsyncIOMotorClient(os.getenv("MONGO_URI"))
+    try:
+        projection = {name: 1 for name, _ in FIELDS}
+        return [doc async for doc in client["brokebuy"].listings.find({}, projection)]
+    finally:
+        client.close()
+
+def run_legacy(corpus: list) -> list:
+    flagged = []
+    for listing in corpus:
+        fields = {
+            name: legacy_sanitize_text(listing.get(name), max_length=max_length) if listing.get(name) else None
+            for name, max_length in FIELDS
+        }
+        flagged.append(legacy_is_spam(fields["title"]) or legacy_is_spam(fields["description"]))
+    return flagged
+
+def run_compiled(corpus: list) -> list:
+    flagged = []
+    for listing in corpus:
+        fields = InputSanitizer.sanitize_fields({name: (listing.get(name), max_length) for name, max_length in FIELDS})
+        flagged.append(InputSanitizer.any_spam((fields["title"], fields["description"])))
+    return flagged
+
+def time_run(run, corpus: list, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(corpus)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the listing sanitizer")
+    parser.add_argument("dump", nargs="?", default=DEFAULT_DUMP, help="mongodump listings.bson file")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    if os.path.exists(args.dump):
+        corpus = load_dump(args.dump)
+        source = args.dump
+    else:
+        corpus = asyncio.run(load_database())
+        source = "MONGO_URI"
+
+    if not corpus:
+        print(f"❌ No listings found in {source}")
+        return
+
+    chars = sum(len(listing.get(name) or "") for listing in corpus for name, _ in FIELDS)
+    print(f"📚 {len(corpus)} listings ({chars / 1024:.1f} KiB of text) from {source}")
+
+    legacy_time, legacy_flags = time_run(run_legacy, corpus, args.repeat)
+    compiled_time, compiled_flags = time_run(run_compiled, corpus, args.repeat)
+
+    for label, elapsed in (("legacy", legacy_time), ("compiled", compiled_time)):
+        print(f"⏱️ {label:<8} {elapsed * 1000:8.2f} ms total, {elapsed / len(corpus) * 1e6:7.1f} µs/listing")
+    print(f"🚀 Speedup: {legacy_time / compiled_time:.2f}x")
+
+    mismatches = sum(a != b for a, b in zip(legacy_flags, compiled_flags))
+    print(f"🛡️ Spam verdicts: {sum(compiled_flags)} flagged, {mismatches} differ from legacy")
+
+if __name__ == "__main__":
+    main()
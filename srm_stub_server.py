@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Local stub of the SRM scraper for tests and load runs.
+
+Serves /login, /profile, /logout and /health with the same response shapes
+as the real scraper. Point the backend at it with:
+
+    SRM_SCRAPER_URL=http://localhost:3001
+    SRM_LOGOUT_URL=http://localhost:3001/logout
+
+Optional knobs:
+    SRM_STUB_LATENCY_MS   artificial latency per request (default 0)
+    SRM_STUB_FAILURE_RATE fraction of requests answered with 503 (default 0)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException
+from pydantic import BaseModel
+import uvicorn
+
+LATENCY_MS = float(os.getenv("SRM_STUB_LATENCY_MS", "0"))
+FAILURE_RATE = float(os.getenv("SRM_STUB_FAILURE_RATE", "0"))
+
+app = FastAPI()
+
+# token -> account, so /profile can answer for whoever logged in
+sessions = {}
+
+class LoginRequest(BaseModel):
+    account: str
+    password: str
+
+async def _simulate_conditions():
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        raise HTTPException(status_code=503, detail="Stub scraper failure")
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.post("/login")
+async def login(data: LoginRequest):
+    await _simulate_conditions()
+    if data.password == "wrong":
+        return {"authenticated": False}
+
+    token = hashlib.sha256(f"{data.account}:{random.random()}".encode()).hexdigest()[:32]
+    sessions[token] = data.account
+    return {"authenticated": True, "cookies": token}
+
+@app.get("/profile")
+async def profile(x_csrf_token: Optional[str] = Header(None)):
+    await _simulate_conditions()
+    account = sessions.get(x_csrf_token)
+    if not account:
+        raise HTTPException(status_code=401, detail="Unknown session")
+
+    digest = hashlib.sha256(account.encode()).hexdigest()
+    reg_no = f"RA{int(digest[:10], 16) % 10**13:013d}"
+    return {
+        "id": digest[:24],
+        "name": f"{reg_no} - {account.split('@')[0].title()}",
+        "regNumber": reg_no,
+        "photoUrl": ""
+    }
+
+@app.delete("/logout")
+async def logout(x_csrf_token: Optional[str] = Header(None)):
+    await _simulate_conditions()
+    sessions.pop(x_csrf_token, None)
+    return {"message": "Logged out"}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the SRM scraper stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Report where the backend's cold start goes.
+
+Imports app.main in fresh interpreters, times the import phase with
+StartupProfile, and breaks one run down by module using `python -X importtime`.
+Exits with status 1 if the median import phase is over COLD_START_TARGET_MS
+(or --target-ms), so it can guard against import-time regressions in CI.
+Startup hooks need MongoDB and are reported by the app itself on boot.
+
+Usage: python startup_report.py [--runs N] [--top N] [--target-ms MS]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from app.config import settings
+
+MEASURE = "import app.main; from app.utils.startup_profile import StartupProfile; print(StartupProfile.total_ms())"
+
+def measure_import_ms() -> float:
+    result = subprocess.run([sys.executable, "-c", MEASURE], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def import_breakdown() -> list:
+    """(module, self_us, cumulative_us, depth) for every module app.main imports"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start import profile")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=settings.cold_start_target_ms)
+    args = parser.parse_args()
+
+    rows = import_breakdown()
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"📦 Import time by top-level package (self time, top {args.top})")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<28} {self_us / 1000:8.1f} ms")
+
+    print(f"\n🧩 App modules by cumulative import time (top {args.top})")
+    app_rows = [row for row in rows if row[0].startswith("app.") and row[0] != "app.main"]
+    for name, _, cumulative_us, _ in sorted(app_rows, key=lambda row: -row[2])[:args.top]:
+        print(f"  {name:<40} {cumulative_us / 1000:8.1f} ms")
+
+    timings = [measure_import_ms() for _ in range(args.runs)]
+    median = statistics.median(timings)
+    print(f"\n⏱️ app.main import: median {median:.0f} ms, min {min(timings):.0f} ms, max {max(timings):.0f} ms over {args.runs} runs")
+    print(f"🎯 Target: {args.target_ms:.0f} ms")
+    if median > args.target_ms:
+        print("❌ Over target")
+        sys.exit(1)
+    print("✅ Within target")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+
+# Settings are validated on import, and prod requires a JWT secret
+os.environ.setdefault("APP_ENV", "dev")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.database import Database
+
+@pytest.fixture
+def mongo():
+    """An in-memory MongoDB behind app.database.db for the duration of a test"""
+    Database.client = AsyncMongoMockClient()
+    yield Database.get_db()
+    Database.client = None
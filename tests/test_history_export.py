@@ -0,0 +1,38 @@
+import asyncio
+import io
+from datetime import datetime, timezone
+import pytest
+from bson import ObjectId
+from app.routes.exports import COLUMN_TYPES, CREDIT_TRANSACTION_COLUMNS
+from app.utils.history_export import HistoryExporter
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+def test_parquet_columns_are_typed(mongo):
+    created_at = datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+    async def scenario():
+        await mongo.credit_transactions.insert_many([
+            {
+                "user_id": ObjectId(), "amount": 250, "transaction_type": "sale_proceeds",
+                "is_auto_refill": False, "created_at": created_at,
+                "previous_balance": 1000.0, "new_balance": 1250.0
+            },
+            {"user_id": ObjectId(), "amount": 12.5, "transaction_type": "manual_topup", "created_at": created_at},
+        ])
+        chunks = [
+            chunk async for chunk in HistoryExporter.stream_parquet(
+                mongo.credit_transactions, {}, CREDIT_TRANSACTION_COLUMNS, COLUMN_TYPES, batch_size=1
+            )
+        ]
+        return b"".join(chunks)
+
+    table = pq.read_table(io.BytesIO(asyncio.run(scenario())))
+    assert table.schema.field("amount").type == pa.float64()
+    assert table.schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+    assert table.schema.field("is_auto_refill").type == pa.bool_()
+    assert table.schema.field("user_id").type == pa.string()
+    assert table.column("amount").to_pylist() == [250.0, 12.5]
+    assert table.column("created_at").to_pylist()[0] == created_at
+    assert table.column("new_balance").to_pylist() == [1250.0, None]
@@ -0,0 +1,187 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.utils import idempotency
+from app.utils.idempotency import IdempotencyGuard
+
+class Handler:
+    """Counts calls and returns (or raises) a fixed outcome"""
+
+    def __init__(self, result=None, error=None, delay=0.0):
+        self.calls = 0
+        self.result = result if result is not None else {"message": "done"}
+        self.error = error
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+def run(key, handler, scope="wallet.topup", body=None, user_id="u1"):
+    return IdempotencyGuard.run(key, user_id, scope, handler, body=body)
+
+def test_replays_the_stored_response(mongo):
+    handler = Handler(result={"message": "₹100 added"})
+
+    async def scenario():
+        first = await run("k1", handler, body={"amount": 100})
+        second = await run("k1", handler, body={"amount": 100})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert handler.calls == 1
+    assert first == {"message": "₹100 added"}
+    assert isinstance(second, JSONResponse)
+    assert second.status_code == 200
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+def test_rejects_a_reused_key_with_a_different_body(mongo):
+    handler = Handler()
+
+    async def scenario():
+        await run("k1", handler, body={"amount": 100})
+        await run("k1", handler, body={"amount": 5000})
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 422
+    assert handler.calls == 1
+
+def test_rejects_a_reused_key_for_a_different_route(mongo):
+    handler = Handler()
+
+    async def scenario():
+        await run("k1", handler, scope="wallet.topup")
+        await run("k1", handler, scope="listings.buy")
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 422
+    assert handler.calls == 1
+
+def test_client_errors_are_stored_and_replayed(mongo):
+    handler = Handler(error=HTTPException(status_code=400, detail="Insufficient wallet balance"))
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await run("k1", handler)
+        return await run("k1", handler)
+
+    replay = asyncio.run(scenario())
+    assert handler.calls == 1
+    assert replay.status_code == 400
+
+def test_server_errors_release_the_key(mongo):
+    handler = Handler(error=HTTPException(status_code=503, detail="SRM unavailable"))
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await run("k1", handler)
+        handler.error = None
+        return await run("k1", handler)
+
+    assert asyncio.run(scenario()) == {"message": "done"}
+    assert handler.calls == 2
+
+def test_unexpected_errors_release_the_key(mongo):
+    handler = Handler(error=RuntimeError("boom"))
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await run("k1", handler)
+        return await mongo.idempotency_keys.find_one({"_id": "u1:k1"})
+
+    assert asyncio.run(scenario()) is None
+
+def test_concurrent_duplicate_gets_409_without_running(mongo):
+    handler = Handler(delay=0.2)
+
+    async def scenario():
+        first = asyncio.create_task(run("k1", handler))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as error:
+            await run("k1", handler)
+        await first
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 409
+    assert handler.calls == 1
+
+def test_lease_is_renewed_while_the_handler_runs(mongo, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_lock_seconds", 0.3)
+    handler = Handler(delay=0.8)
+
+    async def scenario():
+        first = asyncio.create_task(run("k1", handler))
+        # Well past the original lease; the heartbeat must have extended it
+        await asyncio.sleep(0.6)
+        with pytest.raises(HTTPException) as error:
+            await run("k1", handler)
+        await first
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 409
+    assert "still being processed" in error.detail
+    assert handler.calls == 1
+
+def test_expired_claim_is_not_taken_over(mongo):
+    handler = Handler()
+
+    async def scenario():
+        past = datetime.now(timezone.utc) - timedelta(minutes=5)
+        await mongo.idempotency_keys.insert_one({
+            "_id": "u1:k1",
+            "scope": "wallet.topup",
+            "fingerprint": IdempotencyGuard.fingerprint({"amount": 100}),
+            "status": "in_progress",
+            "locked_until": past,
+            "created_at": past
+        })
+        await run("k1", handler, body={"amount": 100})
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 409
+    assert "unknown" in error.value.detail
+    assert handler.calls == 0
+
+class FailingCompletes:
+    """Passes everything through to the real collection except the completion update"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    async def update_one(self, query, update, *args, **kwargs):
+        if update.get("$set", {}).get("status") == "completed":
+            raise RuntimeError("primary stepped down")
+        return await self._collection.update_one(query, update, *args, **kwargs)
+
+def test_failed_completion_keeps_the_key(mongo, monkeypatch):
+    class FailingDb:
+        idempotency_keys = FailingCompletes(mongo.idempotency_keys)
+
+    monkeypatch.setattr(idempotency, "db", FailingDb())
+    handler = Handler()
+
+    async def scenario():
+        result = await run("k1", handler)
+        with pytest.raises(HTTPException) as error:
+            await run("k1", handler)
+        return result, error.value
+
+    result, error = asyncio.run(scenario())
+    assert result == {"message": "done"}
+    assert error.status_code == 409
+    assert handler.calls == 1
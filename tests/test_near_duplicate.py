@@ -0,0 +1,46 @@
+import asyncio
+from bson import ObjectId
+from app.utils.near_duplicate import MinHashSignature, NearDuplicateDetector
+
+TITLE = "iPhone 12 64GB blue"
+DESCRIPTION = "Barely used iPhone 12 with 64GB storage, blue, original box and charger, no scratches."
+
+def signature():
+    return MinHashSignature.from_text(f"{TITLE}\n{DESCRIPTION}")
+
+def test_own_repost_is_found_past_many_colliding_listings(mongo):
+    async def scenario():
+        # More than MAX_CANDIDATES other sellers list the same item before this seller's original
+        for index in range(NearDuplicateDetector.MAX_CANDIDATES + 10):
+            await NearDuplicateDetector.record_listing(ObjectId(), f"other-{index}", signature())
+        original = ObjectId()
+        await NearDuplicateDetector.record_listing(original, "seller", signature())
+        return original, await NearDuplicateDetector.check_listing("seller", TITLE, DESCRIPTION)
+
+    original, (rejected, reason, _, near_duplicate_of) = asyncio.run(scenario())
+    assert rejected
+    assert near_duplicate_of == str(original)
+
+def test_other_sellers_match_is_reported_not_rejected(mongo):
+    async def scenario():
+        other = ObjectId()
+        await NearDuplicateDetector.record_listing(other, "someone-else", signature())
+        return other, await NearDuplicateDetector.check_listing("seller", TITLE, DESCRIPTION)
+
+    other, (rejected, _, _, near_duplicate_of) = asyncio.run(scenario())
+    assert not rejected
+    assert near_duplicate_of == str(other)
+
+def test_message_blast_is_found_past_many_messages_to_the_same_receiver(mongo):
+    message = "Hey! Selling my barely used cycle for cheap, ping me if you're interested in buying it."
+    message_signature = MinHashSignature.from_text(message)
+
+    async def scenario():
+        for _ in range(NearDuplicateDetector.MAX_CANDIDATES + 10):
+            await NearDuplicateDetector.record_message(ObjectId(), "sender", "friend", message_signature)
+        for index in range(NearDuplicateDetector.MESSAGE_REPEAT_LIMIT):
+            await NearDuplicateDetector.record_message(ObjectId(), "sender", f"stranger-{index}", message_signature)
+        return await NearDuplicateDetector.check_message("sender", "friend", message)
+
+    is_blast, _, _ = asyncio.run(scenario())
+    assert is_blast